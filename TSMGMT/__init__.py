@@ -5,6 +5,9 @@ from .main.routes import main_bp
 from .work_status.basecamp import init_basecamp_oauth
 from .work_status.routes import work_status_bp
 from .sitegroup.routes import sitegroup_bp
+from .metrics.routes import metrics_bp, init_metrics
+from .db.profiler import init_profiler
+from .utils.logging_setup import configure_logging
 from flask_login import LoginManager
 from flask import session
 
@@ -12,6 +15,9 @@ def create_app():
     app = Flask(__name__, static_folder='static', template_folder='templates')
     app.config.from_object('config')
     app.secret_key = app.config['APP_SECRET_KEY']
+    configure_logging(app)
+    init_metrics(app)
+    init_profiler(app)
     init_basecamp_oauth(app)
 
     app.config.from_mapping(
@@ -40,6 +46,7 @@ def create_app():
     app.register_blueprint(main_bp) 
     app.register_blueprint(work_status_bp, url_prefix='/work_status')
     app.register_blueprint(sitegroup_bp, url_prefix='/sitegroup')
+    app.register_blueprint(metrics_bp)
 
     #app.register_blueprint(work_status_bp, url_prefix='/work_status')
     #  register other blueprints
@@ -0,0 +1,19 @@
+# TSMGMT/auth/decorators.py
+import os
+from functools import wraps
+from flask import session, redirect, url_for, flash
+
+def is_admin(user) -> bool:
+    """True if the session user is the configured admin (ADMIN_EMAIL)."""
+    admin_email = os.getenv("ADMIN_EMAIL", "matt@cityspan.com")
+    return bool(user) and user.get('email') == admin_email
+
+def admin_required(view):
+    """Redirect non-admins to the home page, as admin_view does."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not is_admin(session.get('user')):
+            flash("You must be an admin to view this page.", "danger")
+            return redirect(url_for('main.home'))
+        return view(*args, **kwargs)
+    return wrapped
@@ -0,0 +1,3 @@
+from .connection import UnitOfWork, unit_of_work, current_unit_of_work
+from .connection import submit, submit_query, submit_after, gather
+from .connection import RetryPolicy, TRANSIENT_RETRY, with_retry, transient_reason
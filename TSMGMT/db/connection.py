@@ -1,7 +1,22 @@
+import contextvars
+import random
+import re
+import threading
+import time
 import pyodbc as p
-from flask import current_app
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from flask import current_app, has_app_context
 from requests.structures import CaseInsensitiveDict
-from typing import List, Tuple, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple, Optional
+from ..metrics.collector import record_db
+from ..metrics.registry import REGISTRY
+from .profiler import PROFILER
 #testing publish 3
 def get_connection(connection_name: str = "SMS") -> p.Connection:
     """
@@ -32,18 +47,299 @@ def get_connection(connection_name: str = "SMS") -> p.Connection:
     except p.Error as ex:
         raise
 
+# -- STATEMENT CACHE ------------------------------------------------------------
+# pyodbc keeps the statement it last prepared on each cursor and skips
+# SQLPrepare when the same text runs on that cursor again; with
+# fast_executemany the parameter discovery the driver does per prepare
+# (UseFMTOnly) is skipped with it, and input sizes bound with
+# setinputsizes() stay on the cursor.  A unit of work's connection lives
+# for a whole batch of writes (a sync project, a merge), so it keeps an LRU
+# of cursors keyed by SQL text and reuses them.  Connections opened per
+# call outside a unit are closed straight after and gain nothing.
+
+STATEMENT_CACHE_SIZE = 32
+
+STATEMENT_CACHE = REGISTRY.counter(
+    'tsmgmt_db_statement_cache_total',
+    'Unit-of-work cursor lookups by SQL text (hit = a prepare avoided).', ('result',))
+
+class StatementCache:
+    """LRU of open cursors on one connection, keyed by (SQL text, executemany mode, input sizes)."""
+
+    def __init__(self, conn: p.Connection, maxsize: int = STATEMENT_CACHE_SIZE):
+        self._conn = conn
+        self.maxsize = maxsize
+        self._cursors: 'OrderedDict[tuple, p.Cursor]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(sql: str, fast_executemany: bool, input_sizes) -> tuple:
+        return (sql, fast_executemany, tuple(input_sizes) if input_sizes else None)
+
+    def cursor(self, sql: str, fast_executemany: bool = False,
+               input_sizes: Optional[List[Tuple[int, int, int]]] = None) -> p.Cursor:
+        key = self._key(sql, fast_executemany, input_sizes)
+        cursor = self._cursors.get(key)
+        if cursor is not None:
+            self._cursors.move_to_end(key)
+            self.hits += 1
+            STATEMENT_CACHE.inc(result='hit')
+            return cursor
+
+        cursor = self._conn.cursor()
+        cursor.fast_executemany = fast_executemany
+        if input_sizes:
+            cursor.setinputsizes(input_sizes)
+        self._cursors[key] = cursor
+        self.misses += 1
+        STATEMENT_CACHE.inc(result='miss')
+        if len(self._cursors) > self.maxsize:
+            _, oldest = self._cursors.popitem(last=False)
+            oldest.close()
+            STATEMENT_CACHE.inc(result='evicted')
+        return cursor
+
+    def discard(self, sql: str, fast_executemany: bool = False, input_sizes=None) -> None:
+        """Drop (and close) a cursor whose statement failed; it may hold unread results."""
+        cursor = self._cursors.pop(self._key(sql, fast_executemany, input_sizes), None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except p.Error:
+                pass
+
+    def close(self) -> None:
+        while self._cursors:
+            _, cursor = self._cursors.popitem()
+            try:
+                cursor.close()
+            except p.Error:
+                pass
+
+# -- UNIT OF WORK ---------------------------------------------------------------
+class UnitOfWork:
+    """
+    One connection and one transaction for a section.  While it is active
+    (see unit_of_work()), execute_query / execute_many on that section run
+    on its connection and leave committing to it.
+    """
+
+    def __init__(self, section_name: str = "SMS"):
+        self.section_name = section_name
+        self.statements = 0
+        self._conn: Optional[p.Connection] = None
+        self._cache: Optional[StatementCache] = None
+
+    @property
+    def connection(self) -> p.Connection:
+        """The shared connection, opened on first use."""
+        if self._conn is None:
+            self._conn = get_connection(self.section_name)
+        return self._conn
+
+    @property
+    def statement_cache(self) -> StatementCache:
+        if self._cache is None:
+            self._cache = StatementCache(self.connection)
+        return self._cache
+
+    def cursor(self, sql: str, fast_executemany: bool = False,
+               input_sizes: Optional[List[Tuple[int, int, int]]] = None) -> p.Cursor:
+        """A cursor on the unit's connection with `sql` likely already prepared; don't close it."""
+        return self.statement_cache.cursor(sql, fast_executemany, input_sizes)
+
+    @property
+    def prepares_avoided(self) -> int:
+        return self._cache.hits if self._cache is not None else 0
+
+    def commit(self) -> None:
+        if self._conn is not None:
+            self._conn.commit()
+
+    def rollback(self) -> None:
+        if self._conn is not None:
+            self._conn.rollback()
+
+    def close(self) -> None:
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+_units: ContextVar[Dict[str, UnitOfWork]] = ContextVar('tsmgmt_units_of_work', default={})
+
+def current_unit_of_work(section_name: str = "SMS") -> Optional[UnitOfWork]:
+    return _units.get().get(section_name)
+
+@contextmanager
+def unit_of_work(section_name: str = "SMS") -> Iterator[UnitOfWork]:
+    """
+    Run everything inside the block on one connection, committed once at
+    the end (rolled back if the block raises):
+
+        with unit_of_work('SMS'):
+            execute_many(...)
+            execute_query(...)
+
+    Nested blocks on the same section join the outer unit.
+    """
+    outer = current_unit_of_work(section_name)
+    if outer is not None:
+        yield outer
+        return
+
+    uow = UnitOfWork(section_name)
+    token = _units.set({**_units.get(), section_name: uow})
+    try:
+        yield uow
+        uow.commit()
+    except BaseException:
+        uow.rollback()
+        raise
+    finally:
+        _units.reset(token)
+        uow.close()
+
+# -- RETRY POLICY ---------------------------------------------------------------
+# Syncs, /update and /reorder all upsert with IF EXISTS / UPDATE / ELSE
+# INSERT, and once they run together SQL Server will now and then pick one
+# as a deadlock victim (1205) or time out its lock wait (1222).  Both are
+# worth another try, but only of the whole transaction: a deadlock victim's
+# transaction is already rolled back, so retrying one statement of it would
+# commit half a unit.  with_retry() therefore never retries inside a unit of
+# work; it retries the call that opens one (or a stand-alone statement).
+# Callers opt in only for work that is safe to repeat.
+
+# native SQL Server error numbers / SQLSTATEs worth retrying -> metric reason
+TRANSIENT_ERRORS = {
+    1205:  'deadlock',       # chosen as deadlock victim
+    1222:  'lock_timeout',   # lock request time-out period exceeded
+    1204:  'lock_timeout',   # out of lock resources
+    3960:  'conflict',       # snapshot isolation update conflict
+    40501: 'throttled',      # Azure SQL: service busy
+    40613: 'throttled',      # Azure SQL: database unavailable (failover)
+    49918: 'throttled',
+    49919: 'throttled',
+    49920: 'throttled',
+}
+TRANSIENT_SQLSTATES = {
+    '40001': 'deadlock',     # serialization failure
+    'HYT00': 'timeout',      # query timeout expired
+}
+
+_NATIVE_ERROR = re.compile(r"\((\d{3,5})\)")
+_WRITE_TARGET = re.compile(r"\b(?:INSERT\s+INTO|UPDATE|MERGE(?:\s+INTO)?|DELETE\s+FROM)\s+([\w.\[\]#]+)", re.I)
+_READ_SOURCE  = re.compile(r"\bFROM\s+([\w.\[\]#]+)", re.I)
+
+RETRIES = REGISTRY.counter(
+    'tsmgmt_db_retries_total',
+    'Transient SQL Server errors retried, by statement (target table) and reason.',
+    ('statement', 'reason'))
+RETRIES_EXHAUSTED = REGISTRY.counter(
+    'tsmgmt_db_retries_exhausted_total',
+    'Transient SQL Server errors still failing after the last attempt.',
+    ('statement', 'reason'))
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How often and how long to retry transient errors.
+    Attributes:
+        attempts (int): Tries in total, the first included.
+        base_delay (float): Backoff before the second try, in seconds; doubles per try.
+        max_delay (float): Cap on the backoff, in seconds.
+    """
+    attempts: int = 4
+    base_delay: float = 0.05
+    max_delay: float = 2.0
+
+    def delay(self, retry: int) -> float:
+        """Full-jitter backoff before retry number `retry` (from 1), so victims don't collide again."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (retry - 1))))
+
+TRANSIENT_RETRY = RetryPolicy()
+
+def transient_reason(exc: BaseException) -> Optional[str]:
+    """The TRANSIENT_* reason for a pyodbc error worth retrying, else None."""
+    if not isinstance(exc, p.Error):
+        return None
+    args = [str(a) for a in exc.args]
+    if args and args[0] in TRANSIENT_SQLSTATES:
+        return TRANSIENT_SQLSTATES[args[0]]
+    for code in _NATIVE_ERROR.findall(' '.join(args[1:] or args)):
+        reason = TRANSIENT_ERRORS.get(int(code))
+        if reason:
+            return reason
+    return None
+
+@lru_cache(maxsize=1024)
+def statement_label(sql: str) -> str:
+    """The table a statement writes (else reads), for per-statement retry counts."""
+    m = _WRITE_TARGET.search(sql) or _READ_SOURCE.search(sql)
+    return m.group(1).replace('[', '').replace(']', '') if m else 'other'
+
+def _tag(exc: BaseException, sql: str) -> None:
+    # the first statement to fail names the retry, even when a whole unit is retried
+    if not hasattr(exc, 'statement'):
+        try:
+            exc.statement = statement_label(sql)
+        except AttributeError:
+            pass
+
+def with_retry(policy: RetryPolicy, fn: Callable, *args, **kwargs):
+    """
+    Call fn(*args, **kwargs), retrying it after transient SQL Server errors
+    (see TRANSIENT_ERRORS) up to policy.attempts times with jittered
+    backoff.  fn must be safe to repeat.  Inside a unit of work the error
+    is re-raised at once for whoever opened the unit to retry.
+    """
+    retry = 0
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except p.Error as exc:
+            reason = transient_reason(exc)
+            if reason is None or _units.get():
+                raise
+            statement = getattr(exc, 'statement', None) or getattr(fn, '__name__', 'other')
+            retry += 1
+            if retry >= policy.attempts:
+                RETRIES_EXHAUSTED.inc(statement=statement, reason=reason)
+                raise
+            RETRIES.inc(statement=statement, reason=reason)
+            delay = policy.delay(retry)
+            if has_app_context():
+                current_app.logger.warning("%s on %s, retry %s/%s in %.2fs",
+                                           reason, statement, retry, policy.attempts - 1, delay)
+            time.sleep(delay)
+
+# -- QUERIES ----------------------------------------------------------------------
 def execute_query(query: str, params=None, database_config: str = "SMS", include_description=False):
     """
     Executes a SQL query that may produce multiple result sets.
     Returns a list of result sets (each a list of pyodbc.Row objects).
+    Inside a unit_of_work() it runs on the unit's connection and does not commit.
     """
     if params is None:
         params = ()
 
+    uow = current_unit_of_work(database_config)
     conn = None
+    started = time.perf_counter()
+    rows_fetched = 0
     try:
-        conn = get_connection(database_config)
-        with conn.cursor() as cursor:
+        if uow is not None:
+            conn = uow.connection
+            uow.statements += 1
+            cursor = uow.cursor(query)
+        else:
+            conn = get_connection(database_config)
+            # not `with conn.cursor()`: its exit commits, which would end the unit's transaction
+            cursor = conn.cursor()
+        try:
             cursor.execute(query, params)
 
             all_results = []
@@ -51,6 +347,7 @@ def execute_query(query: str, params=None, database_config: str = "SMS", include
                 if cursor.description:
                     columns = [col[0] for col in cursor.description]
                     rows = cursor.fetchall()
+                    rows_fetched += len(rows)
 
                     #useful if you want column names for otherwise empty result sets
                     if include_description:
@@ -63,16 +360,29 @@ def execute_query(query: str, params=None, database_config: str = "SMS", include
 
                 if not cursor.nextset():
                     break
+        except BaseException:
+            if uow is not None:
+                uow.statement_cache.discard(query)
+            raise
+        finally:
+            if uow is None:
+                cursor.close()
 
-            return all_results[0] if len(all_results) == 1 else all_results
+        if uow is None:
+            conn.commit()
+        return all_results[0] if len(all_results) == 1 else all_results
 
     except p.Error as ex:
-        if conn:
+        _tag(ex, query)
+        if conn and uow is None:
             conn.rollback()
         raise
     finally:
-        if conn:
+        if conn and uow is None:
             conn.close()
+        elapsed = time.perf_counter() - started
+        record_db(elapsed, rows_fetched)
+        PROFILER.record(query, params, database_config, elapsed, rows_fetched)
 
 def execute_many(
     sql: str,
@@ -80,9 +390,12 @@ def execute_many(
     batch_size: int = 5000,
     section_name: str = "SMS",
     input_sizes: Optional[List[Tuple[int, int, int]]] = None,
+    retry: Optional[RetryPolicy] = None,
 ) -> int:
     """
     Executes a batch insert/update using executemany with fast execution mode.
+    Each batch is committed, unless running inside a unit_of_work(), which
+    commits once at the end.
 
     Args:
         sql (str): The SQL query to execute.
@@ -92,6 +405,10 @@ def execute_many(
         input_sizes (Optional[List[Tuple[int,int,int]]]):
             List of (sql_type, size, decimal) for each parameter to bind.
             If provided, set via cursor.setinputsizes().
+        retry (Optional[RetryPolicy]): Retry the whole call on deadlocks and
+            lock timeouts (see with_retry()).  Only for idempotent statements,
+            since batches committed before the failure run again; ignored
+            inside a unit_of_work().
 
     Returns:
         int: The total number of rows inserted/updated.
@@ -101,34 +418,297 @@ def execute_many(
     """
     if not data:
         return 0
+    if retry is not None and current_unit_of_work(section_name) is None:
+        return with_retry(retry, execute_many, sql, data, batch_size, section_name, input_sizes)
 
     total_rows = 0
+    uow = current_unit_of_work(section_name)
     conn = None
+    started = time.perf_counter()
 
     try:
-        conn = get_connection(section_name)
-        cursor = conn.cursor()
-        cursor.fast_executemany = True
+        if uow is not None:
+            conn = uow.connection
+            uow.statements += 1
+            cursor = uow.cursor(sql, fast_executemany=True, input_sizes=input_sizes)
+        else:
+            conn = get_connection(section_name)
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
 
-        if input_sizes:
-            cursor.setinputsizes(input_sizes)
+            if input_sizes:
+                cursor.setinputsizes(input_sizes)
 
         for i in range(0, len(data), batch_size):
             batch = data[i : i + batch_size]
             cursor.executemany(sql, batch)
-            conn.commit()
+            if uow is None:
+                conn.commit()
             total_rows += len(batch)
 
+        if uow is None:
+            cursor.close()
         return total_rows
 
-    except p.Error:
-        if conn:
+    except p.Error as ex:
+        _tag(ex, sql)
+        if conn and uow is None:
+            conn.rollback()
+        if uow is not None:
+            uow.statement_cache.discard(sql, True, input_sizes)
+        raise
+
+    finally:
+        if conn and uow is None:
+            conn.close()
+        elapsed = time.perf_counter() - started
+        record_db(elapsed)
+        PROFILER.record(sql, data[0], section_name, elapsed)
+
+# -- CONCURRENT QUERIES -------------------------------------------------------------
+# One bounded pool per process, shared by every request, so concurrent page
+# renders can't open more than QUERY_WORKERS extra connections between them.
+QUERY_WORKERS = 8
+
+_query_pool: Optional[ThreadPoolExecutor] = None
+_query_pool_lock = threading.Lock()
+
+def _pool() -> ThreadPoolExecutor:
+    global _query_pool
+    if _query_pool is None:
+        with _query_pool_lock:
+            if _query_pool is None:
+                _query_pool = ThreadPoolExecutor(max_workers=QUERY_WORKERS,
+                                                 thread_name_prefix='db-query')
+    return _query_pool
+
+def submit(fn: Callable, *args, **kwargs) -> Future:
+    """
+    Run fn(*args, **kwargs) on the shared query pool and return its Future.
+    The call sees the caller's app context and metrics collectors, but not
+    its unit_of_work (a pyodbc connection is not shared across threads), so
+    each query gets its own connection.
+    """
+    ctx = contextvars.copy_context()
+    app = current_app._get_current_object() if has_app_context() else None
+
+    def run():
+        _units.set({})
+        if app is None:
+            return fn(*args, **kwargs)
+        with app.app_context():
+            return fn(*args, **kwargs)
+
+    return _pool().submit(ctx.run, run)
+
+def submit_query(query: str, params=None, database_config: str = "SMS", include_description=False) -> Future:
+    """execute_query() on the shared query pool; the Future resolves to its result."""
+    return submit(execute_query, query, params, database_config, include_description)
+
+def submit_after(first: Future, fn: Callable, *args, **kwargs) -> Future:
+    """
+    Submit fn(*args, **kwargs) once `first` has succeeded (its Future fails
+    with first's exception otherwise).  No pool thread is held waiting.
+    """
+    ctx = contextvars.copy_context()
+    out: Future = Future()
+
+    def relay(done: Future) -> None:
+        exc = done.exception()
+        if exc is not None:
+            out.set_exception(exc)
+        else:
+            out.set_result(done.result())
+
+    def chain(done: Future) -> None:
+        exc = done.exception()
+        if exc is not None:
+            out.set_exception(exc)
+            return
+        # callbacks run on whichever thread finished `first`; submit from the caller's context
+        ctx.run(submit, fn, *args, **kwargs).add_done_callback(relay)
+
+    first.add_done_callback(chain)
+    return out
+
+def gather(futures: Mapping[str, Future], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Wait for every future in `futures` and return {name: result}.  The first
+    failure (in mapping order) is re-raised once all of them have finished
+    (or `timeout` seconds have passed), so nothing is left running against
+    the caller's objects.
+    """
+    results, error = {}, None
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for name, future in futures.items():
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            results[name] = future.result(timeout=remaining)
+        except Exception as exc:
+            if error is None:
+                error = exc
+    if error is not None:
+        raise error
+    return results
+
+# -- BULK LOAD ----------------------------------------------------------------------
+# declared SQL Server type -> (pyodbc SQL type, column size, decimal digits,
+# what a parenthesised argument means: 'length', 'precision' or None)
+_BULK_TYPES = {
+    'BIGINT':    (p.SQL_BIGINT,         0,  0, None),
+    'INT':       (p.SQL_INTEGER,        0,  0, None),
+    'BIT':       (p.SQL_BIT,            0,  0, None),
+    'DATE':      (p.SQL_TYPE_DATE,     10,  0, None),
+    'DATETIME2': (p.SQL_TYPE_TIMESTAMP, 27, 7, 'precision'),
+    'NVARCHAR':  (p.SQL_WVARCHAR,    4000,  0, 'length'),
+    'VARCHAR':   (p.SQL_VARCHAR,     8000,  0, 'length'),
+}
+# (N)VARCHAR(MAX) binds as the matching long type, size 0
+_MAX_TYPES = {p.SQL_WVARCHAR: p.SQL_WLONGVARCHAR, p.SQL_VARCHAR: p.SQL_LONGVARCHAR}
+_DECLARED_TYPE = re.compile(r"^\s*(\w+)\s*(?:\(\s*(\w+)\s*\))?", re.I)
+
+def _input_size(declared: str) -> Tuple[int, int, int]:
+    m = _DECLARED_TYPE.match(declared)
+    base = _BULK_TYPES.get(m.group(1).upper()) if m else None
+    if base is None:
+        raise ValueError(f"bulk_load: unsupported column type {declared!r}")
+    sql_type, size, decimals, argument = base
+    arg = m.group(2)
+    if arg is None:
+        return sql_type, size, decimals
+
+    if argument == 'length' and arg.upper() == 'MAX':
+        return _MAX_TYPES[sql_type], 0, 0
+    if argument == 'length' and arg.isdigit() and int(arg) > 0:
+        return sql_type, int(arg), decimals
+    if argument == 'precision' and arg.isdigit() and int(arg) <= 7:
+        # DATETIME2(n): 'yyyy-mm-dd hh:mm:ss' plus '.' and n fractional digits
+        n = int(arg)
+        return sql_type, 20 + n if n else 19, n
+    raise ValueError(f"bulk_load: unsupported argument in column type {declared!r}")
+
+@dataclass(frozen=True)
+class BulkSchema:
+    """
+    Column layout for bulk_load(): (name, SQL Server type) pairs in row
+    order, e.g. ('todo_id', 'BIGINT'), ('content', 'NVARCHAR(4000) NULL').
+    `table_type` names the matching user-defined table type (see sql/)
+    that enables the table-valued-parameter path.
+    """
+    columns: Tuple[Tuple[str, str], ...]
+    table_type: Optional[str] = None
+
+    @property
+    def names(self) -> List[str]:
+        return [name for name, _ in self.columns]
+
+    def input_sizes(self) -> List[Tuple[int, int, int]]:
+        """setinputsizes() values inferred from the declared types."""
+        return [_input_size(declared) for _, declared in self.columns]
+
+    def create_table(self, table: str) -> str:
+        """CREATE TABLE statement for a staging (e.g. #temp) table with these columns."""
+        cols = ',\n    '.join(f"{name} {declared}" for name, declared in self.columns)
+        return f"CREATE TABLE {table} (\n    {cols}\n);"
+
+def _batches(rows: Iterable[Sequence], size: int) -> Iterator[List[tuple]]:
+    it = iter(rows)
+    while True:
+        batch = [tuple(row) for row in islice(it, size)]
+        if not batch:
+            return
+        yield batch
+
+def bulk_load(
+    table: str,
+    rows: Iterable[Sequence],
+    schema: BulkSchema,
+    section_name: str = "SMS",
+    batch_size: int = 5000,
+    method: str = "auto",
+) -> int:
+    """
+    Streams `rows` (any iterable, e.g. a generator) into `table`, holding
+    at most one batch of `batch_size` rows in memory.
+
+    method:
+        'tvp'         one INSERT ... SELECT FROM a table-valued parameter per
+                      batch; needs schema.table_type to exist in the database.
+        'executemany' fast_executemany with input sizes inferred from the schema.
+        'auto'        'tvp' when the schema names a table type, else 'executemany'.
+
+    Inside a unit_of_work() it runs on the unit's connection (so #temp tables
+    created there are visible) and the unit commits; otherwise each batch is
+    committed.
+
+    Returns:
+        int: The number of rows loaded.
+    """
+    if method == "auto":
+        method = "tvp" if schema.table_type else "executemany"
+    if method not in ("tvp", "executemany"):
+        raise ValueError(f"bulk_load: unknown method {method!r}")
+    if method == "tvp" and not schema.table_type:
+        raise ValueError("bulk_load: the tvp method needs schema.table_type")
+
+    cols = ', '.join(schema.names)
+    if method == "tvp":
+        sql = f"INSERT INTO {table} ({cols}) SELECT {cols} FROM ?;"
+        # pyodbc reads a leading type name (and schema) off the TVP rows
+        type_schema, _, type_name = schema.table_type.rpartition('.')
+        tvp_head = [type_name, type_schema or 'dbo']
+    else:
+        sql = f"INSERT INTO {table} ({cols}) VALUES ({', '.join('?' for _ in schema.columns)});"
+
+    total_rows = 0
+    uow = current_unit_of_work(section_name)
+    conn = None
+    started = time.perf_counter()
+    first = None
+
+    try:
+        fast = method == "executemany"
+        sizes = schema.input_sizes() if fast else None
+        if uow is not None:
+            conn = uow.connection
+            uow.statements += 1
+            cursor = uow.cursor(sql, fast_executemany=fast, input_sizes=sizes)
+        else:
+            conn = get_connection(section_name)
+            cursor = conn.cursor()
+            cursor.fast_executemany = fast
+            if sizes:
+                cursor.setinputsizes(sizes)
+
+        for batch in _batches(rows, batch_size):
+            if first is None:
+                first = batch[0]
+            if method == "tvp":
+                cursor.execute(sql, [tvp_head + batch])
+            else:
+                cursor.executemany(sql, batch)
+            if uow is None:
+                conn.commit()
+            total_rows += len(batch)
+
+        if uow is None:
+            cursor.close()
+        return total_rows
+
+    except p.Error as ex:
+        _tag(ex, sql)
+        if conn and uow is None:
             conn.rollback()
+        if uow is not None:
+            uow.statement_cache.discard(sql, fast, sizes)
         raise
 
     finally:
-        if conn:
+        if conn and uow is None:
             conn.close()
+        elapsed = time.perf_counter() - started
+        record_db(elapsed)
+        PROFILER.record(sql, first or (), section_name, elapsed)
 
 def rows_to_dicts(rows):
     """
@@ -0,0 +1,131 @@
+import re
+import logging
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# -----------------------------------------------------------------------------
+# SQL statement profiler
+# -----------------------------------------------------------------------------
+#
+# execute_query / execute_many hand every statement to PROFILER.record().
+# When enabled it keeps per-(fingerprint, section) call counts and latency,
+# and writes anything slower than the threshold to the slow-query log with
+# parameter values redacted.  Disabled (the default) it costs one attribute
+# check per statement.
+#
+# Config keys (read by init_profiler):
+#   SQL_PROFILER_ENABLED  turn the profiler on                 (default False)
+#   SLOW_QUERY_MS         slow-query log threshold, in ms       (default 500)
+
+slow_log = logging.getLogger('TSMGMT.db.slow_queries')
+
+SAMPLES_PER_STATEMENT = 512   # window used for the p95
+
+_COMMENTS  = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS   = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBERS   = re.compile(r"(?<![\w@#.])-?\d+(?:\.\d+)?\b")
+_IN_LISTS  = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a statement so calls that differ only in literal values or
+    IN-list length group together, e.g.
+
+        SELECT x FROM T WHERE Directory = 'abc' AND id IN (?, ?, ?)
+        -> select x from t where directory = ? and id in (?+)
+    """
+    text = _COMMENTS.sub(' ', sql)
+    text = _STRINGS.sub('?', text)
+    text = _NUMBERS.sub('?', text)
+    text = _IN_LISTS.sub('(?+)', text)
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+def redact_params(params) -> str:
+    """Describe bound parameters by count and type only, never by value."""
+    if params is None:
+        return 'none'
+    if not isinstance(params, (list, tuple)):
+        params = (params,)
+    if not params:
+        return 'none'
+    types = ', '.join(type(p).__name__ for p in params[:20])
+    more = ', ...' if len(params) > 20 else ''
+    return f"{len(params)} redacted ({types}{more})"
+
+class StatementStats:
+    """Running totals for one fingerprint against one database section."""
+
+    __slots__ = ('fingerprint', 'section', 'calls', 'total_time', 'max_time', 'rows', 'samples')
+
+    def __init__(self, fingerprint: str, section: str):
+        self.fingerprint = fingerprint
+        self.section = section
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=SAMPLES_PER_STATEMENT)
+
+    def add(self, elapsed: float, rows: int) -> None:
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.rows += rows
+        self.samples.append(elapsed)
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+    @property
+    def p95_time(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+class QueryProfiler:
+    def __init__(self, enabled: bool = False, slow_ms: float = 500):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self._stats: Dict[Tuple[str, str], StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, params, section: str, elapsed: float, rows: int = 0) -> None:
+        if not self.enabled:
+            return
+
+        fp = fingerprint(sql)
+        key = (fp, section)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats(fp, section)
+            stats.add(elapsed, rows)
+
+        if elapsed * 1000 >= self.slow_ms:
+            slow_log.warning(
+                "slow query %.0f ms [%s] rows=%d params=%s sql=%s",
+                elapsed * 1000, section, rows, redact_params(params), fp
+            )
+
+    def top(self, n: int = 50, order_by: str = 'total_time') -> List[StatementStats]:
+        """The `n` heaviest statements by `order_by` (any StatementStats attribute)."""
+        with self._lock:
+            stats = list(self._stats.values())
+        return sorted(stats, key=lambda s: getattr(s, order_by), reverse=True)[:n]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+PROFILER = QueryProfiler()
+
+def init_profiler(app) -> None:
+    """Apply the SQL_PROFILER_ENABLED / SLOW_QUERY_MS settings from app config."""
+    PROFILER.enabled = bool(app.config.get('SQL_PROFILER_ENABLED', False))
+    PROFILER.slow_ms = float(app.config.get('SLOW_QUERY_MS', 500))
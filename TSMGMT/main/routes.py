@@ -1,6 +1,7 @@
 # TSMGMT/main/routes.py
 from flask import Blueprint, render_template, session, redirect, url_for
 from datetime import datetime
+from ..auth.decorators import is_admin
 
 main_bp = Blueprint('main', __name__)
 
@@ -33,6 +34,12 @@ def home():
         #},
         #add more tools here
     ]
+    if is_admin(user):
+        tools.append({
+            'name': 'SQL Profile',
+            'description': 'Top SQL statements by total time (admin)',
+            'endpoint': 'metrics.query_profile'
+        })
 
     return render_template(
         'main/home.html',
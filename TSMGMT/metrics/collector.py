@@ -0,0 +1,119 @@
+# TSMGMT/metrics/collector.py
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Sequence, Tuple
+
+# -----------------------------------------------------------------------------
+# Work counters for the current request / sync phase
+# -----------------------------------------------------------------------------
+#
+# db.connection and the Basecamp client report into whatever collectors are
+# active in the current context.  Collectors nest (a request may open a
+# narrower one around a single phase), and every active collector sees each
+# record.  Nothing is recorded when no collector is active.
+
+@dataclass
+class Timings:
+    """Accumulated DB / Basecamp API work for one scope (all times in seconds)."""
+    db_calls: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    rows_inserted: int = 0
+    rows_updated: int = 0
+    rows_deleted: int = 0
+    rows_unchanged: int = 0
+    api_calls: int = 0
+    api_time: float = 0.0
+    api_bytes: int = 0
+    pages: int = 0
+    rate_limit_wait: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add_db(self, elapsed: float, rows: int) -> None:
+        with self._lock:
+            self.db_calls += 1
+            self.db_time += elapsed
+            self.rows += rows
+
+    def add_rows_written(self, inserted: int, updated: int, deleted: int = 0, unchanged: int = 0) -> None:
+        with self._lock:
+            self.rows_inserted += inserted
+            self.rows_updated += updated
+            self.rows_deleted += deleted
+            self.rows_unchanged += unchanged
+
+    def add_api(self, elapsed: float, nbytes: int = 0) -> None:
+        with self._lock:
+            self.api_calls += 1
+            self.api_time += elapsed
+            self.api_bytes += nbytes
+
+    def add_pages(self, pages: int) -> None:
+        with self._lock:
+            self.pages += pages
+
+    def add_rate_limit_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.rate_limit_wait += seconds
+
+_active: ContextVar[Tuple[Timings, ...]] = ContextVar('tsmgmt_metrics_collectors', default=())
+
+def begin() -> Tuple[Timings, object]:
+    """Start a collector; pass the returned token to end()."""
+    timings = Timings()
+    token = _active.set(_active.get() + (timings,))
+    return timings, token
+
+def end(token) -> None:
+    _active.reset(token)
+
+@contextmanager
+def collect() -> Iterator[Timings]:
+    """Collect everything recorded inside the `with` block."""
+    timings, token = begin()
+    try:
+        yield timings
+    finally:
+        end(token)
+
+def active() -> Tuple[Timings, ...]:
+    """The collectors recording right now, to hand to work done on another thread later."""
+    return _active.get()
+
+@contextmanager
+def recording_to(collectors: Sequence[Timings]) -> Iterator[None]:
+    """Record into exactly `collectors` (from active()) inside the `with` block."""
+    token = _active.set(tuple(collectors))
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+def record_db(elapsed: float, rows: int = 0) -> None:
+    """One execute_query/execute_many call that took `elapsed` seconds."""
+    for t in _active.get():
+        t.add_db(elapsed, rows)
+
+def record_rows_written(inserted: int = 0, updated: int = 0, deleted: int = 0, unchanged: int = 0) -> None:
+    """Rows a write inserted / updated / deleted or left as they were (as far as the caller's diff can tell)."""
+    for t in _active.get():
+        t.add_rows_written(inserted, updated, deleted, unchanged)
+
+def record_api(elapsed: float, nbytes: int = 0) -> None:
+    """One outbound Basecamp HTTP request, `nbytes` of response body."""
+    for t in _active.get():
+        t.add_api(elapsed, nbytes)
+
+def record_pages(pages: int) -> None:
+    """Pages read for one Basecamp collection."""
+    for t in _active.get():
+        t.add_pages(pages)
+
+def record_rate_limit_wait(seconds: float) -> None:
+    """Time spent sleeping for the client-side rate limiter or a 429 Retry-After."""
+    if seconds <= 0:
+        return
+    for t in _active.get():
+        t.add_rate_limit_wait(seconds)
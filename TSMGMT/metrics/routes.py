@@ -0,0 +1,114 @@
+# TSMGMT/metrics/routes.py
+import hmac
+import time
+from flask import Blueprint, Response, abort, current_app, g, request, render_template, redirect, session, url_for
+from . import collector
+from .registry import REGISTRY, SECONDS_BUCKETS, COUNT_BUCKETS, ROWS_BUCKETS
+from ..auth.decorators import admin_required, is_admin
+from ..db.profiler import PROFILER
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# -- PER-ENDPOINT HISTOGRAMS --------------------------------------------------
+REQUESTS = REGISTRY.counter(
+    'tsmgmt_requests_total', 'Requests served.', ('endpoint', 'method', 'status'))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'tsmgmt_request_seconds', 'Wall time per request.', ('endpoint',), SECONDS_BUCKETS)
+DB_SECONDS = REGISTRY.histogram(
+    'tsmgmt_request_db_seconds', 'Time in execute_query/execute_many per request.', ('endpoint',), SECONDS_BUCKETS)
+DB_CALLS = REGISTRY.histogram(
+    'tsmgmt_request_db_calls', 'execute_query/execute_many calls per request.', ('endpoint',), COUNT_BUCKETS)
+DB_ROWS = REGISTRY.histogram(
+    'tsmgmt_request_db_rows', 'Rows fetched per request.', ('endpoint',), ROWS_BUCKETS)
+API_CALLS = REGISTRY.histogram(
+    'tsmgmt_request_api_calls', 'Outbound Basecamp calls per request.', ('endpoint',), COUNT_BUCKETS)
+API_SECONDS = REGISTRY.histogram(
+    'tsmgmt_request_api_seconds', 'Time in Basecamp HTTP calls per request.', ('endpoint',), SECONDS_BUCKETS)
+RATE_LIMIT_SECONDS = REGISTRY.histogram(
+    'tsmgmt_request_rate_limit_wait_seconds', 'Time spent waiting on the Basecamp rate limiter per request.',
+    ('endpoint',), SECONDS_BUCKETS)
+
+def init_metrics(app):
+    """Attach the per-request collector and the Server-Timing header to `app`."""
+
+    @app.before_request
+    def _start_request_metrics():
+        g._metrics_started = time.perf_counter()
+        g._metrics, g._metrics_token = collector.begin()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.pop('_metrics_started', None)
+        timings = g.get('_metrics')
+        if started is None or timings is None:
+            return response
+
+        wall = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+
+        REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        REQUEST_SECONDS.observe(wall, endpoint=endpoint)
+        DB_SECONDS.observe(timings.db_time, endpoint=endpoint)
+        DB_CALLS.observe(timings.db_calls, endpoint=endpoint)
+        DB_ROWS.observe(timings.rows, endpoint=endpoint)
+        API_CALLS.observe(timings.api_calls, endpoint=endpoint)
+        API_SECONDS.observe(timings.api_time, endpoint=endpoint)
+        RATE_LIMIT_SECONDS.observe(timings.rate_limit_wait, endpoint=endpoint)
+
+        # visible under Network > Timing in browser devtools
+        # (streamed responses only cover the work done before the first byte)
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={timings.db_time * 1000:.1f};desc="{timings.db_calls} queries, {timings.rows} rows"',
+            f'api;dur={timings.api_time * 1000:.1f};desc="{timings.api_calls} Basecamp calls"',
+            f'ratelimit;dur={timings.rate_limit_wait * 1000:.1f}',
+            f'total;dur={wall * 1000:.1f}',
+        ])
+        return response
+
+    @app.teardown_request
+    def _end_request_metrics(exc):
+        token = g.pop('_metrics_token', None)
+        g.pop('_metrics', None)
+        if token is not None:
+            try:
+                collector.end(token)
+            except ValueError:
+                pass  # torn down from a different context (e.g. after streaming)
+
+def _scrape_allowed() -> bool:
+    """The scraper's `Authorization: Bearer <METRICS_TOKEN>`, or a signed-in admin."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '').encode('utf-8')
+        if hmac.compare_digest(supplied, f'Bearer {token}'.encode('utf-8')):
+            return True
+    return is_admin(session.get('user'))
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint; 401 without the scrape token or an admin session."""
+    if not _scrape_allowed():
+        abort(401)
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@metrics_bp.route('/metrics/queries')
+@admin_required
+def query_profile():
+    """Admin page: top SQL fingerprints by total time (or ?order=calls|p95_time|max_time|rows)."""
+    order = request.args.get('order', 'total_time')
+    if order not in ('total_time', 'calls', 'p95_time', 'max_time', 'rows'):
+        order = 'total_time'
+
+    return render_template(
+        'metrics/queries.html',
+        stats=PROFILER.top(100, order_by=order),
+        order=order,
+        enabled=PROFILER.enabled,
+        slow_ms=PROFILER.slow_ms
+    )
+
+@metrics_bp.route('/metrics/queries/reset', methods=['POST'])
+@admin_required
+def reset_query_profile():
+    PROFILER.reset()
+    return redirect(url_for('metrics.query_profile'))
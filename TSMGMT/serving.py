@@ -0,0 +1,115 @@
+# TSMGMT/serving.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tornado.httpserver import HTTPServer
+from tornado.iostream import StreamClosedError
+from tornado.web import Application, FallbackHandler, RequestHandler
+from tornado.wsgi import WSGIContainer
+from werkzeug.exceptions import HTTPException
+
+from .work_status.events import HEARTBEAT_SECONDS, PADDING, RESUME_EXPIRED, TERMINAL, frame
+from .work_status.routes import open_sync_run
+
+# -----------------------------------------------------------------------------
+# Async serving mode (python runserver.py --async)
+# -----------------------------------------------------------------------------
+#
+# Under a WSGI server every open /work_status/sync_stream holds a worker
+# thread until the sync ends, so a few people watching a long sync can
+# starve the pool that serves page loads.  Here Tornado owns the socket:
+# the Flask app runs unchanged in a WSGIContainer on a pool of
+# WSGI_THREADS, while sync_stream subscribers are coroutines on the event
+# loop, woken by SyncRun listeners.  An idle subscriber costs a socket and
+# a few small objects, not a thread.
+
+WSGI_THREADS     = 16
+SYNC_STREAM_PATH = '/work_status/sync_stream'
+
+class SyncStreamHandler(RequestHandler):
+    """sync_stream on the event loop; same protocol and run registry as the Flask route."""
+
+    def initialize(self, flask_app, executor):
+        self.flask_app = flask_app
+        self.executor = executor
+        self.closed = False
+        self.wake = asyncio.Event()
+
+    def _open(self):
+        # session, run lookup and the BasecampSyncLog insert are Flask code
+        # (and may touch the DB), so they run on the WSGI pool.  Its 401 / 409
+        # aborts come back as the HTTPException.
+        with self.flask_app.test_request_context(self.request.uri, headers=dict(self.request.headers)):
+            return open_sync_run()
+
+    def on_connection_close(self):
+        self.closed = True
+        self.wake.set()
+
+    async def get(self):
+        loop = asyncio.get_running_loop()
+        try:
+            opened = await loop.run_in_executor(self.executor, self._open)
+        except HTTPException as exc:
+            self.set_status(exc.code)
+            self.finish(exc.description)
+            return
+
+        self.set_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.set_header('Cache-Control', 'no-cache')
+        self.set_header('X-Accel-Buffering', 'no')
+        if opened is None:
+            self.write(PADDING + RESUME_EXPIRED)
+            return
+        run, after = opened
+
+        def notify():
+            # called on the sync's thread
+            loop.call_soon_threadsafe(self.wake.set)
+
+        run.add_listener(notify)
+        try:
+            self.write(run.opening())
+            await self.flush()
+            while not self.closed:
+                self.wake.clear()
+                for event in run.since(after):
+                    self.write(event.encode(run.id))
+                    after = event.seq
+                    if event.type in TERMINAL:
+                        await self.flush()
+                        return
+                await self.flush()
+                if run.done(after):
+                    return
+                try:
+                    await asyncio.wait_for(self.wake.wait(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    self.write(frame('heartbeat', {'ts': int(time.time())}))
+        except StreamClosedError:
+            pass
+        finally:
+            run.remove_listener(notify)
+
+def make_application(flask_app, threads: int = WSGI_THREADS) -> Application:
+    """Tornado application: sync_stream on the loop, everything else through Flask."""
+    executor = ThreadPoolExecutor(threads, thread_name_prefix='wsgi')
+    wsgi = WSGIContainer(flask_app, executor=executor)
+    return Application([
+        (SYNC_STREAM_PATH, SyncStreamHandler, {'flask_app': flask_app, 'executor': executor}),
+        (r'.*', FallbackHandler, {'fallback': wsgi}),
+    ])
+
+def serve(flask_app, host: str = '127.0.0.1', port: int = 5000, threads: int = WSGI_THREADS) -> None:
+    """Run the async server until interrupted."""
+    async def main():
+        server = HTTPServer(make_application(flask_app, threads), xheaders=True)
+        server.listen(port, host)
+        flask_app.logger.info("Async server on http://%s:%s (%s WSGI threads)", host, port, threads)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,144 @@
+# TSMGMT/sitegroup/activity.py
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from ..db.connection import execute_query, unit_of_work
+
+# -----------------------------------------------------------------------------
+# Sitegroup user activity
+# -----------------------------------------------------------------------------
+#
+# Who can use a sitegroup comes from a heavy DISTINCT join across
+# users..UserPermissionSetMap, SiteGroupDetailSites and users..userinfo.
+# Instead of running it (plus a login scan) per page view,
+# refresh_user_activity() folds new logins into two small tables
+# (sql/003_sitegroup_user_activity.sql), and pages read them by key:
+#
+#   SiteGroupUserActivity       one row per directory: total users, active
+#                               today / in the last 7 days, last login
+#   SiteGroupUserActivityDaily  (directory, day) -> distinct users who logged in
+#
+# Each run only re-counts the days since the previous run; the first run
+# backfills ACTIVITY_BACKFILL_DAYS.  Schedule it with
+# `flask --app runserver sitegroup refresh-activity`.
+
+LOGIN_TABLE            = "users..UserLoginHistory"   # one row per login: UserID, LoginDate
+ACTIVITY_BACKFILL_DAYS = 90
+ACTIVITY_RECENT_DAYS   = 7
+
+@dataclass(frozen=True)
+class UserActivity:
+    """
+    Pre-aggregated login activity for one sitegroup.
+    Attributes:
+        total_users (int): Users with access to any of the sitegroup's sites.
+        active_today (int): Of those, users who logged in today.
+        active_7_days (int): Users who logged in during the last 7 days.
+        last_login (datetime): Most recent login by any of them, if any.
+        refreshed_at (datetime): When refresh_user_activity() last ran.
+        by_day (List[Tuple[date, int]]): Distinct users per day, newest first.
+    """
+    total_users: int
+    active_today: int
+    active_7_days: int
+    last_login: Optional[datetime]
+    refreshed_at: Optional[datetime]
+    by_day: List[Tuple[date, int]]
+
+def load_user_activity(directory: str, days: int = ACTIVITY_RECENT_DAYS) -> Optional[UserActivity]:
+    """The sitegroup's activity row plus its last `days` days, in one round trip; None before the first refresh."""
+    since = date.today() - timedelta(days=days - 1)
+    results = execute_query("""
+        SELECT TotalUsers, ActiveToday, Active7Days, LastLogin, RefreshedAt
+          FROM SiteGroupUserActivity
+         WHERE Directory = ?;
+        SELECT ActivityDate, ActiveUsers
+          FROM SiteGroupUserActivityDaily
+         WHERE Directory = ? AND ActivityDate >= ?
+         ORDER BY ActivityDate DESC;
+    """, params=(directory, directory, since))
+    summary, daily = results if len(results) == 2 else (results, [])
+    if not summary:
+        return None
+    row = summary[0]
+    return UserActivity(
+        total_users=row["TotalUsers"],
+        active_today=row["ActiveToday"],
+        active_7_days=row["Active7Days"],
+        last_login=row["LastLogin"],
+        refreshed_at=row["RefreshedAt"],
+        by_day=[(d["ActivityDate"], d["ActiveUsers"]) for d in daily],
+    )
+
+def refresh_user_activity(section_name: str = "SMS", today: Optional[date] = None) -> int:
+    """
+    Fold logins since the previous run into the activity tables, in one
+    transaction.  Returns the number of sitegroups written.
+    """
+    today = today or date.today()
+    with unit_of_work(section_name):
+        rows = execute_query("SELECT MAX(RefreshedAt) AS refreshed_at FROM SiteGroupUserActivity",
+                             database_config=section_name)
+        last = rows[0]["refreshed_at"] if rows else None
+        # re-count whole days, from the day of the last run
+        since = last.date() if last else today - timedelta(days=ACTIVITY_BACKFILL_DAYS)
+        # the 7-day figure needs a week of logins even when `since` is today
+        scan_from = min(since, today - timedelta(days=ACTIVITY_RECENT_DAYS - 1))
+
+        execute_query("""
+            SELECT DISTINCT si.Directory, upsm.UserID
+              INTO #sg_members
+              FROM users..UserPermissionSetMap upsm WITH (NOLOCK)
+             INNER JOIN sms..SiteGroupDetailSites si
+                ON si.SiteID = upsm.mapID
+             WHERE upsm.projectID = 1;
+            CREATE CLUSTERED INDEX ix_sg_members ON #sg_members (UserID, Directory);
+        """, database_config=section_name)
+
+        execute_query(f"""
+            DELETE FROM SiteGroupUserActivityDaily WHERE ActivityDate >= ?;
+            INSERT INTO SiteGroupUserActivityDaily (Directory, ActivityDate, ActiveUsers)
+            SELECT m.Directory, CAST(l.LoginDate AS DATE), COUNT(DISTINCT l.UserID)
+              FROM {LOGIN_TABLE} l WITH (NOLOCK)
+             INNER JOIN #sg_members m ON m.UserID = l.UserID
+             WHERE l.LoginDate >= ?
+             GROUP BY m.Directory, CAST(l.LoginDate AS DATE);
+        """, params=(since, since), database_config=section_name)
+
+        merged = execute_query(f"""
+            MERGE SiteGroupUserActivity AS target
+            USING (
+                SELECT m.Directory,
+                       COUNT(*) AS TotalUsers,
+                       SUM(CASE WHEN r.LastLogin >= ? THEN 1 ELSE 0 END) AS ActiveToday,
+                       SUM(CASE WHEN r.LastLogin >= ? THEN 1 ELSE 0 END) AS Active7Days,
+                       MAX(r.LastLogin) AS LastLogin
+                  FROM #sg_members m
+                  LEFT JOIN (SELECT UserID, MAX(LoginDate) AS LastLogin
+                               FROM {LOGIN_TABLE} WITH (NOLOCK)
+                              WHERE LoginDate >= ?
+                              GROUP BY UserID) r
+                    ON r.UserID = m.UserID
+                 GROUP BY m.Directory
+            ) AS src
+              ON target.Directory = src.Directory
+            WHEN MATCHED THEN
+              UPDATE SET
+                TotalUsers  = src.TotalUsers,
+                ActiveToday = src.ActiveToday,
+                Active7Days = src.Active7Days,
+                LastLogin   = CASE WHEN target.LastLogin IS NULL OR src.LastLogin > target.LastLogin
+                                   THEN src.LastLogin ELSE target.LastLogin END,
+                RefreshedAt = SYSDATETIME()
+            WHEN NOT MATCHED BY TARGET THEN
+              INSERT (Directory, TotalUsers, ActiveToday, Active7Days, LastLogin, RefreshedAt)
+              VALUES (src.Directory, src.TotalUsers, src.ActiveToday, src.Active7Days, src.LastLogin, SYSDATETIME())
+            WHEN NOT MATCHED BY SOURCE THEN
+              DELETE;
+            SELECT @@ROWCOUNT AS merged;
+            DROP TABLE #sg_members;
+        """, params=(today, today - timedelta(days=ACTIVITY_RECENT_DAYS - 1), scan_from),
+             database_config=section_name)
+
+    return merged[0]["merged"] if merged else 0
@@ -0,0 +1,303 @@
+# TSMGMT/sitegroup/fileview.py
+import os
+import re
+import gzip
+import time
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from xml.dom import minidom, Node
+from flask import Response, request, send_file
+from ..utils import TTLCache
+
+# -----------------------------------------------------------------------------
+# XML normalization
+# -----------------------------------------------------------------------------
+
+def pretty_xml(xml_string: str) -> str:
+    try:
+        doc = minidom.parseString(xml_string)
+
+        # Recursively remove any TEXT_NODE that is pure whitespace
+        def remove_blank_text_nodes(node):
+            for child in list(node.childNodes):
+                if child.nodeType == Node.TEXT_NODE and not child.data.strip():
+                    node.removeChild(child)
+                else:
+                    remove_blank_text_nodes(child)
+
+        remove_blank_text_nodes(doc)
+        return doc.toprettyxml(indent="  ")
+    except Exception:
+        return xml_string
+
+def normalize_xml_for_display(raw: str) -> str:
+    # 1) Pretty-print
+    pretty = pretty_xml(raw)
+    lines = pretty.splitlines()
+
+    # 2) Drop the XML declaration if present
+    if lines and lines[0].strip().startswith('<?xml'):
+        lines = lines[1:]
+
+    # 3) Collapse multiple empty lines into one
+    out, blank = [], False
+    for ln in lines:
+        if not ln.strip():
+            if not blank:
+                out.append('')
+            blank = True
+        else:
+            out.append(ln)
+            blank = False
+
+    return "\n".join(out)
+
+# -----------------------------------------------------------------------------
+# Line index
+# -----------------------------------------------------------------------------
+
+class LineIndex:
+    """
+    The normalized text of one file plus the offset of every line start,
+    so any line range or search hit can be resolved without re-reading
+    or re-formatting the file.
+
+    Line numbers are 1-based throughout.
+    """
+
+    def __init__(self, text: str):
+        self._text = text
+
+        offsets = array('L', [0])
+        pos = text.find('\n')
+        while pos != -1:
+            offsets.append(pos + 1)
+            pos = text.find('\n', pos + 1)
+        self._offsets = offsets
+
+    @property
+    def line_count(self) -> int:
+        """int: Number of lines in the normalized text."""
+        return len(self._offsets)
+
+    def lines(self, start: int, count: int) -> List[str]:
+        """Return up to `count` lines beginning at line `start`."""
+        if count <= 0 or start > self.line_count:
+            return []
+        start = max(start, 1)
+        end = min(start + count - 1, self.line_count)
+
+        begin = self._offsets[start - 1]
+        stop = self._offsets[end] - 1 if end < self.line_count else len(self._text)
+        return self._text[begin:stop].split('\n')
+
+    def line_of(self, offset: int) -> int:
+        """Return the line number containing character `offset`."""
+        return bisect_right(self._offsets, offset)
+
+    def find(self, needle: str, start_line: int = 1, limit: int = 100,
+             case_sensitive: bool = False) -> List[Tuple[int, int]]:
+        """
+        Return up to `limit` (line, column) hits for `needle`, scanning forward
+        from `start_line`.  Columns are 0-based.
+        """
+        if not needle or start_line > self.line_count:
+            return []
+
+        flags = 0 if case_sensitive else re.IGNORECASE
+        pattern = re.compile(re.escape(needle), flags)
+        begin = self._offsets[max(start_line, 1) - 1]
+
+        hits = []
+        for m in pattern.finditer(self._text, begin):
+            line = self.line_of(m.start())
+            hits.append((line, m.start() - self._offsets[line - 1]))
+            if len(hits) >= limit:
+                break
+        return hits
+
+# -----------------------------------------------------------------------------
+# Index cache (keyed by path, invalidated on mtime/size change)
+# -----------------------------------------------------------------------------
+
+MAX_CACHED_FILES = 16
+
+_cache: "OrderedDict[str, Tuple[Tuple[int, int], LineIndex]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def get_line_index(file_path: str) -> LineIndex:
+    """
+    Return the LineIndex for `file_path`, building it on first use or when
+    the file has changed since it was cached.
+    """
+    st = os.stat(file_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _cache_lock:
+        cached = _cache.get(file_path)
+        if cached and cached[0] == stamp:
+            _cache.move_to_end(file_path)
+            return cached[1]
+
+    # Read as UTF-8 (replace bad chars), then normalize -- outside the lock,
+    # this is the slow part
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as fh:
+        index = LineIndex(normalize_xml_for_display(fh.read()))
+
+    with _cache_lock:
+        _cache[file_path] = (stamp, index)
+        _cache.move_to_end(file_path)
+        while len(_cache) > MAX_CACHED_FILES:
+            _cache.popitem(last=False)
+
+    return index
+
+# -----------------------------------------------------------------------------
+# Directory listings (re-read only when the folder's mtime changes)
+# -----------------------------------------------------------------------------
+
+_listing_cache: dict = {}
+_listing_lock = threading.Lock()
+
+def list_xml_files(conf_path: str) -> List[str]:
+    """
+    Return the .xml file names in `conf_path`.  The listing is cached and
+    revalidated with a single stat of the folder, so repeat lookups do not
+    hit the file share with a full os.listdir.
+    """
+    mtime = os.stat(conf_path).st_mtime_ns
+
+    with _listing_lock:
+        cached = _listing_cache.get(conf_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    files = [file for file in os.listdir(conf_path) if file.endswith(".xml")]
+
+    with _listing_lock:
+        _listing_cache[conf_path] = (mtime, files)
+    return files
+
+# -----------------------------------------------------------------------------
+# Conditional GET + gzip transfer
+# -----------------------------------------------------------------------------
+
+# changes on every deploy/restart, so rendered pages never revalidate
+# against markup from an older template
+_BOOT_ID = format(int(time.time()), 'x')
+
+GZIP_MIN_BYTES = 1024
+_gzip_cache = TTLCache(maxsize=32, ttl=3600)
+
+def file_etag(st: os.stat_result) -> str:
+    """Strong validator for a file on disk, derived from its size and mtime."""
+    return f"{st.st_size:x}-{st.st_mtime_ns:x}"
+
+def _last_modified(st: os.stat_result) -> datetime:
+    return datetime.fromtimestamp(int(st.st_mtime), tz=timezone.utc)
+
+def _accepts_gzip() -> bool:
+    return request.accept_encodings['gzip'] > 0
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None,
+                 weak: bool = False) -> Optional[Response]:
+    """
+    Return a 304 response if the request's validators still match `etag`
+    (or, when no If-None-Match was sent, `last_modified`); otherwise None.
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified:
+        fresh = last_modified <= request.if_modified_since
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+
+    resp = Response(status=304)
+    set_validators(resp, etag, last_modified, weak=weak)
+    return resp
+
+def set_validators(resp: Response, etag: str, last_modified: Optional[datetime] = None,
+                   weak: bool = False) -> None:
+    resp.set_etag(etag, weak=weak)
+    if last_modified:
+        resp.last_modified = last_modified
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True   # always revalidate, but cheaply
+    resp.vary.add('Accept-Encoding')
+
+def gzip_response(resp: Response) -> Response:
+    """gzip a buffered response in place if the client accepts it and it is worth it."""
+    if (resp.direct_passthrough or resp.status_code != 200
+            or 'Content-Encoding' in resp.headers or not _accepts_gzip()):
+        return resp
+
+    body = resp.get_data()
+    if len(body) < GZIP_MIN_BYTES:
+        return resp
+
+    resp.set_data(gzip.compress(body, compresslevel=6))
+    resp.headers['Content-Encoding'] = 'gzip'
+    resp.vary.add('Accept-Encoding')
+    etag, is_weak = resp.get_etag()
+    if etag and not is_weak:
+        # a different byte representation needs a different strong validator
+        resp.set_etag(etag + '-gz')
+    return resp
+
+def view_etag(file_path: str, *parts) -> Tuple[str, datetime]:
+    """
+    Validator for something rendered from `file_path` (a page or a JSON range),
+    qualified by the request parts that change the output.  Use it as a weak
+    ETag: the rendered bytes are equivalent, not guaranteed identical.
+    """
+    st = os.stat(file_path)
+    tag = '-'.join([file_etag(st), _BOOT_ID] + [str(p) for p in parts])
+    return tag, _last_modified(st)
+
+def xml_file_response(file_path: str, *, as_attachment: bool = False,
+                      download_name: Optional[str] = None) -> Response:
+    """
+    Serve a raw XML file with a strong ETag and Last-Modified, answering
+    revalidations with 304 before the file is opened and sending a cached
+    gzip body to clients that accept it.
+    """
+    st = os.stat(file_path)
+    etag = file_etag(st)
+    last_modified = _last_modified(st)
+    use_gzip = _accepts_gzip() and st.st_size >= GZIP_MIN_BYTES
+    tag = etag + '-gz' if use_gzip else etag
+
+    resp = not_modified(tag, last_modified)
+    if resp is not None:
+        return resp
+
+    if use_gzip:
+        def compress():
+            with open(file_path, 'rb') as fh:
+                return gzip.compress(fh.read(), compresslevel=6)
+
+        body = _gzip_cache.get_or_load((file_path, etag), compress)
+        resp = Response(body, mimetype='application/xml')
+        resp.headers['Content-Encoding'] = 'gzip'
+        if as_attachment:
+            resp.headers.set('Content-Disposition', 'attachment',
+                             filename=download_name or os.path.basename(file_path))
+    else:
+        resp = send_file(
+            file_path,
+            mimetype='application/xml',
+            as_attachment=as_attachment,
+            download_name=download_name,
+            etag=False,
+            conditional=False
+        )
+
+    set_validators(resp, tag, last_modified)
+    return resp
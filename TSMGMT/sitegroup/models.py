@@ -1,45 +1,39 @@
 import os
+import time
 from datetime import datetime
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional
-from ..db.connection import execute_query
+from dataclasses import dataclass
+from functools import partial
+from typing import List, Dict, Optional, Tuple
+from ..db.connection import execute_query, gather, submit, submit_after
+from ..utils import TTLCache
+from .activity import UserActivity, load_user_activity
+from .fileview import list_xml_files
 from lxml import etree
 import logging
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
 
 # -----------------------------------------------------------------------------
-# Module-level logger configuration
+# Module-level logger
 # -----------------------------------------------------------------------------
 
-# Create a logger for this module
+# Handlers, levels and the background writer are set up once by
+# configure_logging() in create_app; messages below use lazy %-style
+# arguments so filtered-out DEBUG lines cost almost nothing.
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)  # capture everything > DEBUG
-
-# Formatter for both console and file
-formatter = logging.Formatter(
-    fmt="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
-
-# Console handler (stdout)
-ch = logging.StreamHandler()
-ch.setLevel(logging.DEBUG)
-ch.setFormatter(formatter)
-logger.addHandler(ch)
-
-# File handler (rotates when it gets too big)
-log_dir = os.path.expanduser(r"C:\inetpub\logs\sitegroup")
-os.makedirs(log_dir, exist_ok=True)
-fh = RotatingFileHandler(
-    filename=os.path.join(log_dir, "sitegroup.log"),
-    maxBytes=5*1024*1024,   # 5 MB
-    backupCount=3,          # keep last 3 files
-    encoding="utf-8"
-)
-fh.setLevel(logging.INFO)  # only INFO goes to disk
-fh.setFormatter(formatter)
-logger.addHandler(fh)
+
+# (starting_path, directory) -> conf folder found by the os.walk in conf_path.
+# Misses are cached too, for a shorter time, so unknown directories don't
+# re-walk the share on every request.
+_conf_path_cache = TTLCache(maxsize=1024, ttl=600)
+CONF_PATH_MISS_TTL = 60
+
+# Contract-site listings are read a page at a time (keyset on agency,
+# program, contract id) and cached briefly; the per-cycle counts for a
+# whole sitegroup come from one grouped query.
+CONTRACT_SITES_PAGE_SIZE = 100
+CONTRACT_SITES_TTL       = 60
+CONTRACT_COUNTS_TTL      = 300
+_contract_site_pages  = TTLCache(maxsize=512, ttl=CONTRACT_SITES_TTL)
+_contract_site_counts = TTLCache(maxsize=256, ttl=CONTRACT_COUNTS_TTL)
 
 class Sitegroup:
     """
@@ -60,6 +54,22 @@ class Sitegroup:
         'nextuprfp', 'learn24', 'myspark', 'aeis', 'tips', 'dfss'
     ]
 
+    # lazy attributes prefetch() can load, and the one each needs loaded first
+    PREFETCH_ATTRIBUTES = (
+        'sitegroupid', 'systemname', 'conf_path', 'person_types', 'service_formats',
+        'shared_entities', 'global_settings', 'automated_jobs', 'site_list',
+        'user_list', 'xml_files', 'domain_list', 'contractcycle_list',
+        'contract_site_counts', 'user_activity',
+    )
+    PREFETCH_DEPENDS = {
+        'shared_entities': 'conf_path',
+        'global_settings': 'conf_path',
+        'xml_files': 'conf_path',
+        'domain_list': 'sitegroupid',
+        'contractcycle_list': 'sitegroupid',
+        'contract_site_counts': 'sitegroupid',
+    }
+
     def __init__(
         self,
         directory: str,
@@ -95,8 +105,37 @@ class Sitegroup:
         self._user_list       = user_list
         self._contractcycle_list = contractcycle_list
         self._automated_jobs  = automated_jobs
+        self._contract_site_counts: Optional[Dict[int, int]] = None
+        self._user_activity: Optional[UserActivity] = None
+
+        logger.debug("Initialized Sitegroup with directory='%s', starting_path='%s'", self._directory, self._starting_path)
 
-        logger.debug(f"Initialized Sitegroup with directory='{self._directory}', starting_path='{self._starting_path}'")
+    def prefetch(self, *names: str, timeout: Optional[float] = None) -> 'Sitegroup':
+        """
+        Load the named lazy attributes (all of PREFETCH_ATTRIBUTES by default)
+        at once on the shared query pool and wait for them, so the caller pays
+        for the slowest query or file-share walk rather than the sum.  Anything
+        already loaded is skipped; the first error (e.g. ValueError for an
+        unknown directory) is re-raised.  Returns self.
+        """
+        futures = {}
+
+        def start(name):
+            if name in futures or getattr(self, '_' + name) is not None:
+                return futures.get(name)
+            depends = self.PREFETCH_DEPENDS.get(name)
+            first = start(depends) if depends else None
+            load = partial(getattr, self, name)
+            futures[name] = submit_after(first, load) if first else submit(load)
+            return futures[name]
+
+        started = time.perf_counter()
+        for name in names or self.PREFETCH_ATTRIBUTES:
+            start(name)
+        gather(futures, timeout=timeout)
+        logger.debug("Prefetched %s for '%s' in %.0f ms", list(futures), self._directory,
+                     (time.perf_counter() - started) * 1000)
+        return self
 
     @property
     def directory(self) -> str:
@@ -109,7 +148,7 @@ class Sitegroup:
 
         if self._systemname is None:
             sql = f"SELECT IsNull(SystemName, 'N/A') as systemname FROM SiteGroupDetail WHERE Directory = '{self._directory}'"
-            logger.debug(f"Querying systemname with SQL: {sql}")
+            logger.debug("Querying systemname with SQL: %s", sql)
             results = execute_query(sql)
             if not results:
                 error_msg = f"Directory '{self._directory}' does not exist (Sitegroup.py)."
@@ -117,7 +156,7 @@ class Sitegroup:
                 raise ValueError(error_msg)
             # Convert results into a single string
             self._systemname = str(results[0]["SystemName"])
-            logger.debug(f"Found systemname='{self._systemname}'")
+            logger.debug("Found systemname='%s'", self._systemname)
         return self._systemname
 
     def get_starting_path(self) -> str:
@@ -129,11 +168,11 @@ class Sitegroup:
         """
         # Decide which path to use
         if self._directory in self.SPECIAL_DIRECTORIES:
-            logger.debug(f"Directory '{self._directory}' is in SPECIAL_DIRECTORIES; using 'others' path.")
+            logger.debug("Directory '%s' is in SPECIAL_DIRECTORIES; using 'others' path.", self._directory)
             return self.CONF_PATHS['others']
 
         path = self.CONF_PATHS.get(self._directory, self.CONF_PATHS['default'])
-        logger.debug(f"Using path='{path}' for directory='{self._directory}'")
+        logger.debug("Using path='%s' for directory='%s'", path, self._directory)
         return path
 
     @property
@@ -141,7 +180,7 @@ class Sitegroup:
         """str: The SiteGroupID from the database.  Raises ValueError if not found."""
         if self._sitegroupid is None:
             sql = f"SELECT SiteGroupID FROM SiteGroupDetail WHERE Directory = '{self._directory}'"
-            logger.debug(f"Querying sitegroupid with SQL: {sql}")
+            logger.debug("Querying sitegroupid with SQL: %s", sql)
             results = execute_query(sql)
 
             if not results:
@@ -151,7 +190,7 @@ class Sitegroup:
 
             # Convert results into a single string
             self._sitegroupid = ''.join(str(x["sitegroupid"]) for x in results)
-            logger.debug(f"Found sitegroupid='{self._sitegroupid}'")
+            logger.debug("Found sitegroupid='%s'", self._sitegroupid)
 
         return self._sitegroupid
 
@@ -159,17 +198,26 @@ class Sitegroup:
     def conf_path(self) -> Optional[str]:
         """Optional[str]: The path to the sitegroup's configuration directory, or None if not found."""
         if self._conf_path is None:
+            key = (self._starting_path, self._directory)
+            cached = _conf_path_cache.get(key, False)
+            if cached is None or (cached and os.path.isdir(cached)):
+                self._conf_path = cached
+                return self._conf_path
+
             try:
-                logger.debug(f"Searching conf_path starting from '{self._starting_path}'")
+                logger.debug("Searching conf_path starting from '%s'", self._starting_path)
                 for subdir, _, _ in os.walk(self._starting_path):
                     if os.path.basename(subdir).lower() == self._directory:
                         self._conf_path = subdir
-                        logger.debug(f"Found conf_path='{self._conf_path}'")
+                        logger.debug("Found conf_path='%s'", self._conf_path)
                         break
                 if not self._conf_path:
-                    logger.warning(f"Could not find conf_path for directory='{self._directory}' within '{self._starting_path}'")
+                    logger.warning("Could not find conf_path for directory='%s' within '%s'", self._directory, self._starting_path)
+                    _conf_path_cache.set(key, None, ttl=CONF_PATH_MISS_TTL)
+                else:
+                    _conf_path_cache.set(key, self._conf_path)
             except Exception as e:
-                logger.exception(f"Error finding conf_path: {e}")  # Use exception to log the stack trace
+                logger.exception("Error finding conf_path: %s", e)  # Use exception to log the stack trace
 
         return self._conf_path
 
@@ -178,10 +226,10 @@ class Sitegroup:
         """List[str]: A list of PersonTypeName values from the database."""
         if self._person_types is None:
             sql = f"SELECT PersonTypeName FROM SiteGroupPersonTypeMap WHERE Directory = '{self._directory}'"
-            logger.debug(f"Fetching person_types with SQL: {sql}")
+            logger.debug("Fetching person_types with SQL: %s", sql)
             results = execute_query(sql)
             self._person_types = [x["PersonTypeName"] for x in results] if results else []  # Handle empty results
-            logger.debug(f"Loaded person_types={self._person_types}")
+            logger.debug("Loaded person_types=%s", self._person_types)
         return self._person_types
 
     @property
@@ -189,10 +237,10 @@ class Sitegroup:
         """List[str]: A list of ServiceFormatName values from the database."""
         if self._service_formats is None:
             sql = f"SELECT ServiceFormatName FROM SiteGroupServiceFormatMap WHERE Directory = '{self._directory}'"
-            logger.debug(f"Fetching service_formats with SQL: {sql}")
+            logger.debug("Fetching service_formats with SQL: %s", sql)
             results = execute_query(sql)
             self._service_formats = [x["ServiceFormatName"] for x in results] if results else []  # Handle empty results
-            logger.debug(f"Loaded service_formats={self._service_formats}")
+            logger.debug("Loaded service_formats=%s", self._service_formats)
         return self._service_formats
 
     @property
@@ -202,14 +250,14 @@ class Sitegroup:
             conf_path = self.conf_path
             if conf_path and os.path.isfile(os.path.join(conf_path, 'PropertySettings.xml')):
                 prop_settings_file = os.path.join(conf_path, 'PropertySettings.xml')
-                logger.debug(f"Parsing PropertySettings.xml at '{prop_settings_file}'")
+                logger.debug("Parsing PropertySettings.xml at '%s'", prop_settings_file)
                 try:
                     tree = etree.parse(prop_settings_file)
                     # Extract 'Type' attribute from <Entity> elements, default to empty string, and convert to lowercase
                     self._shared_entities = [x.get('Type', '').lower() for x in tree.xpath('.//Entity')]
-                    logger.debug(f"shared_entities={self._shared_entities}")
+                    logger.debug("shared_entities=%s", self._shared_entities)
                 except etree.XMLSyntaxError as e:
-                    logger.error(f"Error parsing PropertySettings.xml: {e}")
+                    logger.error("Error parsing PropertySettings.xml: %s", e)
                     self._shared_entities = []  # Initialize to empty list on error
             else:
                 self._shared_entities = []  # Initialize to empty list if file not found
@@ -223,7 +271,7 @@ class Sitegroup:
             self._global_settings = {}
             orig_conf_path = self.conf_path
             current_path = self.conf_path
-            logger.debug(f"Loading global_settings starting from '{current_path}'")
+            logger.debug("Loading global_settings starting from '%s'", current_path)
 
             try:
                 while current_path and 'conf' in current_path.lower():
@@ -231,8 +279,8 @@ class Sitegroup:
                     if os.path.isfile(global_settings_file):
                         # Is this the sitegroup's own GlobalSettings.xml?
                         is_sitegroup_file = (current_path == orig_conf_path)
-                        logger.debug(f"Parsing GlobalSettings.xml at '{global_settings_file}' "
-                                     f"{'(sitegroup)' if is_sitegroup_file else '(inherited)'}")
+                        logger.debug("Parsing GlobalSettings.xml at '%s' %s", global_settings_file,
+                                     '(sitegroup)' if is_sitegroup_file else '(inherited)')
                         try:
                             tree = etree.parse(global_settings_file)
                             for setting in tree.xpath('.//GlobalSetting[@Name]'):
@@ -252,13 +300,13 @@ class Sitegroup:
                                     value = f"{value} (Inherited)"
 
                                 self._global_settings[name] = value
-                                logger.debug(f"Set global_settings[{name}] = '{value}'")
+                                logger.debug("Set global_settings[%s] = '%s'", name, value)
                         except etree.XMLSyntaxError as e:
-                            logger.error(f"Error parsing GlobalSettings.xml: {e}")
+                            logger.error("Error parsing GlobalSettings.xml: %s", e)
                     # move up one directory
                     current_path = os.path.dirname(current_path)
             except Exception as e:
-                logger.exception(f"Error loading global settings: {e}")
+                logger.exception("Error loading global settings: %s", e)
 
         return self._global_settings
 
@@ -267,7 +315,7 @@ class Sitegroup:
         """List[str]: A list of automated jobs from the database."""
         if self._automated_jobs is None:
             sql = f"select job_type, name, sitegroupid, directory, last_run From sitegroup_automated_job_view WHERE Directory = '{self._directory}'"
-            logger.debug(f"Fetching automated_jobs with SQL: {sql}")
+            logger.debug("Fetching automated_jobs with SQL: %s", sql)
             results = execute_query(sql)
             self._automated_jobs = [AutomatedJob(x) for x in results] if results else []
         return self._automated_jobs
@@ -277,14 +325,12 @@ class Sitegroup:
         """List[Site]: A list of Site objects representing the site list."""
         if self._site_list is None:
             sql = f"EXEC sitegroup_sitelist '{self._directory}'"
-            logger.debug(f"Fetching site_list with SQL: {sql}")
+            logger.debug("Fetching site_list with SQL: %s", sql)
             results = execute_query(sql)
             self._site_list = [Site(x) for x in results] if results else []  # Handle empty results
-            logger.debug(f"Loaded site_list with {len(self._site_list)} sites")
+            logger.debug("Loaded site_list with %s sites", len(self._site_list))
         return self._site_list
 
-    #todo: add # of users logged in during the past 7 days, or today
-
     @property
     def user_list(self) -> List['User']:
         """List[User]: A list of User objects representing the user list."""
@@ -297,12 +343,20 @@ class Sitegroup:
                       INNER JOIN users..userinfo ui WITH (NOLOCK)
                           ON ui.userid = upsm.userid
                       WHERE upsm.projectID = 1'''
-            logger.debug(f"Fetching user_list with SQL: {sql}")
+            logger.debug("Fetching user_list with SQL: %s", sql)
             results = execute_query(sql)
             self._user_list = [User(x) for x in results] if results else []  # Handle empty results
-            logger.debug(f"Loaded user_list with {len(self._user_list)} users")
+            logger.debug("Loaded user_list with %s users", len(self._user_list))
         return self._user_list
 
+    @property
+    def user_activity(self) -> Optional[UserActivity]:
+        """Optional[UserActivity]: Login activity from the pre-aggregated tables (None until the refresh job has run)."""
+        if self._user_activity is None:
+            self._user_activity = load_user_activity(self._directory)
+            logger.debug("Loaded user_activity=%s", self._user_activity)
+        return self._user_activity
+
     @property
     def xml_files(self) -> List[str]:
         """List[str]: A list of XML file names in the conf_path."""
@@ -316,11 +370,11 @@ class Sitegroup:
                     self._xml_files = []  # Set to empty list if conf_path is invalid
                     return self._xml_files
 
-                # Gather .xml files in conf_path
-                self._xml_files = [file for file in os.listdir(conf_path) if file.endswith(".xml")]
-                logger.debug(f"Found {len(self._xml_files)} XML files in '{conf_path}'")
+                # Gather .xml files in conf_path (cached until the folder changes)
+                self._xml_files = list_xml_files(conf_path)
+                logger.debug("Found %s XML files in '%s'", len(self._xml_files), conf_path)
             except Exception as e:
-                logger.exception(f"An error occurred while listing XML files: {e}")  # Log the full exception
+                logger.exception("An error occurred while listing XML files: %s", e)  # Log the full exception
                 self._xml_files = []  # Set to empty list on error
 
         return self._xml_files
@@ -330,7 +384,7 @@ class Sitegroup:
         """List[Domain]: A list of Domain objects representing the domain list."""
         if self._domain_list is None:
             sql = f"select * from Domain d with (nolock) where SiteGroupId =  '{self.sitegroupid}'"
-            logger.debug(f"Fetching domain_list with SQL: {sql}")
+            logger.debug("Fetching domain_list with SQL: %s", sql)
             results = execute_query(sql)
             self._domain_list = [Domain(x) for x in results] if results else []
 
@@ -341,11 +395,27 @@ class Sitegroup:
         """List[ContractCycle]: A list of ContractCycle objects representing the contract cycle list."""
         if self._contractcycle_list is None:
             sql = f"select * from ContractCycleSiteGroupMap c where sitegroupid =  '{self.sitegroupid}' order by contractcycleid desc"
-            logger.debug(f"Fetching contractcycle_list with SQL: {sql}")
+            logger.debug("Fetching contractcycle_list with SQL: %s", sql)
             results = execute_query(sql)
             self._contractcycle_list = [ContractCycle(x) for x in results] if results else []
         return self._contractcycle_list
 
+    @property
+    def contract_site_counts(self) -> Dict[int, int]:
+        """Dict[int, int]: contractcycleid -> number of contract sites, for every cycle of the sitegroup."""
+        if self._contract_site_counts is None:
+            def load():
+                sql = """SELECT c.ContractCycleID AS contractcycleid, COUNT(*) AS sites
+                         FROM gms.dbo.ContractsView3 c
+                         WHERE c.ContractCycleID IN (SELECT m.contractcycleid FROM ContractCycleSiteGroupMap m
+                                                      WHERE m.sitegroupid = ?)
+                         GROUP BY c.ContractCycleID"""
+                logger.debug("Fetching contract_site_counts with SQL: %s", sql)
+                results = execute_query(sql, params=(self.sitegroupid,))
+                return {x["contractcycleid"]: x["sites"] for x in results} if results else {}
+            self._contract_site_counts = _contract_site_counts.get_or_load(self.sitegroupid, load)
+        return self._contract_site_counts
+
 @dataclass(frozen=True)
 class ContractCycle:
     """
@@ -360,7 +430,6 @@ class ContractCycle:
     description: str
     sitegroupid: str
     isarchived: int
-    _contract_sites: Optional[List['ContractSite']] = field(default=None, init=False, repr=False)
 
     def __init__(self, row):
         try:
@@ -377,21 +446,71 @@ class ContractCycle:
         object.__setattr__(self, 'sitegroupid', sitegroupid)
         object.__setattr__(self, 'isarchived', isarchived)
 
-        logger.debug(f"Initialized ContractCycle with contractcycleid='{contractcycleid}', description='{description}'")
-
-    @property
-    def contract_sites(self) -> List['Site']:
-        """List[Site]: A list of Site objects associated with this contract cycle."""
-        if self._contract_sites is None:
-            sql = f"select contractid, contractcycleid, agencyname, programname, agencyid, programid, ucontractid, siteid From gms.dbo.ContractsView3 where ContractCycleID = '{self.contractcycleid}' order by agencyname, programname"
-            logger.debug(f"Fetching contract_sites with SQL: {sql}")
-            results = execute_query(sql)
-            sites = [ContractSite(x) for x in results] if results else []
-            object.__setattr__(self, '_contract_sites', sites)
-            logger.debug(f"Loaded contract_sites with {len(self._contract_sites)} sites")
+        logger.debug("Initialized ContractCycle with contractcycleid='%s', description='%s'", contractcycleid, description)
 
+    def contract_sites_page(
+        self,
+        after: Optional[Tuple[str, str, int, int]] = None,
+        agency: Optional[str] = None,
+        program: Optional[str] = None,
+        limit: int = CONTRACT_SITES_PAGE_SIZE,
+    ) -> 'ContractSitePage':
+        """
+        One page of contract sites ordered by (agencyname, programname,
+        contractid, siteid), starting after the `after` key of the previous page.
+        `agency` / `program` filter on a substring of the name.  Pages are
+        cached for CONTRACT_SITES_TTL seconds.
+        """
+        key = (self.contractcycleid, after, agency or None, program or None, limit)
+        return _contract_site_pages.get_or_load(
+            key, lambda: self._load_contract_sites_page(after, agency, program, limit)
+        )
+
+    def _load_contract_sites_page(self, after, agency, program, limit) -> 'ContractSitePage':
+        where, params = ["ContractCycleID = ?"], [self.contractcycleid]
+        if agency:
+            where.append("agencyname LIKE ? ESCAPE '\\'")
+            params.append(f"%{_like_escape(agency)}%")
+        if program:
+            where.append("programname LIKE ? ESCAPE '\\'")
+            params.append(f"%{_like_escape(program)}%")
+        if after is not None:
+            # NULL names sort as '' so the seek and the ORDER BY agree
+            where.append("""(ISNULL(agencyname, '') > ?
+                             OR (ISNULL(agencyname, '') = ? AND (ISNULL(programname, '') > ?
+                                 OR (ISNULL(programname, '') = ? AND (contractid > ?
+                                     OR (contractid = ? AND siteid > ?))))))""")
+            agency_key, program_key, contractid, siteid = after
+            params += [agency_key, agency_key, program_key, program_key, contractid, contractid, siteid]
+
+        sql = f"""SELECT TOP ({int(limit) + 1}) contractid, contractcycleid, agencyname, programname,
+                         agencyid, programid, ucontractid, siteid
+                  FROM gms.dbo.ContractsView3
+                  WHERE {' AND '.join(where)}
+                  ORDER BY ISNULL(agencyname, ''), ISNULL(programname, ''), contractid, siteid"""
+        logger.debug("Fetching contract_sites_page with SQL: %s", sql)
+        results = execute_query(sql, params=params) or []
+        sites = [ContractSite(x) for x in results[:limit]]
+        next_after = None
+        if len(results) > limit:
+            last = sites[-1]
+            next_after = (last.agency_name or '', last.program_name or '', last.contractid, last.siteid)
+        return ContractSitePage(sites=sites, next_after=next_after)
+
+def _like_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('[', '\\[')
 
-        return self._contract_sites
+@dataclass(frozen=True)
+class ContractSitePage:
+    """
+    One keyset page of a contract cycle's sites.
+    Attributes:
+        sites (List[ContractSite]): The sites on this page, in order.
+        next_after (tuple): (agency, program, contractid, siteid) key to pass as
+            `after` for the next page, or None on the last page.
+    """
+    sites: List['ContractSite']
+    next_after: Optional[Tuple[str, str, int, int]]
 
 @dataclass(frozen=True)
 class ContractSite:
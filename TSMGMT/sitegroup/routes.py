@@ -1,53 +1,68 @@
+import base64
+import binascii
+import click
+import hashlib
+import json
 import os
-from flask import Blueprint, render_template, abort, send_from_directory, request, current_app
+from flask import Blueprint, render_template, abort, request, current_app, jsonify, make_response
 from flask_login import login_required
 from ..db.connection import execute_query
 from datetime import date, datetime, time
+from .activity import refresh_user_activity
 from .models import Sitegroup
+from ..utils import TTLCache
+from .fileview import get_line_index, view_etag, not_modified, set_validators, gzip_response, xml_file_response
 from flask_login import login_required
-from typing import List
-from xml.dom import minidom, Node
+from typing import List, Optional, Tuple
 
 sitegroup_bp = Blueprint('sitegroup', __name__, url_prefix='/sitegroup')
 
-def pretty_xml(xml_string: str) -> str:
+# lines rendered with the page / max lines served per /lines request
+VIEW_WINDOW_LINES = 200
+MAX_LINES_PER_REQUEST = 2000
+MAX_FIND_RESULTS = 500
+
+# detail page sections: slug -> (heading, Sitegroup attributes it renders).
+# The page itself is a shell; each section is a fragment from detail_section.
+DETAIL_SECTIONS = {
+    'person-types':    ('Person Types',    ('person_types',)),
+    'service-formats': ('Service Formats', ('service_formats',)),
+    'shared-entities': ('Shared Entities', ('shared_entities',)),
+    'global-settings': ('GlobalSettings',  ('global_settings',)),
+    'xml-files':       ('XML Files',       ('xml_files',)),
+    'automated-jobs':  ('Automated Jobs',  ('automated_jobs',)),
+    'user-activity':   ('User Activity',   ('user_activity',)),
+    'contract-cycles': ('Contract Cycles', ('contractcycle_list', 'contract_site_counts')),
+}
+SECTION_MAX_AGE = 60   # seconds a rendered fragment is reused, here and by the browser
+
+# (directory, section) -> rendered fragment
+_section_cache = TTLCache(maxsize=1024, ttl=SECTION_MAX_AGE)
+
+@sitegroup_bp.cli.command('refresh-activity')
+def refresh_activity_command():
+    """Fold new logins into the sitegroup user-activity tables (run on a schedule)."""
+    click.echo(f"{refresh_user_activity()} sitegroups refreshed")
+
+def resolve_conf_file(directory: str, filename: str) -> str:
+    """
+    Return the absolute path of `filename` inside the sitegroup's conf folder,
+    aborting with 404/403 if the sitegroup or file is unknown.
+    """
     try:
-        doc = minidom.parseString(xml_string)
-
-        # Recursively remove any TEXT_NODE that is pure whitespace
-        def remove_blank_text_nodes(node):
-            for child in list(node.childNodes):
-                if child.nodeType == Node.TEXT_NODE and not child.data.strip():
-                    node.removeChild(child)
-                else:
-                    remove_blank_text_nodes(child)
-
-        remove_blank_text_nodes(doc)
-        return doc.toprettyxml(indent="  ")
-    except Exception:
-        return xml_string
-
-def normalize_xml_for_display(raw: str) -> str:
-    # 1) Pretty-print
-    pretty = pretty_xml(raw)
-    lines = pretty.splitlines()
-
-    # 2) Drop the XML declaration if present
-    if lines and lines[0].strip().startswith('<?xml'):
-        lines = lines[1:]
-
-    # 3) Collapse multiple empty lines into one
-    out, blank = [], False
-    for ln in lines:
-        if not ln.strip():
-            if not blank:
-                out.append('')
-            blank = True
-        else:
-            out.append(ln)
-            blank = False
-
-    return "\n".join(out)
+        sg = Sitegroup(directory)
+    except ValueError:
+        abort(404)
+
+    if filename not in sg.xml_files:
+        abort(404)
+
+    conf = sg.conf_path or ''
+    file_path = os.path.join(conf, filename)
+    if not file_path.startswith(os.path.abspath(conf)):
+        abort(403)
+
+    return file_path
 
 @login_required
 @sitegroup_bp.route('/')
@@ -77,15 +92,75 @@ def index():
 @login_required
 @sitegroup_bp.route('/sitegroup/<directory>')
 def sitegroup_detail(directory):
+    sg = Sitegroup(directory)
     try:
-        sg = Sitegroup(directory)
+        sg.sitegroupid   # one indexed lookup, so unknown directories still 404
     except ValueError:
         abort(404)
-    return render_template('sitegroup/detail.html', sg=sg)
+    sections = [(slug, title) for slug, (title, _) in DETAIL_SECTIONS.items()]
+    return render_template('sitegroup/detail.html', sg=sg, sections=sections)
+
+def _render_section(sg: Sitegroup, section: str) -> str:
+    if section == 'conf-path':
+        return render_template('sitegroup/_detail_section.html', sg=sg, section=section)
+
+    title, attributes = DETAIL_SECTIONS[section]
+    sg.prefetch(*attributes)
+    items = getattr(sg, attributes[0])
+    if section == 'global-settings':
+        items = list(items.items())
+    elif section == 'user-activity':
+        items = items.by_day if items else []
+    elif section == 'contract-cycles' and not items:
+        title, items = 'Sites', sg.site_list
+    return render_template('sitegroup/_detail_section.html',
+                           sg=sg, section=section, title=title, items=items)
+
+@sitegroup_bp.route('/sitegroup/<directory>/section/<section>')
+@login_required
+def detail_section(directory, section):
+    """HTML fragment for one detail-page section; cached for SECTION_MAX_AGE seconds."""
+    if section != 'conf-path' and section not in DETAIL_SECTIONS:
+        abort(404)
+
+    key = (directory.lower(), section)
+    html = _section_cache.get(key)
+    if html is None:
+        try:
+            html = _render_section(Sitegroup(directory), section)
+        except ValueError:
+            abort(404)
+        _section_cache.set(key, html)
 
+    etag = hashlib.md5(html.encode('utf-8')).hexdigest()
+    resp = not_modified(etag, weak=True)
+    if resp is None:
+        resp = gzip_response(make_response(html))
+    set_validators(resp, etag, weak=True)
+    # fresh for a minute without revalidating, then a cheap 304
+    resp.cache_control.no_cache = None
+    resp.cache_control.max_age = SECTION_MAX_AGE
+    return resp
+
+
+def _encode_after(key: Optional[Tuple[str, str, int, int]]) -> Optional[str]:
+    """Opaque ?after= token for a contract-site keyset position."""
+    if key is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+def _decode_after(token: Optional[str]) -> Optional[Tuple[str, str, int, int]]:
+    if not token:
+        return None
+    try:
+        agency, program, contractid, siteid = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        return str(agency), str(program), int(contractid), int(siteid)
+    except (ValueError, TypeError, binascii.Error):
+        abort(400)
 
 @sitegroup_bp.route('/<directory>/contractcycle/<int:contractcycleid>')
 def contractcycle_detail(directory, contractcycleid):
+    """One cycle's contract sites, a keyset page at a time: ?agency=&program=&after=<token>."""
     # load the Sitegroup (and its cycles)
     sg = Sitegroup(directory)
     # find the one cycle
@@ -95,58 +170,110 @@ def contractcycle_detail(directory, contractcycleid):
     if cc is None:
         abort(404)
 
+    agency = request.args.get('agency', '').strip()
+    program = request.args.get('program', '').strip()
+    page = cc.contract_sites_page(after=_decode_after(request.args.get('after')),
+                                  agency=agency, program=program)
+
     # now render a template, passing in both sg (if you need it) and cc
     return render_template('sitegroup/contractcycle_detail.html',
                            sg=sg,
-                           cc=cc)
+                           cc=cc,
+                           page=page,
+                           total=sg.contract_site_counts.get(contractcycleid, 0),
+                           agency=agency,
+                           program=program,
+                           first_page=not request.args.get('after'),
+                           next_after=_encode_after(page.next_after))
 
-@login_required
 @sitegroup_bp.route('/sitegroup/<directory>/file/<path:filename>')
+@login_required
 def view_file(directory, filename):
-    try:
-        sg = Sitegroup(directory)
-    except ValueError:
-        abort(404)
+    file_path = resolve_conf_file(directory, filename)
 
-    if filename not in sg.xml_files:
-        abort(404)
-
-    conf = sg.conf_path or ''
-    file_path = os.path.join(conf, filename)
-    if not file_path.startswith(os.path.abspath(conf)):
-        abort(403)
+    etag, last_modified = view_etag(file_path, 'view', VIEW_WINDOW_LINES)
+    resp = not_modified(etag, last_modified, weak=True)
+    if resp is not None:
+        return resp
 
     try:
-        # Read as UTF-8 (replace bad chars), then normalize
-        raw = open(file_path, 'r', encoding='utf-8', errors='replace').read()
-        content = normalize_xml_for_display(raw)
+        index = get_line_index(file_path)
     except Exception:
         abort(500)
 
-    return render_template(
+    # only the first window goes out with the page; the rest is pulled
+    # through view_file_lines as the user scrolls
+    resp = make_response(render_template(
         'sitegroup/view_file.html',
         directory=directory,
         filename=filename,
-        content=content
+        total_lines=index.line_count,
+        initial_lines=index.lines(1, VIEW_WINDOW_LINES),
+        window_lines=VIEW_WINDOW_LINES
+    ))
+    set_validators(resp, etag, last_modified, weak=True)
+    return gzip_response(resp)
+
+@sitegroup_bp.route('/sitegroup/<directory>/file/<path:filename>/lines')
+@login_required
+def view_file_lines(directory, filename):
+    """JSON: a range of normalized lines, ?start=<1-based line>&count=<n>."""
+    file_path = resolve_conf_file(directory, filename)
+
+    start = max(request.args.get('start', 1, type=int), 1)
+    count = min(max(request.args.get('count', VIEW_WINDOW_LINES, type=int), 0), MAX_LINES_PER_REQUEST)
+
+    etag, last_modified = view_etag(file_path, 'lines', start, count)
+    resp = not_modified(etag, last_modified, weak=True)
+    if resp is not None:
+        return resp
+
+    try:
+        index = get_line_index(file_path)
+    except Exception:
+        abort(500)
+
+    resp = jsonify(
+        start=start,
+        total=index.line_count,
+        lines=index.lines(start, count)
     )
+    set_validators(resp, etag, last_modified, weak=True)
+    return gzip_response(resp)
+
+@sitegroup_bp.route('/sitegroup/<directory>/file/<path:filename>/find')
+@login_required
+def find_in_file(directory, filename):
+    """JSON: (line, column) hits for ?q=<text>, searching forward from ?from=<line>."""
+    file_path = resolve_conf_file(directory, filename)
+
+    needle = request.args.get('q', '')
+    from_line = max(request.args.get('from', 1, type=int), 1)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), MAX_FIND_RESULTS)
+    case_sensitive = request.args.get('case') == '1'
+
+    try:
+        index = get_line_index(file_path)
+    except Exception:
+        abort(500)
+
+    hits = index.find(needle, start_line=from_line, limit=limit, case_sensitive=case_sensitive)
+    resp = jsonify(
+        query=needle,
+        total=index.line_count,
+        matches=[{'line': line, 'col': col} for line, col in hits]
+    )
+    return gzip_response(resp)
 
 @sitegroup_bp.route('/sitegroup/<directory>/file/<path:filename>/download')
 @login_required
 def download_file(directory, filename):
     """Let the user download the raw XML."""
-    try:
-        sg = Sitegroup(directory)
-    except ValueError:
-        abort(404)
-
-    if filename not in sg.xml_files:
-        abort(404)
+    file_path = resolve_conf_file(directory, filename)
 
-    # send_from_directory will set correct headers
-    return send_from_directory(
-        directory=os.path.abspath(sg.conf_path),
-        path=filename,
+    # ETag/Last-Modified, 304s and gzip are handled by xml_file_response
+    return xml_file_response(
+        file_path,
         as_attachment=True,
-        download_name=filename,
-        mimetype='application/xml'
+        download_name=filename
     )
@@ -2,8 +2,15 @@ const syncBtn = document.getElementById('js-sync');
 const container = document.getElementById('sync-container');
 const progBar = document.getElementById('sync-progress');
 const logEl = document.getElementById('sync-log');
+const pipelineEl = document.getElementById('sync-pipeline');
+const countsEl = document.getElementById('sync-counts');
 const mainRow = document.getElementById('main-row');
 
+// sync_stream protocol this script speaks (see work_status/events.py)
+const SYNC_PROTOCOL = 2;
+// reconnect attempts without hearing anything before giving up
+const MAX_RECONNECTS = 10;
+
 syncBtn.addEventListener('click', e => {
     e.preventDefault();
     // Disable main row and show sync UI
@@ -11,9 +18,10 @@ syncBtn.addEventListener('click', e => {
     container.style.display = 'block';
     progBar.value = 0;
     logEl.innerHTML = '';
+    if (pipelineEl) pipelineEl.textContent = '';
+    if (countsEl) countsEl.textContent = '';
 
-    let total = 0;
-    let current = 0;
+    let reconnects = 0;
 
     const pstFormatter = new Intl.DateTimeFormat('en-US', {
         timeZone: 'America/Los_Angeles',
@@ -21,72 +29,90 @@ syncBtn.addEventListener('click', e => {
         hour: 'numeric', minute: 'numeric', second: 'numeric', hour12: true
     });
 
-    const es = new EventSource('/work_status/sync_stream');
+    const log = (text, color) => {
+        const stamp = pstFormatter.format(new Date());
+        const line = document.createElement('div');
+        if (color) line.style.color = color;
+        line.textContent = `[${stamp}] ${text}`;
+        logEl.appendChild(line);
+        logEl.scrollTop = logEl.scrollHeight;
+    };
 
-    es.onmessage = evt => {
-        const msg = evt.data;
+    const restore = () => {
+        container.style.display = 'none';
+        mainRow.classList.remove('hidden');
+    };
 
-        // 1) Server-side exception came back
-        if (msg.startsWith('SYNC_ERROR:')) {
-            const errText = msg.slice('SYNC_ERROR:'.length);
-            const now = new Date();
-            const stamp = pstFormatter.format(now);
-            const errEl = document.createElement('div');
-            errEl.style.color = 'red';
-            errEl.textContent = `[${stamp}] Sync failed: ${errText}`;
-            logEl.appendChild(errEl);
-            logEl.scrollTop = logEl.scrollHeight;
+    // the browser resends Last-Event-ID itself when it reconnects
+    const es = new EventSource('/work_status/sync_stream');
 
+    // every frame (heartbeats included) proves the connection is alive;
+    // connection-level 'error' events carry no data and go to onerror
+    const on = (type, handler) => es.addEventListener(type, evt => {
+        if (typeof evt.data !== 'string') return;
+        reconnects = 0;
+        handler(JSON.parse(evt.data));
+    });
+
+    on('hello', data => {
+        if (data.protocol !== SYNC_PROTOCOL) {
             es.close();
-            // restore UI immediately
-            container.style.display = 'none';
-            mainRow.classList.remove('hidden');
-            return;
+            log(`Sync protocol ${data.protocol} not supported; reload the page.`, 'red');
+            restore();
         }
+    });
 
-        // 2) Total count
-        if (msg.startsWith('PROGRESS_TOTAL:')) {
-            total = parseInt(msg.split(':')[1], 10);
-            progBar.max = total;
-            return;
-        }
-        // 3) Step increment
-        if (msg.startsWith('PROGRESS_STEP:')) {
-            current += parseInt(msg.split(':')[1], 10);
-            progBar.value = current;
-            return;
+    // absolute values, so a resumed stream just overwrites them
+    on('progress', data => {
+        progBar.max = data.total || 1;
+        progBar.value = data.current;
+    });
+
+    on('counts', data => {
+        if (countsEl) {
+            countsEl.textContent = Object.entries(data).map(([k, v]) => `${k}: ${v}`).join(' | ');
         }
+    });
 
-        // 4) Normal log line
-        const now = new Date();
-        const stamp = pstFormatter.format(now);
-        const line = document.createElement('div');
-        line.textContent = `[${stamp}] ${msg}`;
-        logEl.appendChild(line);
-        logEl.scrollTop = logEl.scrollHeight;
+    on('stats', data => {
+        // Fetch/write stage stats: replace the status line, don't log
+        if (pipelineEl) pipelineEl.textContent = data.text;
+    });
 
-        // 5) All donereload
-        if (msg === 'All done!') {
-            es.close();
-            setTimeout(() => {
-                container.style.display = 'none';
-                mainRow.classList.remove('hidden');
-                window.location.reload();
-            }, 500);
-        }
-    };
+    on('phase', data => log(data.message));
+    on('log', data => log(data.message));
+    on('heartbeat', () => {});
+
+    on('error', data => {
+        // Server-side exception (or a run that can no longer be resumed)
+        es.close();
+        log(`Sync failed: ${data.message}`, 'red');
+        // restore UI immediately
+        restore();
+    });
+
+    on('done', () => {
+        es.close();
+        log('All done!');
+        setTimeout(() => {
+            // redraw just the columns; fall back to a full reload
+            const refresh = window.refreshBoard ? window.refreshBoard() : Promise.reject();
+            refresh
+                .then(restore)
+                .catch(() => window.location.reload());
+        }, 500);
+    });
 
     es.onerror = () => {
-        // This only fires on lower-level connection errors
+        // Connection dropped: EventSource retries on its own and resumes
+        // from the last event id, unless the server refused outright.
+        reconnects += 1;
+        if (es.readyState === EventSource.CONNECTING && reconnects <= MAX_RECONNECTS) {
+            if (reconnects === 1) log('Connection lost, reconnecting...', 'orange');
+            return;
+        }
         es.close();
-        const now = new Date();
-        const stamp = pstFormatter.format(now);
-        const err = document.createElement('div');
-        err.style.color = 'red';
-        err.textContent = `[${stamp}] Network error during sync.`;
-        logEl.appendChild(err);
-        logEl.scrollTop = logEl.scrollHeight;
-        container.style.display = 'none';
-        mainRow.classList.remove('hidden');
+        log('Network error during sync.', 'red');
+        restore();
     };
 });
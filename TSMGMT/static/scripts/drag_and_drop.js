@@ -13,17 +13,16 @@ window.addEventListener('DOMContentLoaded', () => {
 
     // 1) When drag starts, remember the full card element
     function onDragStart(e) {
-        draggedEl = e.currentTarget;
+        const card = e.target.closest && e.target.closest('.draggable-item');
+        if (!card) return;
+        draggedEl = card;
         e.dataTransfer.effectAllowed = 'move';
         // Some browsers require setData to enable dragging
         try { e.dataTransfer.setData('text/plain', ''); } catch (_) { }
     }
 
-    // 2) Attach dragstart to each card wrapper
-    document.querySelectorAll('.draggable-item').forEach(card => {
-        card.setAttribute('draggable', 'true');
-        card.addEventListener('dragstart', onDragStart);
-    });
+    // 2) Delegate dragstart, so cards re-rendered by refreshBoard() stay draggable
+    document.addEventListener('dragstart', onDragStart);
 
     // 3) Wire up dropzones
     document.querySelectorAll('.dropzone').forEach(zone => {
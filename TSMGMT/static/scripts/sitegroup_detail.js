@@ -0,0 +1,19 @@
+// Sitegroup detail page: the server sends a shell of placeholders, each
+// with a data-section-url.  Fetch them all at once and swap every
+// placeholder for its fragment as it arrives (fragments are HTTP-cached).
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-section-url]').forEach(function (el) {
+        fetch(el.dataset.sectionUrl, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(function (resp) {
+                return resp.ok ? resp.text() : Promise.reject(resp.status);
+            })
+            .then(function (html) {
+                el.outerHTML = html;
+            })
+            .catch(function (err) {
+                console.error('Failed to load section', el.id, err);
+                var status = el.querySelector('.section-status');
+                if (status) status.textContent = '(failed to load)';
+            });
+    });
+});
@@ -27,3 +27,78 @@ document.addEventListener('click', e => {
             alert('Could not hide task: ' + err);
         });
 });
+
+// Re-render the board columns from the board JSON endpoint (#main-row's
+// data-board-url) instead of reloading the whole page.  Markup matches
+// work_status/index.html.
+function renderBoardCard(todo, col) {
+    const card = document.createElement('div');
+    card.className = 'card border draggable-item p-0';
+    card.draggable = true;
+    card.dataset.id = todo.id;
+
+    const header = document.createElement('div');
+    header.className = `card-header bg-${col.color} ${col.text_class} border-bottom py-2 px-3`;
+    const project = document.createElement('span');
+    project.className = 'fw-semibold';
+    project.textContent = todo.project_name || '';
+    const due = document.createElement('small');
+    due.className = todo.overdue ? 'text-muted fw-bold' : 'text-muted';
+    due.textContent = `Due: ${todo.due_display}`;
+    header.append(project, document.createElement('br'), due);
+
+    const ul = document.createElement('ul');
+    ul.className = 'list-group list-group-flush';
+    const li = document.createElement('li');
+    li.className = 'list-group-item py-2 px-3';
+    li.append(document.createTextNode(todo.name || ''), document.createElement('br'));
+    if (todo.app_url) {
+        const a = document.createElement('a');
+        a.href = todo.app_url;
+        a.target = '_blank';
+        a.rel = 'noopener';
+        a.textContent = `view ${todo.task_type}`;
+        li.append(a);
+    } else {
+        const dash = document.createElement('span');
+        dash.className = 'text-muted';
+        dash.textContent = '-';
+        li.append(dash);
+    }
+    const hide = document.createElement('button');
+    hide.style.float = 'right';
+    hide.className = 'btn btn-sm btn-outline-dark hide-todo';
+    hide.dataset.id = todo.id;
+    hide.title = 'Hide this task';
+    hide.innerHTML = '<i class="bi bi-eye-slash-fill"></i>';
+    li.append(hide);
+    ul.append(li);
+
+    card.append(header, ul);
+    return card;
+}
+
+function refreshBoard() {
+    const row = document.getElementById('main-row');
+    const url = row && row.dataset.boardUrl;
+    if (!url) return Promise.reject(new Error('no board URL'));
+
+    return fetch(url, { headers: { 'Accept': 'application/json' } })
+        .then(resp => resp.ok ? resp.json() : Promise.reject(new Error(`board refresh failed (${resp.status})`)))
+        .then(board => {
+            board.columns.forEach(col => {
+                const list = document.querySelector(`#zone-${col.key} .todo-list`);
+                if (!list) return;
+                if (!col.cards.length) {
+                    const placeholder = document.createElement('div');
+                    placeholder.className = 'list-group-item placeholder text-muted fst-italic';
+                    placeholder.textContent = 'Drop tasks here';
+                    list.replaceChildren(placeholder);
+                    return;
+                }
+                list.replaceChildren(...col.cards.map(todo => renderBoardCard(todo, col)));
+            });
+            return board;
+        });
+}
+window.refreshBoard = refreshBoard;
@@ -3,10 +3,17 @@
 Utility package for shared helper functions across the TSMGMT app.
 Expose key utilities at the package level for easy import.
 """
-from .dates import to_dt, datetimes_match, to_pst
+from .dates import to_dt, datetimes_match, to_pst, to_epoch, epoch_to_dt, epoch_map, changed_keys, tz
+from .cache import TTLCache
 
 __all__ = [
     "to_dt",
     "datetimes_match",
-    "to_pst"
+    "to_pst",
+    "to_epoch",
+    "epoch_to_dt",
+    "epoch_map",
+    "changed_keys",
+    "tz",
+    "TTLCache"
 ]
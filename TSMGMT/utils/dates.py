@@ -1,8 +1,9 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from dateutil.tz import gettz  # for timezone conversion
 from dateutil import parser  # use parse for robust ISO parsing
+from functools import lru_cache
 from zoneinfo import ZoneInfo
-from typing import Optional, Union
+from typing import Any, Dict, Hashable, Iterable, Mapping, Optional, Set, Union
 
 def to_dt(val: Union[str, None, datetime]) -> Optional[datetime]:
     '''
@@ -22,44 +23,82 @@ def datetimes_match(dt1: datetime, dt2: datetime) -> bool:
     """
     Return True if dt1 and dt2 represent the same calendar date and time
     down to the second (ignores microseconds and timezone differences).
+    Naive values are taken as UTC, which is how the DB stores them.
     """
-    if dt1 is None or dt2 is None:
-        return False
+    e1 = to_epoch(dt1)
+    return e1 is not None and e1 == to_epoch(dt2)
 
-    if isinstance(dt1, str):
-        # you may need to strip timezone Z or adjust format variants here
-        dt1 = datetime.fromisoformat(dt1)
+# -- EPOCH SECONDS -------------------------------------------------------------
+# Staleness checks compare whole seconds in UTC.  Normalizing each value once
+# to an int makes snapshot maps cheap to build and lets whole maps be
+# compared with plain dict/set operations instead of per-row datetime work.
 
-    if isinstance(dt2, str):
-        # you may need to strip timezone Z or adjust format variants here
-        dt2 = datetime.fromisoformat(dt2)
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
 
-    # 1) Convert any "aware" datetime to UTC, then drop tzinfo
-    if dt1.tzinfo is not None:
-        dt1 = dt1.astimezone(timezone.utc).replace(tzinfo=None)
-    if dt2.tzinfo is not None:
-        dt2 = dt2.astimezone(timezone.utc).replace(tzinfo=None)
+def to_epoch(val: Union[str, None, datetime, date, int]) -> Optional[int]:
+    """
+    Whole UTC seconds since 1970 for an ISO string, datetime or date
+    (naive values taken as UTC); ints pass through, None / '' give None.
+    Two values match under datetimes_match() exactly when these are equal.
+    """
+    if val is None or val == "":
+        return None
+    if isinstance(val, int):
+        return val
+    if isinstance(val, str):
+        val = datetime.fromisoformat(val)
+    if isinstance(val, datetime):
+        delta = val - (_EPOCH if val.tzinfo is None else _EPOCH_UTC)
+        return delta.days * 86400 + delta.seconds
+    if isinstance(val, date):
+        return (val.toordinal() - _EPOCH_ORDINAL) * 86400
+    raise TypeError(f"Unsupported type for timestamp input: {type(val).__name__}")
 
-    # 2) Zero out microseconds
-    dt1 = dt1.replace(microsecond=0)
-    dt2 = dt2.replace(microsecond=0)
+def epoch_to_dt(secs: Optional[int]) -> Optional[datetime]:
+    """Naive UTC datetime for epoch seconds (the DB's representation)."""
+    return None if secs is None else _EPOCH + timedelta(seconds=secs)
+
+def epoch_map(rows: Iterable[Mapping], key: str, column: str = 'updated_at') -> Dict[Hashable, Optional[int]]:
+    """Snapshot {row[key]: epoch of row[column]} from query rows, normalized once."""
+    return {r[key]: to_epoch(r[column]) for r in rows}
+
+def changed_keys(current: Mapping[Hashable, Any], snapshot: Mapping[Hashable, Optional[int]]) -> Set[Hashable]:
+    """
+    Keys of `current` ({key: timestamp}, any form to_epoch accepts) that
+    are missing from `snapshot` ({key: epoch}), differ from it, or have no
+    timestamp at all -- the same rows a per-row datetimes_match() check
+    would flag, found with one set difference.
+    """
+    now = {k: to_epoch(v) for k, v in current.items()}
+    undated = {k for k, v in now.items() if v is None}
+    return {k for k, _ in now.items() - snapshot.items()} | undated
 
-    # 3) Compare
-    return dt1 == dt2
+# -- DISPLAY -------------------------------------------------------------------
+@lru_cache(maxsize=32)
+def tz(name: str):
+    """Cached tzinfo for an IANA name (zoneinfo, falling back to dateutil)."""
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        return gettz(name)
 
 def to_pst(ts_input) -> str:
     # If input is a string, parse it to a datetime
     if isinstance(ts_input, str):
         if ts_input.endswith('Z'):
             ts_input = ts_input[:-1] + '+00:00'
-        dt = parser.parse(ts_input)
+        try:
+            dt = datetime.fromisoformat(ts_input)
+        except ValueError:
+            dt = parser.parse(ts_input)
     elif isinstance(ts_input, datetime):
         dt = ts_input
     else:
         raise ValueError("Unsupported type for timestamp input")
 
     # Convert to Pacific time zone
-    tz = gettz('America/Los_Angeles') or gettz('US/Pacific')
-    pst = dt.astimezone(tz)
+    pst = dt.astimezone(tz('America/Los_Angeles') or tz('US/Pacific'))
 
     return pst.strftime('%b %d, %Y %I:%M:%S %p')
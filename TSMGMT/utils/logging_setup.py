@@ -0,0 +1,110 @@
+import os
+import atexit
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+# -----------------------------------------------------------------------------
+# Application logging
+# -----------------------------------------------------------------------------
+#
+# Request threads only put records on an in-memory queue; a single
+# QueueListener thread formats them and does the console / file-share I/O.
+#
+# Config keys (all optional):
+#   LOG_LEVEL       level for the 'TSMGMT' logger tree        (default INFO)
+#   LOG_LEVELS      {logger name: level} overrides, e.g.
+#                   {"TSMGMT.sitegroup.models": "DEBUG"}
+#   LOG_DIR         folder for the rotating file log; unset = console only
+#   LOG_FILE        file name inside LOG_DIR                  (default sitegroup.log)
+#   LOG_FILE_LOGGER only records from this logger tree go to the file
+#                   (default TSMGMT.sitegroup, as before)
+#   SLOW_QUERY_LOG_FILE  file inside LOG_DIR for TSMGMT.db.slow_queries
+#                   (default slow_queries.log)
+
+ROOT_LOGGER = 'TSMGMT'
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+def _formatter() -> logging.Formatter:
+    return logging.Formatter(
+        fmt="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+
+def _file_handler(config, filename: str, logger_name: str) -> Optional[logging.Handler]:
+    log_dir = config.get('LOG_DIR')
+    if not log_dir:
+        return None
+
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        fh = RotatingFileHandler(
+            filename=os.path.join(log_dir, filename),
+            maxBytes=5*1024*1024,   # 5 MB
+            backupCount=3,          # keep last 3 files
+            encoding="utf-8"
+        )
+    except OSError:
+        logging.getLogger(ROOT_LOGGER).exception("Could not open log file in %s; logging to console only", log_dir)
+        return None
+
+    fh.setLevel(logging.INFO)  # only INFO goes to disk
+    fh.setFormatter(_formatter())
+    fh.addFilter(logging.Filter(logger_name))
+    return fh
+
+def apply_log_levels(levels: Dict[str, str]) -> None:
+    """Set per-logger levels from a {name: level-name} mapping."""
+    for name, level in (levels or {}).items():
+        logging.getLogger(name).setLevel(str(level).upper())
+
+def configure_logging(app) -> None:
+    """
+    Route the 'TSMGMT' logger tree (including app.logger) through a
+    QueueHandler and start the background listener.  Safe to call more
+    than once; only the first call installs handlers.
+    """
+    global _listener, _queue_handler
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(str(app.config.get('LOG_LEVEL', 'INFO')).upper())
+    apply_log_levels(app.config.get('LOG_LEVELS'))
+
+    if _listener is not None:
+        return
+
+    console = logging.StreamHandler()
+    console.setLevel(logging.DEBUG)
+    console.setFormatter(_formatter())
+
+    handlers = [console]
+    for fh in (
+        _file_handler(app.config, app.config.get('LOG_FILE', 'sitegroup.log'),
+                      app.config.get('LOG_FILE_LOGGER', 'TSMGMT.sitegroup')),
+        _file_handler(app.config, app.config.get('SLOW_QUERY_LOG_FILE', 'slow_queries.log'),
+                      'TSMGMT.db.slow_queries'),
+    ):
+        if fh:
+            handlers.append(fh)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = QueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    root.propagate = False
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging() -> None:
+    """Flush anything still queued and stop the writer thread."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger(ROOT_LOGGER).removeHandler(_queue_handler)
+        _queue_handler = None
@@ -1,16 +1,24 @@
-from flask import current_app, url_for, redirect, session
-from datetime import datetime
-import pyodbc as p
+from flask import current_app, url_for, redirect, session, has_app_context
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import contextvars
+import math
 import time
 import re
 from ratelimit import limits, sleep_and_retry
 from requests.exceptions import HTTPError, SSLError
 from urllib3.exceptions import ProtocolError, MaxRetryError
 from authlib.integrations.flask_client import OAuth
-from typing import List, Tuple, Optional
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, Iterable, List, Tuple, Optional
 # your existing DB & util imports:
-from ..db.connection import execute_query, execute_many, get_connection
-from TSMGMT.utils import to_dt, datetimes_match, to_pst
+from ..db.connection import TRANSIENT_RETRY, BulkSchema, bulk_load, execute_query, execute_many, unit_of_work
+from ..metrics.collector import record_api, record_pages, record_rate_limit_wait, record_rows_written
+from ..metrics.registry import REGISTRY, SECONDS_BUCKETS
+from .pipeline import SyncPipeline, emit, transaction, write as _write
+from .telemetry import SyncTelemetry
+from TSMGMT.utils import to_dt, to_pst, epoch_map, epoch_to_dt, changed_keys, TTLCache
 
 oauth = OAuth()
 
@@ -19,6 +27,17 @@ CALLS_PER_WINDOW = 45
 WINDOW_SECONDS   = 10
 MAX_RETRIES      = 5
 INITIAL_BACKOFF  = 1 
+MAX_IN_PARAMS    = 2000   # SQL Server allows 2100 parameters per statement
+
+PAGE_FETCH_WORKERS = 4    # concurrent page requests once the page count is known (1 = walk Link headers)
+
+SYNC_FETCHERS    = 2      # projects walked in parallel (sharing the rate limit)
+SYNC_WRITE_QUEUE = 4      # projects fetched but not yet written before fetchers block
+
+WATERMARK_OVERLAP = timedelta(seconds=60)   # re-read this much before a stored watermark (clock skew)
+
+PEOPLE_SYNC_INTERVAL = 6 * 3600   # re-validate people.json at most this often
+PEOPLE_MAP_TTL       = 300        # seconds the in-process email -> person_id map is reused
 
 def init_basecamp_oauth(app):
     oauth.init_app(app)
@@ -36,7 +55,9 @@ def init_basecamp_oauth(app):
         access_token_params={'type': 'web_server'},
 
         # this is your Basecamp API base, using your account ID
-        api_base_url=f"https://3.basecampapi.com/{app.config['BASECAMP_ACCOUNT_ID']}/",
+        # (BASECAMP_API_BASE_URL points it at benchmarks/fake_server.py for load tests)
+        api_base_url=app.config.get('BASECAMP_API_BASE_URL')
+                     or f"https://3.basecampapi.com/{app.config['BASECAMP_ACCOUNT_ID']}/",
 
         # ensure client_id/secret go in the POST body (not just the Authorization header)
         client_kwargs={
@@ -59,29 +80,16 @@ def basecamp_callback():
     session['basecamp_token'] = token
     return redirect(url_for('work_status.index'))
 
-def get_person_id_for_email(email, token):
-    # 1) Try the cache
-    row = execute_query(
-        "SELECT person_id FROM BasecampStaffUsers WHERE email = ?",
-        params=(email,)
-    )
-    if row:
-        return row[0]['person_id']
-
-    # 2) Fallback to the API
-    people = _get_all_pages('people.json', token)
-    for person in people:
-        if person.get('email_address') == email:
-            pid = person['id'] 
-
-            # 3) Cache for next time
-            execute_many(
-                "INSERT INTO BasecampStaffUsers (email, person_id) VALUES (?,?);",
-                [(email, pid)]
-            )
-            return pid
-
-    return None  # not found
+def get_person_id_for_email(email, token=None):
+    """
+    Look up a Basecamp person id from the cached people directory.  Never
+    calls the API: the directory is filled by sync_people(), which runs at
+    the start of every cache sync.  Unknown emails return None (and stay
+    unknown until the in-process map expires or the next sync).
+    """
+    if not email:
+        return None
+    return _people_directory().get(email.lower())
 
 def get_all_todos():
     sql = """
@@ -164,23 +172,37 @@ def get_user_todos(user, assignee_id=None):
             'due_on': row.get('due_on'),
             'app_url': row.get('app_url'),
             'status': row['status'],
+            'position': row['position'],
+            'email': row['email'],
             'assignees': []  # Assignees not stored in this query; can join if needed
         })
     return todos
 
 # -- RATE-LIMIT + RETRYING GET -------------------------------------------------
+def limited_get(url, token, headers=None):
+    # note when we asked, so the time sleep_and_retry holds us back
+    # shows up as rate-limit wait rather than API time
+    return _rate_limited_get(url, token, headers, time.perf_counter())
+
 @sleep_and_retry
 @limits(calls=CALLS_PER_WINDOW, period=WINDOW_SECONDS)
-def limited_get(url, token, headers=None):
+def _rate_limited_get(url, token, headers, requested_at):
+    record_rate_limit_wait(time.perf_counter() - requested_at)
+    return _get_with_retries(url, token, headers)
+
+def _get_with_retries(url, token, headers=None):
     backoff = INITIAL_BACKOFF
     last_exc = None
     for attempt in range(1, MAX_RETRIES + 1):
         try:
+            started = time.perf_counter()
             resp = oauth.basecamp.get(url, token=token, headers=headers or {})
+            record_api(time.perf_counter() - started, len(resp.content or b''))
             if resp.status_code == 429:
                 ra = resp.headers.get('Retry-After')
                 wait = int(ra) if ra and ra.isdigit() else WINDOW_SECONDS
                 time.sleep(wait)
+                record_rate_limit_wait(wait)
                 continue
             resp.raise_for_status()
             return resp
@@ -195,33 +217,96 @@ def limited_get(url, token, headers=None):
     raise last_exc
 
 # -- PAGINATION W/ updated_since SUPPORT ---------------------------------------
+PAGINATION_SECONDS = REGISTRY.histogram(
+    'tsmgmt_basecamp_pagination_seconds', 'Wall time to fetch every page of one Basecamp collection.',
+    ('mode',), SECONDS_BUCKETS)
+PAGES_FETCHED = REGISTRY.counter(
+    'tsmgmt_basecamp_pages_total', 'Basecamp collection pages fetched.', ('mode',))
+
 def _get_all_pages(path, token, updated_since=None):
-    items    = []
+    """
+    Fetch every page of a Basecamp collection, in order.  When the first
+    page's X-Total-Count and next link (...page=2) pin down the page count,
+    the rest are requested concurrently (PAGE_FETCH_WORKERS, still through
+    the shared rate limiter); otherwise the Link headers are walked one by one.
+    """
     base_url = oauth.basecamp.api_base_url.rstrip('/') + '/'
     # tack on updated_since if provided
     if updated_since:
         sep  = '&' if '?' in path else '?'
         path = f"{path}{sep}updated_since={updated_since}"
-    url = path
-    seen = set()
-
-    while url and url not in seen:
-        seen.add(url)
-        resp = limited_get(url, token)
-        if resp.status_code in (304, 404):
-            break
 
+    started = time.perf_counter()
+    items, pages, mode = [], 1, 'single'
+    resp = limited_get(path, token)
+    if resp.status_code not in (304, 404):
         page = resp.json()
-        if isinstance(page, list) and not page:
-            break
-
         items.extend(page if isinstance(page, list) else [page])
-
-        link = resp.headers.get('Link')
-        url  = _parse_link_header(link, base_url) if link else None
-
+        url = _next_page(resp, base_url) if page else None
+
+        predicted = _predict_pages(url, len(page), resp.headers.get('X-Total-Count')) \
+            if url and isinstance(page, list) else None
+        if predicted:
+            mode = 'parallel'
+            for resp in _fetch_pages(predicted, token):
+                pages += 1
+                if resp.status_code not in (304, 404):
+                    items.extend(resp.json())
+            # the collection grew while we read it: carry on from the last page
+            url = _next_page(resp, base_url)
+            url = url if url not in predicted else None
+        elif url:
+            mode = 'sequential'
+
+        seen = {path} | set(predicted or ())
+        while url and url not in seen:
+            seen.add(url)
+            pages += 1
+            resp = limited_get(url, token)
+            if resp.status_code in (304, 404):
+                break
+            page = resp.json()
+            if isinstance(page, list) and not page:
+                break
+            items.extend(page if isinstance(page, list) else [page])
+            url = _next_page(resp, base_url)
+
+    PAGINATION_SECONDS.observe(time.perf_counter() - started, mode=mode)
+    PAGES_FETCHED.inc(pages, mode=mode)
+    record_pages(pages)
     return items
 
+def _next_page(resp, base_url):
+    link = resp.headers.get('Link')
+    return _parse_link_header(link, base_url) if link else None
+
+def _predict_pages(next_url, page_size, total):
+    """URLs of pages 2..N if `next_url` is page 2 and `total` is known, else None."""
+    if PAGE_FETCH_WORKERS < 2 or not page_size or not (total or '').isdigit():
+        return None
+    m = re.search(r'([?&]page=)2(?=&|$)', next_url)
+    if not m:
+        return None
+    n_pages = math.ceil(int(total) / page_size)
+    return [f"{next_url[:m.start(1)]}{m.group(1)}{n}{next_url[m.end():]}"
+            for n in range(2, n_pages + 1)]
+
+def _fetch_pages(urls, token):
+    """GET `urls` on a small thread pool; responses come back in url order."""
+    app = current_app._get_current_object() if has_app_context() else None
+
+    def fetch(url):
+        if app is None:
+            return limited_get(url, token)
+        with app.app_context():
+            return limited_get(url, token)
+
+    with ThreadPoolExecutor(max_workers=min(PAGE_FETCH_WORKERS, len(urls)),
+                            thread_name_prefix='basecamp-page') as pool:
+        # each request reports into the caller's metrics collectors
+        futures = [pool.submit(contextvars.copy_context().run, fetch, url) for url in urls]
+        return [f.result() for f in futures]
+
 def _parse_link_header(link_header, base_url):
     for part in link_header.split(','):
         if 'rel="next"' in part:
@@ -242,9 +327,12 @@ def get_last_sync(resource: str) -> datetime:
     )
     return to_dt(row[0]['last_refreshed_at']) if row else None
 
-def set_last_sync(resource: str):
-    now = datetime.utcnow()
-    execute_query("""
+def set_last_sync(resource: str, when: Optional[datetime] = None):
+    """
+    Stamp `resource` as synced up to `when` (default: now, UTC).  Pass the
+    time the fetch *started* so changes made while it ran are re-read next time.
+    """
+    execute_many("""
         MERGE dbo.BasecampSyncState AS target
         USING (VALUES (?, ?)) AS src(resource, last_refreshed_at)
           ON target.resource = src.resource
@@ -252,40 +340,285 @@ def set_last_sync(resource: str):
           UPDATE SET last_refreshed_at = src.last_refreshed_at
         WHEN NOT MATCHED THEN
           INSERT (resource, last_refreshed_at) VALUES (src.resource, src.last_refreshed_at);
-    """, params=[resource, now])
+    """, [(resource, when or datetime.utcnow())], retry=TRANSIENT_RETRY)
+
+def _since(previous: Optional[int]) -> Optional[str]:
+    """
+    updated_since for the children of a changed record: the record's
+    previously stored updated_at, as epoch seconds from epoch_map() (None
+    if it is new).  Its *new* updated_at would skip the very child edits
+    that bumped it.
+    """
+    return to_iso(epoch_to_dt(previous)) if previous is not None else None
+
+def _count_upserts(keys: Iterable, existing) -> None:
+    """Report upserted keys to the metrics collectors: updates if in `existing`, else inserts."""
+    keys = list(keys)
+    updated = sum(1 for k in keys if k in existing)
+    record_rows_written(inserted=len(keys) - updated, updated=updated)
+
+def _watermark(resource: str) -> Optional[str]:
+    """updated_since value for `resource`, backed off by WATERMARK_OVERLAP."""
+    last = get_last_sync(resource)
+    return to_iso(last - WATERMARK_OVERLAP) if last else None
+
+# -- PEOPLE DIRECTORY ----------------------------------------------------------
+_people_map = TTLCache(maxsize=1, ttl=PEOPLE_MAP_TTL)
+
+def _people_directory():
+    """{lower-cased email: person_id} for everyone in BasecampStaffUsers."""
+    def load():
+        rows = execute_query("SELECT email, person_id FROM BasecampStaffUsers")
+        return {r['email'].lower(): r['person_id'] for r in rows if r['email']}
+    return _people_map.get_or_load('people', load)
+
+def _get_sync_etag(resource: str):
+    row = execute_query(
+        "SELECT last_refreshed_at, etag FROM dbo.BasecampSyncState WHERE resource = ?",
+        params=[resource]
+    )
+    if not row:
+        return None, None
+    return to_dt(row[0]['last_refreshed_at']), row[0]['etag']
+
+def _set_sync_etag(resource: str, etag):
+    execute_many("""
+        MERGE dbo.BasecampSyncState AS target
+        USING (VALUES (?, ?, ?)) AS src(resource, last_refreshed_at, etag)
+          ON target.resource = src.resource
+        WHEN MATCHED THEN
+          UPDATE SET last_refreshed_at = src.last_refreshed_at, etag = src.etag
+        WHEN NOT MATCHED THEN
+          INSERT (resource, last_refreshed_at, etag) VALUES (src.resource, src.last_refreshed_at, src.etag);
+    """, [(resource, datetime.utcnow(), etag)], retry=TRANSIENT_RETRY)
+
+def _fetch_people(token, etag=None):
+    """
+    Return (people, etag).  The first page is sent with If-None-Match;
+    a 304 means the directory is unchanged and people is None.
+
+    The ETag only covers page 1, so it is returned (and later trusted)
+    only when the directory fits on one page.  A multi-page directory
+    comes back with etag None and is read in full on every check;
+    otherwise a change on page 2+ would hide behind page 1's 304 forever.
+    """
+    resp = limited_get('people.json', token, headers={'If-None-Match': etag} if etag else None)
+    if resp.status_code == 304:
+        return None, etag
+
+    people = resp.json()
+    link = resp.headers.get('Link')
+    next_path = None
+    if link:
+        base_url = oauth.basecamp.api_base_url.rstrip('/') + '/'
+        next_path = _parse_link_header(link, base_url)
+        if next_path:
+            people.extend(_get_all_pages(next_path, token))
+    return people, None if next_path else resp.headers.get('ETag')
+
+def sync_people(token, force: bool = False) -> int:
+    """
+    Refresh BasecampStaffUsers (person_id, email, name, avatar) from
+    people.json.  Skipped if the directory was checked within
+    PEOPLE_SYNC_INTERVAL; otherwise re-validated with the stored ETag, so
+    an unchanged single-page directory costs one 304 (a multi-page one is
+    re-read, see _fetch_people).  Returns the number of rows written.
+    """
+    checked_at, etag = _get_sync_etag('people')
+    if not force and checked_at and (datetime.utcnow() - checked_at).total_seconds() < PEOPLE_SYNC_INTERVAL:
+        return 0
+
+    people, new_etag = _fetch_people(token, None if force else etag)
+    if people is None:
+        _set_sync_etag('people', etag)
+        return 0
+
+    rows = execute_query("SELECT email, person_id, name, avatar_url FROM BasecampStaffUsers")
+    db_map = {r['email']: (r['person_id'], r['name'], r['avatar_url']) for r in rows}
+
+    now, upserts = datetime.utcnow(), []
+    for person in people:
+        email = person.get('email_address')
+        if not email:
+            continue
+        current = (person['id'], person.get('name'), person.get('avatar_url'))
+        if db_map.get(email) != current:
+            upserts.append((email, *current, now, email,
+                            email, *current, now))
+
+    if upserts:
+        _count_upserts((row[0] for row in upserts), db_map)
+        execute_many("""
+            IF EXISTS (SELECT 1 FROM BasecampStaffUsers WHERE email=?)
+              UPDATE BasecampStaffUsers
+                 SET person_id=?, name=?, avatar_url=?, synced_at=?
+               WHERE email=?;
+            ELSE
+              INSERT INTO BasecampStaffUsers(email,person_id,name,avatar_url,synced_at)
+              VALUES(?,?,?,?,?);
+        """, upserts, retry=TRANSIENT_RETRY)
+        _people_map.clear()
+
+    _set_sync_etag('people', new_etag)
+    return len(upserts)
+
+# -- ASSIGNEES -----------------------------------------------------------------
+# kind -> (table, entity key column)
+ASSIGNEE_TABLES = {
+    'todo': ('BasecampTodoAssignees',     'todo_id'),
+    'card': ('BasecampCardAssignees',     'card_id'),
+    'step': ('BasecampCardStepAssignees', 'step_id'),
+}
+
+# staging layouts for sync_assignees (table types: sql/002_bulk_load_types.sql)
+ASSIGNEE_IDS = BulkSchema(
+    columns=(('entity_id', 'BIGINT NOT NULL'),),
+    table_type='dbo.BasecampIdRows',
+)
+ASSIGNEE_PAIRS = BulkSchema(
+    columns=(('entity_id', 'BIGINT NOT NULL'), ('assignee_id', 'BIGINT NOT NULL')),
+    table_type='dbo.BasecampIdPairRows',
+)
+
+@dataclass(frozen=True)
+class AssigneeDiff:
+    inserted: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+def sync_assignees(
+    kind: str,
+    assignees: Dict[int, Iterable[int]],
+    section_name: str = "SMS",
+    batch_size: int = 5000
+) -> AssigneeDiff:
+    """
+    Make the assignee rows of every entity in `assignees` ({entity_id:
+    [assignee_id, ...]}) match exactly, with one set-based diff: pairs that
+    are no longer wanted are deleted, new pairs inserted, the rest untouched.
+    An entity mapped to an empty list loses all its assignees; entities not
+    in the dict are left alone.
+
+    The desired pairs are staged in temp tables with bulk_load(), so there
+    is no IN (...) list and no limit on how many ids one call can cover.
+    The counts are returned and recorded to the active metrics collectors,
+    which is how queued card / step writes reach the sync's telemetry.
+    """
+    table, key = ASSIGNEE_TABLES[kind]
+    if not assignees:
+        return AssigneeDiff()
+
+    entity_ids = [(eid,) for eid in assignees]
+    pairs = sorted({(eid, aid) for eid, aids in assignees.items() for aid in aids})
+
+    with unit_of_work(section_name) as uow:
+        cursor = uow.connection.cursor()
+        cursor.execute(ASSIGNEE_IDS.create_table('#tmp_assignee_ids'))
+        cursor.execute(ASSIGNEE_PAIRS.create_table('#tmp_assignee_pairs'))
+        bulk_load('#tmp_assignee_ids', entity_ids, ASSIGNEE_IDS,
+                  section_name=section_name, batch_size=batch_size)
+        bulk_load('#tmp_assignee_pairs', pairs, ASSIGNEE_PAIRS,
+                  section_name=section_name, batch_size=batch_size)
+
+        cursor.execute(f"""
+        DELETE FROM {table}
+         WHERE {key} IN (SELECT entity_id FROM #tmp_assignee_ids)
+           AND NOT EXISTS (SELECT 1 FROM #tmp_assignee_pairs s
+                            WHERE s.entity_id = {table}.{key}
+                              AND s.assignee_id = {table}.assignee_id);
+        """)
+        deleted = max(cursor.rowcount, 0)
+
+        cursor.execute(f"""
+        INSERT INTO {table} ({key}, assignee_id)
+        SELECT s.entity_id, s.assignee_id
+          FROM #tmp_assignee_pairs s
+         WHERE NOT EXISTS (SELECT 1 FROM {table} a
+                            WHERE a.{key} = s.entity_id
+                              AND a.assignee_id = s.assignee_id);
+        """)
+        inserted = max(cursor.rowcount, 0)
+        record_rows_written(inserted=inserted, deleted=deleted, unchanged=len(pairs) - inserted)
+
+        cursor.execute("DROP TABLE #tmp_assignee_ids; DROP TABLE #tmp_assignee_pairs;")
+        cursor.close()
+
+    return AssigneeDiff(inserted, deleted, len(pairs) - inserted)
 
 # -- ORCHESTRATOR --------------------------------------------------------------
 def sync_basecamp_cache_with_yield(token: str):
+    """
+    Sync the Basecamp cache tables, yielding progress messages (see
+    events.classify).  Its per-phase telemetry is saved when it ends,
+    however it ends.
+    """
+    telemetry = SyncTelemetry()
+    status = 'failed'
+    try:
+        yield from _sync_basecamp_cache(token, telemetry)
+        status = 'ok'
+    except GeneratorExit:
+        status = 'cancelled'
+        raise
+    finally:
+        telemetry.save(status)
+
+def _sync_basecamp_cache(token, telemetry: SyncTelemetry):
+    # 0) People directory (ETag-validated, at most every PEOPLE_SYNC_INTERVAL)
+    with telemetry.phase('people'):
+        updated = sync_people(token)
+    if updated:
+        yield f"People directory: {updated} updated"
+        yield f"COUNTS:people={updated}"
+
     # 1) Detect stale projects without writing:
-    api_projects, stale_projects = get_stale_projects(token)
+    started = datetime.utcnow()
+    with telemetry.phase('projects'):
+        api_projects, stale_projects = get_stale_projects(token)
     total_steps = len(stale_projects) * 2
     yield f"PROGRESS_TOTAL:{total_steps}"
+    yield f"COUNTS:projects={len(stale_projects)}"
 
-    # 2) Loop per project
-    for proj, proj_since in stale_projects:
-        name = proj.get('name', proj.get('id'))
-        yield f"Syncing project '{name}'"
+    # 2) Walk the projects on the fetch stage; their writes run on the write stage
+    if stale_projects:
+        pipe = SyncPipeline(fetchers=SYNC_FETCHERS, write_queue=SYNC_WRITE_QUEUE)
+        yield from pipe.run(partial(_sync_project, token, proj, proj_since, telemetry)
+                            for proj, proj_since in stale_projects)
+        yield f"Pipeline: {pipe.stats()}"
 
-        # cards
-        yield "  Syncing cards hierarchy..."
-        sync_cards_hierarchy(token, proj, proj_since)
-        yield "PROGRESS_STEP:1"
+    # 3) Every project made it, so nothing older than `started` needs another look
+    set_last_sync('projects', started)
 
-        # todos
-        yield "  Syncing todos hierarchy..."
-        sync_todos_hierarchy(token, proj, proj_since)
-        yield "PROGRESS_STEP:1"
+    # 4) Finally, one last message
+    yield "All done!"
 
-        # 3) Now that this project's children are done,
-        _upsert_projects([proj])  # reuse your helper, passing a single-item list
+def _sync_project(token, proj, proj_since, telemetry: SyncTelemetry):
+    """
+    One fetch-stage job: sync a stale project's cards and todos.  All of
+    the project's writes commit in one transaction, so a failure part-way
+    leaves it stale rather than half-written.
+    """
+    name = proj.get('name', proj.get('id'))
+    emit(f"Syncing project '{name}'")
 
-        # 4) And stamp its sync state. 
-        set_last_sync('projects')
+    with transaction('SMS'):
+        # cards
+        with telemetry.phase('cards', proj):
+            emit("  Syncing cards hierarchy...")
+            sync_cards_hierarchy(token, proj, proj_since)
+            _write(emit, "PROGRESS_STEP:1")   # as the cards' writes are applied
 
-        yield f"Project '{name}' updated."
+        # todos
+        with telemetry.phase('todos', proj):
+            emit("  Syncing todos hierarchy...")
+            sync_todos_hierarchy(token, proj, proj_since)
+            _write(emit, "PROGRESS_STEP:1")
 
-    # 5) Finally, one last message
-    yield "All done!"
+            # Now that this project's children are done, store the project
+            # itself (counted with its todos)
+            _write(_upsert_projects, [proj])
+
+    _write(emit, f"Project '{name}' updated.")
 
 # -- PROJECTS ------------------------------------------------------------------
 def get_stale_projects(token):
@@ -294,19 +627,18 @@ def get_stale_projects(token):
     and return a list of (project_obj, updated_since_iso)
     without writing anything to the DB yet.
     """
-    last  = get_last_sync('projects')
-    since = to_iso(last) if last else None
+    since = _watermark('projects')
     api_projects = _get_all_pages('projects.json', token, updated_since=since)
 
     # detect which ones actually changed
     rows   = execute_query("SELECT project_id, updated_at FROM BasecampProjects")
-    db_map = {r['project_id']: to_dt(r['updated_at']) for r in rows}
+    db_map = epoch_map(rows, 'project_id')
+    changed = changed_keys({p['id']: p['updated_at'] for p in api_projects}, db_map)
     stale = []
     for p in api_projects:
         pid = p['id']
-        upd = to_dt(p['updated_at'])
-        if not datetimes_match(db_map.get(pid), upd):
-            stale.append((p, to_iso(upd)))
+        if pid in changed:
+            stale.append((p, _since(db_map.get(pid))))
 
         #new project, so add it to the DB so todos/cards can be added
         if p['id'] not in db_map:
@@ -324,18 +656,20 @@ def sync_projects(token):
 
 def _upsert_projects(api_projects):
     db = execute_query("SELECT project_id, updated_at FROM BasecampProjects")
-    db_map = {r['project_id']: to_dt(r['updated_at']) for r in db}
+    db_map = epoch_map(db, 'project_id')
+    changed = changed_keys({p['id']: p['updated_at'] for p in api_projects}, db_map)
 
     rows, stale = [], []
     for p in api_projects:
         pid  = p['id']
-        upd  = to_dt(p['updated_at'])
-        if not datetimes_match(db_map.get(pid), upd):
+        if pid in changed:
+            upd  = to_dt(p['updated_at'])
             rows.append((pid, p['name'], upd, pid, pid, p['name'], upd))
-            stale.append((p, to_iso(upd)))
+            stale.append((p, _since(db_map.get(pid))))
 
     if rows:
-        execute_many("""
+        _count_upserts((row[0] for row in rows), db_map)
+        _write(execute_many, """
             IF EXISTS (SELECT 1 FROM BasecampProjects WHERE project_id=?)
                 UPDATE BasecampProjects
                    SET name=?, updated_at=?
@@ -343,7 +677,7 @@ def _upsert_projects(api_projects):
             ELSE
                 INSERT INTO BasecampProjects(project_id,name,updated_at)
                 VALUES(?,?,?);
-        """, rows)
+        """, rows, retry=TRANSIENT_RETRY)
 
     return stale
 
@@ -361,38 +695,7 @@ def sync_todos_hierarchy(token, proj, proj_since):
                 # 3) combine and sync todos on all of them
                 for tl, tl_since in (stale_lists + nested):
                     sync_todos(token, tl, tl_since)
-    set_last_sync('todos')
-
-def sync_todo_completions(token, proj):
-    """
-    For each stale project, fetch only new Todo recordings
-    ('todo_completed' or 'todo_uncomplete') and update
-    the completed flag in BasecampTodos.
-    """
-    project_id = proj['id']
-    resource   = f"todo_recordings_{project_id}"
-
-    # 1) read last sync time for this project's recordings
-    last = get_last_sync(resource)
-    since = to_iso(last) if last else None
-
-    # 2) hit the recordings feed (bucket == project)
-    path = f"projects/recordings.json?type=Todo&bucket={project_id}"
-    recs = _get_all_pages(path, token, updated_since=since)
-
-    # 3) process each recording
-    for r in recs:
-        if r['completed']:
-            tid    = r.get('id')
-            when   = to_dt(r.get('completion').get('created_at'))
-            
-            execute_query(
-                "UPDATE BasecampTodos SET completed = 1, updated_at = ? WHERE todo_id = ?",
-                params=[when, tid]
-            )
-
-    # 4) record that we've processed up through the latest recording
-    set_last_sync(resource)
+    _write(set_last_sync, 'todos')
 
 def sync_nested_todolists(token, parent_lists):
     """
@@ -401,7 +704,7 @@ def sync_nested_todolists(token, parent_lists):
     a list of (nested_list_obj, nested_since_iso).
     """
     db   = execute_query("SELECT todolist_id, updated_at FROM BasecampTodoLists")
-    dbm  = {r['todolist_id']: to_dt(r['updated_at']) for r in db}
+    dbm  = epoch_map(db, 'todolist_id')
     stale = []
 
     for tl, tl_since in parent_lists:
@@ -410,14 +713,16 @@ def sync_nested_todolists(token, parent_lists):
             continue
 
         nested = _get_all_pages(url, token, updated_since=tl_since)
+        changed = changed_keys({nl['id']: nl['updated_at'] for nl in nested}, dbm)
         for nl in nested:
             nid    = nl['id']
-            upd    = to_dt(nl['updated_at'])
             parent = nl['parent']['id']
 
-            if not datetimes_match(dbm.get(nid), upd):
+            if nid in changed:
+                upd = to_dt(nl['updated_at'])
                 # upsert the nested list, setting parent_list_id
-                execute_many(
+                _count_upserts([nid], dbm)
+                _write(execute_many,
                     """
                     IF EXISTS (SELECT 1 FROM BasecampTodoLists WHERE todolist_id=?)
                       UPDATE BasecampTodoLists
@@ -430,7 +735,7 @@ def sync_nested_todolists(token, parent_lists):
                     """,
                    [(nid, nl['title'], upd, parent, nid, nid, nl['title'], upd, parent)]
                 )
-                stale.append((nl, to_iso(upd)))
+                stale.append((nl, _since(dbm.get(nid))))
 
     return stale
 
@@ -455,19 +760,21 @@ def sync_todosets(token, proj, proj_since):
 
 def _upsert_todosets(api_sets):
     db   = execute_query("SELECT todoset_id, updated_at FROM BasecampTodosets")
-    dbm  = {r['todoset_id']: to_dt(r['updated_at']) for r in db}
+    dbm  = epoch_map(db, 'todoset_id')
+    changed = changed_keys({ts['id']: ts['updated_at'] for ts in api_sets}, dbm)
     rows, stale = [], []
 
     for ts in api_sets:
         tsid, bucket = ts['id'], ts['bucket']['id']
-        upd = to_dt(ts['updated_at'])
-        if not datetimes_match(dbm.get(tsid), upd):
+        if tsid in changed:
+            upd = to_dt(ts['updated_at'])
             rows.append((tsid, bucket, ts['title'], upd, tsid,
                          tsid, bucket, ts['title'], upd))
-            stale.append((ts, to_iso(upd)))
+            stale.append((ts, _since(dbm.get(tsid))))
 
     if rows:
-        execute_many("""
+        _count_upserts((row[0] for row in rows), dbm)
+        _write(execute_many, """
             IF EXISTS (SELECT 1 FROM BasecampTodosets WHERE todoset_id=?)
               UPDATE BasecampTodosets
                  SET project_id=?, title=?, updated_at=?
@@ -489,20 +796,22 @@ def sync_todolists(token, ts, ts_since):
 
 def _upsert_todolists(api_lists):
     db   = execute_query("SELECT todolist_id, updated_at FROM BasecampTodoLists")
-    dbm  = {r['todolist_id']: to_dt(r['updated_at']) for r in db}
+    dbm  = epoch_map(db, 'todolist_id')
+    changed = changed_keys({tl['id']: tl['updated_at'] for tl in api_lists}, dbm)
     rows, stale = [], []
 
     for tl in api_lists:
         tlid = tl['id']
-        upd  = to_dt(tl['updated_at'])
         parent_id = tl['parent']['id']
-        if not datetimes_match(dbm.get(tlid), upd):
+        if tlid in changed:
+            upd  = to_dt(tl['updated_at'])
             rows.append((tlid, tl['title'], upd, parent_id, tlid,
                          tlid, tl['title'], upd, parent_id))
-            stale.append((tl, to_iso(upd)))
+            stale.append((tl, _since(dbm.get(tlid))))
 
     if rows:
-        execute_many("""
+        _count_upserts((row[0] for row in rows), dbm)
+        _write(execute_many, """
             IF EXISTS (SELECT 1 FROM BasecampTodoLists WHERE todolist_id=?)
               UPDATE BasecampTodoLists
                  SET title=?, updated_at=?, todoset_id=?, parent_list_id = null
@@ -516,30 +825,33 @@ def _upsert_todolists(api_lists):
 
 def sync_todos(token, tl, _tl_since):
     """
-    Sync *all* todos (active + completed) for this list, incrementally
-    based on the last time *this* list was synced.
+    Sync the todos (active + completed) of this list changed since the
+    list's own watermark.  Completing or un-completing a todo bumps its
+    updated_at, so both feeds only return recent activity; the full
+    completed history is read once, on a list's first sync.
     """
     list_id = tl['id']
     resource = f"todos_{list_id}"
 
-    # 1) read last sync for this list
-    last = get_last_sync(resource)
-    since = to_iso(last) if last else None
+    # 1) read this list's watermark; stamp the new one from *before* the fetch
+    since = _watermark(resource)
+    started = datetime.utcnow()
 
-    # 2) fetch everything (completed + active) changed since then
+    # 2) active todos changed since then
     url = f"{tl['todos_url']}?status=all"
     api = _get_all_pages(url, token, updated_since=since)
 
-    # 3) upsert and assignments
-    bulk_merge_todos(api)
-
-    # 4) handle completed todos
+    # 3) completed (or newly completed) todos changed since then
     url = f"{tl['todos_url']}?completed=true"
-    api = _get_all_pages(url, token)
-    bulk_merge_todos(api)
+    api += _get_all_pages(url, token, updated_since=since)
 
-    # 4) record this sync time
-    set_last_sync(resource)
+    # 4) upsert and assignments
+    if api:
+        _write(bulk_merge_todos, api)
+        emit(f"COUNTS:todos={len(api)}")
+
+    # 5) record the watermark (after the merge, on the write stage)
+    _write(set_last_sync, resource, started)
 
 # -- CARDS HIERARCHY ----------------------------------------------------------
 def sync_cards_hierarchy(token, proj, proj_since):
@@ -548,9 +860,11 @@ def sync_cards_hierarchy(token, proj, proj_since):
         stale_cols = sync_cardcolumns(token, ct, ct_since)
         for col, col_since in stale_cols:
             stale_cards = sync_cards(token, col, col_since)
-            sync_cardsteps(token, stale_cards)
+            stale_steps = sync_cardsteps(token, stale_cards)
+            if stale_cards:
+                emit(f"COUNTS:cards={len(stale_cards)},steps={len(stale_steps)}")
 
-    set_last_sync('cards')
+    _write(set_last_sync, 'cards')
 
 def sync_cardtables(token, proj, proj_since):
     url = next((m['url'] for m in proj.get('dock', [])
@@ -563,20 +877,22 @@ def sync_cardtables(token, proj, proj_since):
 
 def _upsert_cardtables(api_tables):
     db   = execute_query("SELECT cardtable_id, updated_at FROM BasecampCardTables")
-    dbm  = {r['cardtable_id']: to_dt(r['updated_at']) for r in db}
+    dbm  = epoch_map(db, 'cardtable_id')
+    changed = changed_keys({t['id']: t['updated_at'] for t in api_tables}, dbm)
     rows, stale = [], []
 
     for t in api_tables:
         tid    = t['id']
-        upd    = to_dt(t['updated_at'])
         bucket = t['bucket']['id']
-        if not datetimes_match(dbm.get(tid), upd):
+        if tid in changed:
+            upd    = to_dt(t['updated_at'])
             rows.append((tid, bucket, t['title'], upd, tid,
                          tid, bucket, t['title'], upd))
             stale.append((t, to_iso(upd)))
 
     if rows:
-        execute_many("""
+        _count_upserts((row[0] for row in rows), dbm)
+        _write(execute_many, """
             IF EXISTS (SELECT 1 FROM BasecampCardTables WHERE cardtable_id=?)
               UPDATE BasecampCardTables
                  SET project_id=?, title=?, updated_at=?
@@ -590,7 +906,7 @@ def _upsert_cardtables(api_tables):
 
 def sync_cardcolumns(token, ct, ct_since):
     db   = execute_query("SELECT cardcolumn_id, updated_at FROM BasecampCardColumns")
-    dbm  = {r['cardcolumn_id']: to_dt(r['updated_at']) for r in db}
+    dbm  = epoch_map(db, 'cardcolumn_id')
     stale = []
 
     # ct['lists'] is the array of column metadata (each has id, updated_at, url...)
@@ -607,12 +923,14 @@ def sync_cardcolumns(token, ct, ct_since):
         api_cols = _get_all_pages(url, token, updated_since=col_since)
 
         # Upsert them and collect which ones were stale
+        changed = changed_keys({c['id']: c['updated_at'] for c in api_cols}, dbm)
         for c in api_cols:
             cid   = c['id']
-            upd   = to_dt(c['updated_at'])
-            if not datetimes_match(dbm.get(cid), upd):
+            if cid in changed:
+                upd   = to_dt(c['updated_at'])
+                _count_upserts([cid], dbm)
                 # this column is stale�upsert it
-                execute_many(
+                _write(execute_many,
                     """
                     IF EXISTS (SELECT 1 FROM BasecampCardColumns WHERE cardcolumn_id=?)
                       UPDATE BasecampCardColumns
@@ -633,20 +951,22 @@ def sync_cardcolumns(token, ct, ct_since):
 
 def _upsert_cardcolumns(api_cols):
     db   = execute_query("SELECT cardcolumn_id, updated_at FROM BasecampCardColumns")
-    dbm  = {r['cardcolumn_id']: to_dt(r['updated_at']) for r in db}
+    dbm  = epoch_map(db, 'cardcolumn_id')
+    changed = changed_keys({c['id']: c['updated_at'] for c in api_cols}, dbm)
     rows, stale = [], []
 
     for c in api_cols:
         cid    = c['id']
-        upd    = to_dt(c['updated_at'])
         parent = c['parent']['id']
-        if not datetimes_match(dbm.get(cid), upd):
+        if cid in changed:
+            upd    = to_dt(c['updated_at'])
             rows.append((cid, parent, c['title'], upd, cid,
                          cid, parent, c['title'], upd))
             stale.append((c, to_iso(upd)))
 
     if rows:
-        execute_many("""
+        _count_upserts((row[0] for row in rows), dbm)
+        _write(execute_many, """
             IF EXISTS (SELECT 1 FROM BasecampCardColumns WHERE cardcolumn_id=?)
               UPDATE BasecampCardColumns
                  SET cardtable_id=?, title=?, updated_at=?
@@ -672,21 +992,22 @@ def sync_cards(token, col, col_since):
 
     # 2) Load existing state
     db   = execute_query("SELECT card_id, updated_at, completed FROM BasecampCards")
-    db_map = {r['card_id']: (to_dt(r['updated_at']), bool(r['completed'])) for r in db}
+    db_map = epoch_map(db, 'card_id')
+    db_completed = {r['card_id']: bool(r['completed']) for r in db}
+    changed = changed_keys({c['id']: c['updated_at'] for c in api_cards}, db_map)
 
     upsert_rows = []  # 1+5+1+6 = 13 params
     stale       = []
 
     for c in api_cards:
         cid      = c['id']
-        upd_dt   = to_dt(c['updated_at'])
-        parent   = c['parent']['id']
-        due_on   = to_dt(c.get('due_on'))
-        appurl   = c.get('app_url')
         completed = c.get('completed', False)
 
-        old = db_map.get(cid, (None, None))
-        if not datetimes_match(old[0], upd_dt) or old[1] != completed:
+        if cid in changed or db_completed.get(cid) != completed:
+            upd_dt   = to_dt(c['updated_at'])
+            parent   = c['parent']['id']
+            due_on   = to_dt(c.get('due_on'))
+            appurl   = c.get('app_url')
             # build param tuple:
             # 1) IF EXISTS WHERE card_id=?       -> cid
             # 2-6) UPDATE SET ...                  -> parent, title, updated_at, due_on, app_url, completed
@@ -702,7 +1023,8 @@ def sync_cards(token, col, col_since):
 
     # 3) Bulk upsert BasecampCards
     if upsert_rows:
-        execute_many(
+        _count_upserts((row[0] for row in upsert_rows), db_map)
+        _write(execute_many,
             """
             IF EXISTS (SELECT 1 FROM BasecampCards WHERE card_id=?)
               UPDATE BasecampCards
@@ -716,28 +1038,10 @@ def sync_cards(token, col, col_since):
             upsert_rows
         )
 
-    # 4) Refresh CardAssignees for stale cards
+    # 4) Diff CardAssignees for stale cards
     if stale:
-        ids = [c['id'] for c, _ in stale]
-        ph  = ','.join('?' for _ in ids)
-
-        # delete old assignments
-        execute_query(
-            f"DELETE FROM BasecampCardAssignees WHERE card_id IN ({ph})",
-            params=ids
-        )
-
-        # insert fresh
-        assign_rows = []
-        for c, _ in stale:
-            for a in c.get('assignees', []):
-                assign_rows.append((c['id'], a['id']))
-
-        if assign_rows:
-            execute_many(
-                "INSERT INTO BasecampCardAssignees (card_id, assignee_id) VALUES (?, ?)",
-                assign_rows
-            )
+        _write(sync_assignees, 'card', {c['id']: [a['id'] for a in c.get('assignees', [])]
+                                for c, _ in stale})
 
     return stale
 
@@ -748,6 +1052,12 @@ def sync_cardsteps(token, stale_cards):
     and return [(step_obj, since_iso), ...] for downstream processing.
     """
     all_stale_steps = []
+    if not stale_cards:
+        return all_stale_steps
+
+    # existing steps, read once for the whole batch of cards
+    db   = execute_query("SELECT step_id, updated_at FROM BasecampCardStep")
+    dbm  = epoch_map(db, 'step_id')
 
     for card, card_since in stale_cards:
         card_id = card['id']
@@ -763,23 +1073,22 @@ def sync_cardsteps(token, stale_cards):
         if not steps:
             continue
 
-        # 2) load existing steps
-        db   = execute_query("SELECT step_id, updated_at FROM BasecampCardStep")
-        dbm  = {r['step_id']: to_dt(r['updated_at']) for r in db}
+        # 2) detect staleness against the snapshot
+        changed = changed_keys({s['id']: s['updated_at'] for s in steps}, dbm)
 
         upsert_rows = []  # 13 params per UPSERT
-        ass_rows    = []
+        step_assignees = {}
 
         for s in steps:
             sid      = s['id']
-            upd_dt   = to_dt(s['updated_at'])
-            parent   = card_id
-            due_on   = to_dt(s.get('due_on'))
-            appurl   = s.get('app_url')
             completed = s.get('completed', False)
 
-            # 3) detect staleness
-            if not datetimes_match(dbm.get(sid), upd_dt):
+            # 3) upsert changed steps
+            if sid in changed:
+                upd_dt   = to_dt(s['updated_at'])
+                parent   = card_id
+                due_on   = to_dt(s.get('due_on'))
+                appurl   = s.get('app_url')
                 # (1) WHERE?, (2-6)SET..., (7)WHERE?, (8-13)VALUES...
                 upsert_rows.append((
                     sid,
@@ -789,14 +1098,14 @@ def sync_cardsteps(token, stale_cards):
                 ))
                 all_stale_steps.append((s, to_iso(upd_dt)))
 
-            # 4) rebuild assignees (only for non-completed steps)
+            # 4) desired assignees (only for non-completed steps)
             if not completed:
-                for a in s.get('assignees', []):
-                    ass_rows.append((sid, a['id']))
+                step_assignees[sid] = [a['id'] for a in s.get('assignees', [])]
 
         # 5) bulk-upsert the steps
         if upsert_rows:
-            execute_many(
+            _count_upserts((row[0] for row in upsert_rows), dbm)
+            _write(execute_many,
                 """
                 IF EXISTS (SELECT 1 FROM BasecampCardStep WHERE step_id=?)
                   UPDATE BasecampCardStep
@@ -810,101 +1119,78 @@ def sync_cardsteps(token, stale_cards):
                 upsert_rows
             )
 
-        # 6) refresh assignees
-        if ass_rows:
-            step_ids = sorted({sid for sid, _ in ass_rows})
-            ph = ','.join('?' for _ in step_ids)
-            execute_query(
-                f"DELETE FROM BasecampCardStepAssignees WHERE step_id IN ({ph})",
-                params=step_ids
-            )
-            execute_many(
-                "INSERT INTO BasecampCardStepAssignees(step_id,assignee_id) VALUES(?,?)",
-                ass_rows
-            )
+        # 6) diff assignees
+        _write(sync_assignees, 'step', step_assignees)
 
     return all_stale_steps
 
+# staging layout for bulk_merge_todos (table type: sql/002_bulk_load_types.sql)
+TODO_STAGING = BulkSchema(
+    columns=(
+        ('todo_id',     'BIGINT'),
+        ('todolist_id', 'BIGINT NULL'),
+        ('content',     'NVARCHAR(4000) NULL'),
+        ('app_url',     'NVARCHAR(4000) NULL'),
+        ('due_on',      'DATETIME2 NULL'),
+        ('completed',   'BIT NULL'),
+        ('updated_at',  'DATETIME2 NULL'),
+    ),
+    table_type='dbo.BasecampTodoRows',
+)
+
 def bulk_merge_todos(
     api_todos: List[Tuple[int, int, str, Optional[str], datetime, bool, datetime]],
     section_name: str = "SMS",
     batch_size: int = 5000
-) -> None:
+) -> AssigneeDiff:
     """
-    Upsert a list of BasecampTodos in one shot via a temp table + single MERGE.
+    Upsert a list of BasecampTodos in one shot via a temp table + single MERGE,
+    then diff their assignees.  Returns the assignee diff counts.
     todos_data must be tuples of
       (todo_id, todoset_id, content, app_url, due_on, completed, updated_at)
     """
-    # 0) Extract todo data from api results
-    db_todos = execute_query(f"SELECT todo_id, updated_at FROM BasecampTodos")
-    db_todos_map = {row['todo_id']: to_dt(row['updated_at']) for row in db_todos}
+    # 0) Extract todo data from api results, diffing only against the
+    #    lists they belong to rather than the whole table
+    list_ids = sorted({t['parent']['id'] for t in api_todos})
+    db_todos_map: Dict[int, Optional[int]] = {}
+    for i in range(0, len(list_ids), MAX_IN_PARAMS):
+        chunk = list_ids[i : i + MAX_IN_PARAMS]
+        rows = execute_query(
+            f"SELECT todo_id, updated_at FROM BasecampTodos WHERE todolist_id IN ({','.join('?' for _ in chunk)})",
+            params=chunk
+        )
+        db_todos_map.update(epoch_map(rows, 'todo_id'))
+    changed = changed_keys({t.get('id'): t.get('updated_at') for t in api_todos}, db_todos_map)
 
-    to_upsert = []
+    # keyed by id: a todo listed twice (status=all + completed) keeps its last copy
+    to_upsert = {}
     for todo in api_todos:
         todo_id = todo.get('id')
+        if todo_id not in changed:
+            continue
         todo_list_id = todo.get('parent').get('id')
         content = todo.get('content')
         upd = to_dt(todo.get('updated_at'))
         due_on = to_dt(todo.get('due_on'))
         comp = todo.get('completed')
         app_url = todo.get('app_url')
+        to_upsert[todo_id] = (todo_id, todo_list_id, content, app_url, due_on, comp, upd)
+    _count_upserts(to_upsert, db_todos_map)
 
-        if not datetimes_match(db_todos_map.get(todo_id), upd):
-            to_upsert.append((todo_id, todo_list_id, content, app_url, due_on, comp, upd))
+    # 1) one connection & cursor (temp tables live per-connection), in the
+    #    caller's unit of work if there is one, else committed at the end
+    with unit_of_work(section_name) as uow:
+        cursor = uow.connection.cursor()
 
-    # 1) open one connection & cursor (temp tables live per-connection)
-    conn = get_connection(section_name)
-    cursor = conn.cursor()
-    cursor.fast_executemany = True
-
-    input_sizes = [
-            (p.SQL_BIGINT,         0,   0),  
-            (p.SQL_BIGINT,         0,   0),  
-            (p.SQL_WLONGVARCHAR,  4000,  0),  
-            (p.SQL_WLONGVARCHAR,  4000,  0), 
-            (p.SQL_TYPE_TIMESTAMP, 27,   6),  
-            (p.SQL_BIT,             0,   0),  
-            (p.SQL_TYPE_TIMESTAMP, 27,   6),  
-        ]
-
-    cursor.setinputsizes(input_sizes)
-
-    try:
         # 2) create staging table
-        cursor.execute("""
-        CREATE TABLE #tmp_todos (
-            id int identity,
-            todo_id     BIGINT       ,
-            todolist_id  BIGINT       NULL,
-            content     NVARCHAR(4000) NULL,
-            app_url     NVARCHAR(4000) NULL,
-            due_on      DATETIME2    NULL,
-            completed   BIT          NULL,
-            updated_at  DATETIME2    NULL
-        );
-        """)
+        cursor.execute(TODO_STAGING.create_table('#tmp_todos'))
 
-        # 3) bulk-insert into staging
-        insert_sql = """
-        INSERT INTO #tmp_todos
-          (todo_id, todolist_id, content, app_url, due_on, completed, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?);
-        """
-        for i in range(0, len(to_upsert), batch_size):
-            batch = to_upsert[i : i + batch_size]
-            cursor.executemany(insert_sql, batch)
+        # 3) bulk-load into staging
+        bulk_load('#tmp_todos', to_upsert.values(), TODO_STAGING,
+                  section_name=section_name, batch_size=batch_size)
 
         # 4) single MERGE from staging into real table
         merge_sql = """
-        delete t
-        from #tmp_todos t
-        inner join (
-            select todo_id, dense_rank() over (partition by todo_id order by id desc) as rnk
-            from #tmp_todos
-        ) dupes
-            on t.todo_id = dupes.todo_id
-            and dupes.rnk > 1;
-
         MERGE BasecampTodos AS target
         USING #tmp_todos AS src
           ON target.todo_id = src.todo_id
@@ -922,37 +1208,14 @@ def bulk_merge_todos(
         """
         cursor.execute(merge_sql)
 
-        # 5) clean up and commit
+        # 5) clean up
         cursor.execute("DROP TABLE #tmp_todos;")
-        conn.commit()
-
-        # 6) wipe & re-insert assignees
-        ids = [t['id'] for t in api_todos]
-        if not ids:
-            return
-
-        # 3a) Delete old assignees
-        placeholders = ','.join('?' for _ in ids)
-        execute_query(
-            f"DELETE FROM BasecampTodoAssignees WHERE todo_id IN ({placeholders})",
-            params=ids
-        )
-
-        # 3b) Insert current assignees
-        assignee_rows = []
-        for t in api_todos:
-            for a in t.get('assignees', []):
-                assignee_rows.append((t['id'], a['id']))
-
-        if assignee_rows:
-            execute_many(
-                "INSERT INTO BasecampTodoAssignees (todo_id, assignee_id) VALUES (?, ?)",
-                assignee_rows
-            )
-
-    except p.Error:
-        conn.rollback()
-        raise
-    finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+
+        # 6) diff assignees
+        return sync_assignees(
+            'todo',
+            {t['id']: [a['id'] for a in t.get('assignees', [])] for t in api_todos},
+            section_name=section_name,
+            batch_size=batch_size
+        )
@@ -0,0 +1,185 @@
+# TSMGMT/work_status/board.py
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# -----------------------------------------------------------------------------
+# Task board model
+# -----------------------------------------------------------------------------
+#
+# The work_status pages used to loop over every status and, inside each,
+# scan the whole todo list with an inline filter, formatting dates as they
+# went.  build_board() does the grouping, overdue check, date formatting
+# and position sort in one pass, so the templates (and the board JSON
+# endpoints) only iterate ready-made columns.
+
+# (key, heading, bootstrap color), in display order
+USER_COLUMNS: Tuple[Tuple[str, str, str], ...] = (
+    ('done',         'Done',           'success'),
+    ('working_on',   'Working On',     'info'),
+    ('todays_todos', "Today's Todos",  'purple'),
+    ('started',      'Started',        'warning'),
+    ('recurring',    'Recurring',      'primary'),
+    ('not_started',  'Todos',          'secondary'),
+)
+
+ADMIN_COLUMNS: Tuple[Tuple[str, str, str], ...] = USER_COLUMNS[:3]
+
+# columns whose (light) header color needs dark text
+DARK_TEXT_COLUMNS = {'not_started'}
+
+DUE_FORMAT     = '%b %d, %Y'
+UPDATED_FORMAT = '%I:%M %p - %b %d, %Y'
+
+def _as_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.min)
+    return None
+
+@dataclass(frozen=True)
+class BoardCard:
+    """
+    One task on the board, with everything the template needs precomputed.
+    Attributes:
+        id (int): Basecamp todo / card / step id.
+        task_type (str): 'todo', 'card' or 'step'.
+        name (str): Task title.
+        project_name (str): Owning project.
+        app_url (str): Link to the task in Basecamp.
+        email (str): Assignee email (admin board).
+        status (str): Normalized status key.
+        position (int): Saved position within its column, if any.
+        due_on (datetime): Due date, if any.
+        overdue (bool): Due today or earlier.
+        due_display (str): e.g. 'Jan 05, 2025' or 'No due date'.
+        updated_display (str): e.g. '09:30 AM - Jan 05, 2025', or None.
+    """
+    id: int
+    task_type: str
+    name: str
+    project_name: str
+    app_url: Optional[str]
+    email: Optional[str]
+    status: str
+    position: Optional[int]
+    due_on: Optional[datetime]
+    overdue: bool
+    due_display: str
+    updated_display: Optional[str]
+
+    def __init__(self, todo: dict, status: str, today: datetime):
+        due_on = _as_datetime(todo.get('due_on'))
+        updated_at = _as_datetime(todo.get('updated_at'))
+
+        object.__setattr__(self, 'id', todo['id'])
+        object.__setattr__(self, 'task_type', todo.get('task_type'))
+        object.__setattr__(self, 'name', todo.get('name'))
+        object.__setattr__(self, 'project_name', todo.get('project_name'))
+        object.__setattr__(self, 'app_url', todo.get('app_url'))
+        object.__setattr__(self, 'email', todo.get('email'))
+        object.__setattr__(self, 'status', status)
+        object.__setattr__(self, 'position', todo.get('position'))
+        object.__setattr__(self, 'due_on', due_on)
+        object.__setattr__(self, 'overdue', bool(due_on and due_on <= today))
+        object.__setattr__(self, 'due_display', due_on.strftime(DUE_FORMAT) if due_on else 'No due date')
+        object.__setattr__(self, 'updated_display', updated_at.strftime(UPDATED_FORMAT) if updated_at else None)
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'task_type': self.task_type,
+            'name': self.name,
+            'project_name': self.project_name,
+            'app_url': self.app_url,
+            'email': self.email,
+            'status': self.status,
+            'position': self.position,
+            'due_on': self.due_on.date().isoformat() if self.due_on else None,
+            'overdue': self.overdue,
+            'due_display': self.due_display,
+            'updated_display': self.updated_display,
+        }
+
+@dataclass
+class BoardColumn:
+    key: str
+    heading: str
+    color: str
+    cards: List[BoardCard] = field(default_factory=list)
+
+    @property
+    def text_class(self) -> str:
+        return 'text-dark' if self.key in DARK_TEXT_COLUMNS else 'text-white'
+
+    def to_dict(self) -> dict:
+        return {
+            'key': self.key,
+            'heading': self.heading,
+            'color': self.color,
+            'text_class': self.text_class,
+            'count': len(self.cards),
+            'cards': [c.to_dict() for c in self.cards],
+        }
+
+@dataclass
+class Board:
+    today: datetime
+    columns: List[BoardColumn]
+    # email -> number of cards on the board (admin view filter)
+    emails: Dict[str, int] = field(default_factory=dict)
+
+    def column(self, key: str) -> Optional[BoardColumn]:
+        return next((c for c in self.columns if c.key == key), None)
+
+    def to_dict(self) -> dict:
+        return {
+            'today': self.today.date().isoformat(),
+            'columns': [c.to_dict() for c in self.columns],
+            'emails': self.emails,
+        }
+
+def _position_key(card: BoardCard):
+    # saved positions first, in order; unpositioned cards keep their query order
+    return (card.position is None, card.position or 0)
+
+def _email_position_key(card: BoardCard):
+    # positions are saved per user, so only compare them within one assignee
+    return (card.email or '',) + _position_key(card)
+
+def build_board(todos: Iterable[dict],
+                columns: Tuple[Tuple[str, str, str], ...] = USER_COLUMNS,
+                default_status: Optional[str] = 'not_started',
+                today: Optional[datetime] = None,
+                group_by_email: bool = False) -> Board:
+    """
+    Bucket `todos` (dicts from get_user_todos / get_all_todos) into
+    `columns` in a single pass.  A todo with no status goes to
+    `default_status`; statuses without a column (e.g. 'hidden') are left
+    off the board.  With `group_by_email` each column is ordered by
+    assignee, then position.
+    """
+    today = today or datetime.combine(date.today(), time.min)
+    board = Board(today=today, columns=[BoardColumn(k, h, c) for k, h, c in columns])
+    by_key = {col.key: col for col in board.columns}
+
+    for todo in todos:
+        status = (todo.get('status') or '').lower() or default_status
+        col = by_key.get(status)
+        if col is None:
+            continue
+        card = BoardCard(todo, status, today)
+        col.cards.append(card)
+        if card.email:
+            board.emails[card.email] = board.emails.get(card.email, 0) + 1
+
+    sort_key = _email_position_key if group_by_email else _position_key
+    for col in board.columns:
+        col.cards.sort(key=sort_key)   # stable: ties keep query order
+    board.emails = dict(sorted(board.emails.items()))
+    return board
+
+def build_admin_board(todos: Iterable[dict], today: Optional[datetime] = None) -> Board:
+    """Team board: the active columns only, grouped by assignee; unset statuses are left off."""
+    return build_board(todos, ADMIN_COLUMNS, default_status=None, today=today, group_by_email=True)
@@ -0,0 +1,328 @@
+# TSMGMT/work_status/events.py
+import json
+import re
+import secrets
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import current_app, has_app_context
+
+# -----------------------------------------------------------------------------
+# Sync event stream (protocol v2)
+# -----------------------------------------------------------------------------
+#
+# A sync runs on its own thread as a SyncRun, not inside the request that
+# asked for it.  Its progress messages are turned into typed JSON events
+# with increasing ids and kept in a replay buffer, and each /sync_stream
+# connection is just a subscriber.  When a connection drops, the browser's
+# EventSource reconnects with Last-Event-ID and picks up where it left off;
+# the sync itself never notices.  A click while a sync is running joins it
+# instead of starting a second one.
+#
+# Events (SSE `event:` field, JSON `data:`):
+#   hello      {protocol, run}            first frame on every connection (no id)
+#   progress   {current, total}           absolute, coalesced to PROGRESS_INTERVAL
+#   counts     {people, projects, ...}    running totals, coalesced the same way
+#   phase      {message, project|stage}   a project / hierarchy starting
+#   stats      {text}                     fetch/write pipeline stats
+#   log        {message}                  anything else
+#   error      {message[, code]}          terminal
+#   done       {}                         terminal
+#   heartbeat  {ts}                       every HEARTBEAT_SECONDS while idle (no id)
+#
+# Ids are "<run>:<seq>", seq counting up from 1 within a run.
+
+PROTOCOL_VERSION  = 2
+HEARTBEAT_SECONDS = 15       # idle gap before a heartbeat frame
+PROGRESS_INTERVAL = 0.5      # at most one progress/counts event per interval
+REPLAY_EVENTS     = 2000     # events kept per run for Last-Event-ID resume
+RUN_RETENTION     = 300      # seconds a finished run stays resumable
+RETRY_MS          = 3000     # client reconnect delay (SSE retry: field)
+
+# an initial comment this size gets the stream past buffering proxies
+PADDING = b":" + (b" " * 8190) + b"\n\n"
+
+TERMINAL = ('done', 'error')
+
+_PHASE = re.compile(r"^\s*Syncing (?:project '(?P<project>.*)'|(?P<stage>.+?)\.\.\.)$")
+
+@dataclass(frozen=True)
+class SyncEvent:
+    """
+    One numbered event in a run's replay buffer.
+    Attributes:
+        seq (int): Position in the run, from 1.
+        type (str): Event name (see the table above).
+        data (dict): JSON payload.
+    """
+    seq: int
+    type: str
+    data: dict
+
+    def encode(self, run_id: str) -> bytes:
+        payload = json.dumps(self.data, separators=(',', ':'))
+        return f"id: {run_id}:{self.seq}\nevent: {self.type}\ndata: {payload}\n\n".encode('utf-8')
+
+def frame(event: str, data: dict) -> bytes:
+    """An unnumbered frame (hello, heartbeat, resume errors); leaves Last-Event-ID alone."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode('utf-8')
+
+# sent (after PADDING) to a reconnect whose run is gone, so the client stops retrying
+RESUME_EXPIRED = frame('error', {'message': 'Sync is no longer available to resume.',
+                                 'code': 'resume_expired'})
+
+def classify(msg: str) -> Tuple[str, dict]:
+    """
+    Map a progress message from sync_basecamp_cache_with_yield() to
+    (event type, data).  PROGRESS_* and COUNTS: carry deltas here; SyncRun
+    folds them into running totals.
+    """
+    if msg.startswith('PROGRESS_TOTAL:'):
+        return 'progress', {'total': int(msg.split(':', 1)[1])}
+    if msg.startswith('PROGRESS_STEP:'):
+        return 'progress', {'step': int(msg.split(':', 1)[1])}
+    if msg.startswith('COUNTS:'):
+        counts = {}
+        for pair in msg.split(':', 1)[1].split(','):
+            key, _, value = pair.partition('=')
+            counts[key.strip()] = int(value)
+        return 'counts', counts
+    if msg.startswith('PIPELINE_STATS:'):
+        return 'stats', {'text': msg.split(':', 1)[1]}
+    if msg == 'All done!':
+        return 'done', {}
+
+    m = _PHASE.match(msg)
+    if m:
+        data = {'message': msg.strip()}
+        if m.group('project') is not None:
+            data['project'] = m.group('project')
+        else:
+            data['stage'] = m.group('stage')
+        return 'phase', data
+    return 'log', {'message': msg}
+
+def parse_last_event_id(value: Optional[str]) -> Tuple[Optional[str], int]:
+    """Split a Last-Event-ID of the form "<run>:<seq>"; (None, 0) if absent or malformed."""
+    run_id, _, seq = (value or '').partition(':')
+    if not run_id or not seq.isdigit():
+        return None, 0
+    return run_id, int(seq)
+
+class SyncRun:
+    """
+    One sync, running `source` (an iterator of progress messages) on a
+    background thread and publishing its events to any number of
+    subscribers.  Progress and counts are kept as running totals and
+    published at most every PROGRESS_INTERVAL, so a burst of ticks costs
+    one event; any other event flushes them first to keep the order.
+    """
+
+    def __init__(self, started_by: str = 'unknown'):
+        self.id = secrets.token_hex(6)
+        self.started_by = started_by
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.events: deque = deque(maxlen=REPLAY_EVENTS)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._progress = {'current': 0, 'total': 0}
+        self._counts: Dict[str, int] = {}
+        self._pending: Dict[str, bool] = {}
+        self._last_flush = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._listeners: List[Callable[[], None]] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    # -- producer ----------------------------------------------------------------
+    def start(self, source: Callable[[], Iterable[str]]) -> 'SyncRun':
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def run():
+            if app is None:
+                self._consume(source)
+            else:
+                with app.app_context():
+                    self._consume(source)
+
+        threading.Thread(target=run, name=f'sync-run-{self.id}', daemon=True).start()
+        return self
+
+    def _consume(self, source: Callable[[], Iterable[str]]) -> None:
+        try:
+            for msg in source():
+                self.feed(msg)
+        except Exception as exc:
+            if has_app_context():
+                current_app.logger.exception("Basecamp sync %s failed", self.id)
+            self.fail(str(exc).replace("\n", " "))
+        finally:
+            with self._cond:
+                self._flush()
+                if not self.events or self.events[-1].type not in TERMINAL:
+                    self._publish('done', {})   # subscribers always see an end
+                self.finished_at = time.time()
+                self._notify()
+
+    def feed(self, msg: str) -> None:
+        kind, data = classify(msg)
+        with self._cond:
+            if kind == 'progress':
+                if 'total' in data:
+                    self._progress['total'] = data['total']
+                self._progress['current'] += data.get('step', 0)
+                self._pending['progress'] = True
+                self._flush_due()
+            elif kind == 'counts':
+                for key, value in data.items():
+                    self._counts[key] = self._counts.get(key, 0) + value
+                self._pending['counts'] = True
+                self._flush_due()
+            else:
+                self._flush()
+                self._publish(kind, data)
+
+    def fail(self, message: str, code: Optional[str] = None) -> None:
+        data = {'message': message}
+        if code:
+            data['code'] = code
+        with self._cond:
+            self._flush()
+            self._publish('error', data)
+
+    # callers hold self._cond for the four below
+    def _publish(self, kind: str, data: dict) -> None:
+        self._seq += 1
+        self.events.append(SyncEvent(self._seq, kind, data))
+        self._notify()
+
+    def _notify(self) -> None:
+        self._cond.notify_all()
+        for listener in self._listeners:
+            listener()
+
+    def _flush(self) -> None:
+        if self._pending.pop('progress', False):
+            self._publish('progress', dict(self._progress))
+        if self._pending.pop('counts', False):
+            self._publish('counts', dict(self._counts))
+        self._last_flush = time.monotonic()
+
+    def _flush_due(self) -> None:
+        if not self._pending:
+            return
+        wait = PROGRESS_INTERVAL - (time.monotonic() - self._last_flush)
+        if wait <= 0:
+            self._flush()
+        elif self._flush_timer is None:
+            # ticks held back now still go out if the sync goes quiet
+            self._flush_timer = threading.Timer(wait, self._flush_later)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_later(self) -> None:
+        with self._cond:
+            self._flush_timer = None
+            self._flush()
+
+    # -- subscribers -------------------------------------------------------------
+    def since(self, after: int) -> List[SyncEvent]:
+        """Buffered events with seq > `after` (from the oldest kept, if some were evicted)."""
+        with self._cond:
+            if not self.events or self.events[-1].seq <= after:
+                return []
+            start = max(0, after - self.events[0].seq + 1)
+            return list(self.events)[start:]
+
+    def wait(self, after: int, timeout: float) -> List[SyncEvent]:
+        """since(after), blocking up to `timeout` for something new."""
+        with self._cond:
+            if not self.finished and (not self.events or self.events[-1].seq <= after):
+                self._cond.wait(timeout)
+        return self.since(after)
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Call `listener` (from the publishing thread, so it must be quick and
+        thread-safe) whenever an event is published or the run finishes.
+        Used by subscribers that can't block on the condition, e.g. the
+        async server's handlers.
+        """
+        with self._cond:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]) -> None:
+        with self._cond:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def done(self, after: int) -> bool:
+        """True once the run has finished and everything up to its end was delivered."""
+        with self._cond:
+            return self.finished and (not self.events or self.events[-1].seq <= after)
+
+    def opening(self) -> bytes:
+        """Padding, retry and hello frames that start every connection."""
+        return (PADDING + f"retry: {RETRY_MS}\n\n".encode('utf-8')
+                + frame('hello', {'protocol': PROTOCOL_VERSION, 'run': self.id}))
+
+    def stream(self, after: int = 0) -> Iterator[bytes]:
+        """
+        The SSE body for one subscriber: the opening frames, then every
+        event after `after`, heartbeats while idle, ending after a
+        terminal event.  Holds a thread for as long as it runs; see
+        TSMGMT/serving.py for the event-loop version.
+        """
+        yield self.opening()
+
+        last_sent = time.monotonic()
+        while not self.done(after):
+            batch = self.wait(after, HEARTBEAT_SECONDS)
+            for event in batch:
+                yield event.encode(self.id)
+                after = event.seq
+                if event.type in TERMINAL:
+                    return
+            if batch:
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+                yield frame('heartbeat', {'ts': int(time.time())})
+                last_sent = time.monotonic()
+
+# -- RUN REGISTRY --------------------------------------------------------------
+_runs: Dict[str, SyncRun] = {}
+_runs_lock = threading.Lock()
+
+def _prune() -> None:
+    cutoff = time.time() - RUN_RETENTION
+    for run_id in [r.id for r in _runs.values() if r.finished and r.finished_at < cutoff]:
+        del _runs[run_id]
+
+def get_run(run_id: str) -> Optional[SyncRun]:
+    with _runs_lock:
+        _prune()
+        return _runs.get(run_id)
+
+def active_run() -> Optional[SyncRun]:
+    with _runs_lock:
+        return next((r for r in _runs.values() if not r.finished), None)
+
+def start_run(source: Callable[[], Iterable[str]], started_by: str = 'unknown') -> Tuple[SyncRun, bool]:
+    """
+    The running sync if there is one, else a new run of `source`.
+    Returns (run, started) so the caller can log only real starts.
+    """
+    with _runs_lock:
+        _prune()
+        run = next((r for r in _runs.values() if not r.finished), None)
+        if run is not None:
+            return run, False
+        run = SyncRun(started_by)
+        _runs[run.id] = run
+    return run.start(source), True
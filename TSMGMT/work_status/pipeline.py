@@ -0,0 +1,288 @@
+# TSMGMT/work_status/pipeline.py
+import contextvars
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from flask import current_app, has_app_context
+
+from ..db.connection import TRANSIENT_RETRY, unit_of_work, with_retry
+from ..metrics.collector import active, recording_to
+
+# -----------------------------------------------------------------------------
+# Fetch / write pipeline for the Basecamp sync
+# -----------------------------------------------------------------------------
+#
+# Fetcher threads walk the Basecamp API (one project job at a time) and hand
+# every DB write to a single writer thread through a bounded queue, so HTTP
+# and SQL Server latency overlap.  When the writer falls behind the queue
+# fills and fetchers block (backpressure).  The writer applies writes in the
+# order each fetcher queued them, so a project's rows land parent-first and
+# its sync-state stamps land after its data.
+#
+# Sync code calls write()/emit() below; with no pipeline active (helpers,
+# benchmarks) they run inline.  Writes made inside transaction() are handed
+# over as one item and applied in a single unit of work, so a project's
+# rows are committed together or not at all (and a deadlock victim is
+# retried as a whole).  Each write carries the metrics collectors active
+# where it was queued, so its DB time lands in the phase that asked for it.
+
+_STOP = object()
+
+class PipelineCancelled(Exception):
+    """Raised in a fetcher when the pipeline is shutting down early."""
+
+@dataclass
+class StageStats:
+    """Busy / idle / blocked seconds summed over a stage's worker threads."""
+    name: str
+    workers: int
+    busy: float = 0.0
+    idle: float = 0.0
+    blocked: float = 0.0   # waiting on a full downstream queue
+    items: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, busy: float = 0.0, idle: float = 0.0, blocked: float = 0.0, items: int = 0) -> None:
+        with self._lock:
+            self.busy += busy
+            self.idle += idle
+            self.blocked += blocked
+            self.items += items
+
+    def summary(self) -> str:
+        text = f"{self.name} x{self.workers} busy {self.busy:.1f}s idle {self.idle:.1f}s"
+        if self.blocked:
+            text += f" blocked {self.blocked:.1f}s"
+        return f"{text} ({self.items})"
+
+_current: ContextVar[Optional['SyncPipeline']] = ContextVar('tsmgmt_sync_pipeline', default=None)
+_batch: ContextVar[Optional[List[tuple]]] = ContextVar('tsmgmt_sync_batch', default=None)
+
+def write(fn: Callable, *args, **kwargs):
+    """
+    Run a DB write on the writer stage of the active pipeline (returns None),
+    or inline when no pipeline is active or when already on the writer
+    (returns fn's result).
+    """
+    pipe = _current.get()
+    if pipe is None or pipe.on_writer():
+        return fn(*args, **kwargs)
+    batch = _batch.get()
+    if batch is not None:
+        batch.append((fn, args, kwargs, active()))
+    else:
+        pipe.put_write(fn, args, kwargs)
+
+def _apply(section_name: str, items: List[tuple]) -> None:
+    """
+    Apply one transaction() batch in a unit of work, retried whole after a
+    deadlock or lock timeout.  Its emit() calls go out once it commits, so
+    a retry doesn't repeat them.
+    """
+    messages: List[tuple] = []
+
+    def attempt():
+        messages.clear()
+        with unit_of_work(section_name):
+            for fn, args, kwargs, collectors in items:
+                if fn is emit:
+                    messages.append(args)
+                else:
+                    with recording_to(collectors):
+                        fn(*args, **kwargs)
+
+    with_retry(TRANSIENT_RETRY, attempt)
+    for args in messages:
+        emit(*args)
+
+@contextmanager
+def transaction(section_name: str = "SMS"):
+    """
+    Commit the write() calls made inside the block together.  On a fetcher
+    they are collected and queued as one writer item (nothing is queued if
+    the block raises); without a pipeline the block runs in a unit_of_work.
+    """
+    pipe = _current.get()
+    if pipe is None or pipe.on_writer():
+        with unit_of_work(section_name):
+            yield
+        return
+
+    items: List[tuple] = []
+    token = _batch.set(items)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+    pipe.put_write(_apply, (section_name, items), {})
+
+def emit(msg: str) -> None:
+    """Send a progress message to the sync stream of the active pipeline, if any."""
+    pipe = _current.get()
+    if pipe is not None:
+        pipe.events.put(msg)
+
+class SyncPipeline:
+    """
+    Run `jobs` (no-argument callables) on `fetchers` threads, with their
+    write() calls applied by one writer thread through a queue of at most
+    `write_queue` pending writes.  Iterate run() to get the progress
+    messages emitted along the way, plus a PIPELINE_STATS: line every
+    `report_every` seconds.  The first exception in any stage cancels the
+    rest and is re-raised from run().
+    """
+
+    def __init__(self, fetchers: int = 2, write_queue: int = 32, report_every: float = 2.0):
+        self.jobs: queue.Queue = queue.Queue()
+        self.writes: queue.Queue = queue.Queue(maxsize=write_queue)
+        self.events: queue.Queue = queue.Queue()
+        self.fetch = StageStats('fetch', fetchers)
+        self.writer = StageStats('write', 1)
+        self.report_every = report_every
+        self.max_depth = 0
+        self.error: Optional[BaseException] = None
+        self._cancel = threading.Event()
+        self._local = threading.local()   # per-fetcher blocked time
+        self._writer: Optional[threading.Thread] = None
+
+    def on_writer(self) -> bool:
+        return threading.current_thread() is self._writer
+
+    # -- called from fetcher threads ------------------------------------------
+    def put_write(self, fn: Callable, args: tuple, kwargs: dict) -> None:
+        started = time.perf_counter()
+        while True:
+            if self._cancel.is_set():
+                raise PipelineCancelled()
+            try:
+                self.writes.put((fn, args, kwargs, active()), timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        blocked = time.perf_counter() - started
+        self._local.blocked = getattr(self._local, 'blocked', 0.0) + blocked
+        self.fetch.add(blocked=blocked)
+        self.max_depth = max(self.max_depth, self.writes.qsize())
+
+    # -- stages ----------------------------------------------------------------
+    def _fail(self, exc: BaseException) -> None:
+        if self.error is None:
+            self.error = exc
+        self._cancel.set()
+
+    def _fetcher(self) -> None:
+        while True:
+            waited = time.perf_counter()
+            job = self.jobs.get()
+            started = time.perf_counter()
+            self.fetch.add(idle=started - waited)
+            if job is _STOP:
+                return
+            if self._cancel.is_set():
+                continue
+            self._local.blocked = 0.0
+            try:
+                job()
+            except PipelineCancelled:
+                pass
+            except Exception as exc:
+                self._fail(exc)
+            # time blocked on the write queue is counted separately
+            self.fetch.add(busy=time.perf_counter() - started - self._local.blocked, items=1)
+
+    def _write_loop(self) -> None:
+        self._writer = threading.current_thread()
+        while True:
+            waited = time.perf_counter()
+            item = self.writes.get()
+            started = time.perf_counter()
+            self.writer.add(idle=started - waited)
+            if item is _STOP:
+                return
+            if self._cancel.is_set():
+                continue   # keep draining so fetchers never block on a dead writer
+            fn, args, kwargs, collectors = item
+            try:
+                with recording_to(collectors):
+                    fn(*args, **kwargs)
+            except Exception as exc:
+                self._fail(exc)
+            self.writer.add(busy=time.perf_counter() - started, items=1)
+
+    def _thread(self, target: Callable, name: str) -> threading.Thread:
+        # carry the caller's context (metrics collectors) and app context over
+        ctx = contextvars.copy_context()
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def run():
+            _current.set(self)
+            if app is None:
+                target()
+            else:
+                with app.app_context():
+                    target()
+
+        thread = threading.Thread(target=ctx.run, args=(run,), name=name, daemon=True)
+        thread.start()
+        return thread
+
+    # -- driver ----------------------------------------------------------------
+    def stats(self) -> str:
+        return (f"{self.fetch.summary()} | {self.writer.summary()} | "
+                f"queue {self.writes.qsize()}/{self.writes.maxsize} (max {self.max_depth})")
+
+    def run(self, jobs: Iterable[Callable[[], None]]) -> Iterator[str]:
+        for job in jobs:
+            self.jobs.put(job)
+        for _ in range(self.fetch.workers):
+            self.jobs.put(_STOP)
+
+        fetchers = [self._thread(self._fetcher, f'sync-fetch-{i}') for i in range(self.fetch.workers)]
+        writer = self._thread(self._write_loop, 'sync-write')
+        stop_sent = False
+        last_report = time.monotonic()
+        try:
+            while writer.is_alive():
+                if not stop_sent and not any(t.is_alive() for t in fetchers):
+                    self._put_stop()
+                    stop_sent = True
+                try:
+                    yield self.events.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+                if time.monotonic() - last_report >= self.report_every:
+                    last_report = time.monotonic()
+                    yield f"PIPELINE_STATS:{self.stats()}"
+            yield from self._drain_events()
+        finally:
+            # also reached when the client goes away mid-sync
+            if writer.is_alive():
+                self._cancel.set()
+                for t in fetchers:
+                    t.join()
+                self._put_stop()
+                writer.join()
+
+        if self.error is not None:
+            raise self.error
+        yield f"PIPELINE_STATS:{self.stats()}"
+
+    def _put_stop(self) -> None:
+        while True:
+            try:
+                self.writes.put(_STOP, timeout=0.5)
+                return
+            except queue.Full:
+                continue   # writer is still draining
+
+    def _drain_events(self) -> Iterator[str]:
+        while True:
+            try:
+                yield self.events.get_nowait()
+            except queue.Empty:
+                return
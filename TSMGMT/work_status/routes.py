@@ -1,12 +1,19 @@
 # TSMGMT/work_status/routes.py
+from functools import partial
 from itertools import cycle
-from flask import Blueprint, render_template, session, redirect, url_for, request, current_app, flash, Response, stream_with_context
+from typing import Optional, Tuple
+from flask import Blueprint, render_template, session, redirect, url_for, request, current_app, flash, Response, jsonify, abort
 from flask_login import login_required
 from .basecamp import connect_basecamp, basecamp_callback, get_user_todos, sync_basecamp_cache_with_yield, get_all_todos
-from ..db.connection import execute_query, execute_many
+from .board import build_board, build_admin_board
+from .events import PADDING, RESUME_EXPIRED, SyncRun, get_run, parse_last_event_id, start_run
+from .telemetry import TELEMETRY_DAYS, load_dashboard
+from ..auth.decorators import admin_required, is_admin
+from ..db.connection import TRANSIENT_RETRY, execute_query, execute_many, transient_reason
 from datetime import date, datetime, time
 from ..utils import to_pst
 import os
+import json
 
 work_status_bp = Blueprint('work_status', __name__, url_prefix='/work_status')
 
@@ -18,14 +25,14 @@ def index():
     # Prompt connection if no Basecamp token
     if 'basecamp_token' not in session:
         return render_template('work_status/connect.html', user=user)
-    # Fetch todos from Basecamp
-    todos = get_user_todos(user)
+    # Fetch todos from Basecamp and bucket them into board columns
     today = datetime.combine(date.today(), time.min)
+    board = build_board(get_user_todos(user), today=today)
 
     try:
         row = execute_query("SELECT sms.dbo.UtcToPacific(MAX(clicked_at)) AS last_refreshed FROM BasecampSyncLog ")
 
-        last_refreshed = str(row[0]['last_refreshed'] if row and row[0]['last_refreshed'] else None)
+        last_refreshed = str(row[0]['last_refreshed']) if row and row[0]['last_refreshed'] else None
     except Exception:
         current_app.logger.exception("Failed to load last_refreshed")
         last_refreshed = None
@@ -34,21 +41,26 @@ def index():
     if last_refreshed:
         last_refreshed = to_pst(last_refreshed)
 
-    return render_template('work_status/index.html', todos=todos, user=user, today=today, last_refreshed=last_refreshed)
+    return render_template('work_status/index.html', board=board, user=user, today=today, last_refreshed=last_refreshed)
+
+@work_status_bp.route('/board.json')
+def board_json():
+    """The current user's board as JSON, so the page can refresh columns in place."""
+    user = session.get('user')
+    if not user:
+        return {'error': 'not authenticated'}, 401
+    if 'basecamp_token' not in session:
+        return {'error': 'Basecamp not connected'}, 409
+
+    return jsonify(build_board(get_user_todos(user)).to_dict())
 
 @work_status_bp.route('/admin_view')
 def admin_view():
     # require admin
-    user = session.get('user')
-    admin_email = os.getenv("ADMIN_EMAIL", "matt@cityspan.com")
-
-    if not user or user.get('email') != admin_email:
+    if not is_admin(session.get('user')):
         flash("You must be an admin to view this page.", "danger")
         return redirect(url_for('work_status.index'))
 
-    # fetch all todos (excluding matt)
-    todos = get_all_todos()
-
     # explicit mapping of email -> bootstrap badge color
     email_colors = json.loads(os.environ.get('EMAIL_COLORS', '{}'))
     default_email_color = 'dark'
@@ -56,14 +68,30 @@ def admin_view():
     # today at midnight for due-date comparisons
     today = datetime.combine(date.today(), time.min)
 
+    # fetch all todos (excluding matt), grouped by status and assignee
+    board = build_admin_board(get_all_todos(), today=today)
+
     return render_template(
         'work_status/admin_view.html',
-        todos=todos,
+        board=board,
         today=today,
         email_colors=email_colors,
         default_email_color=default_email_color
     )
 
+@work_status_bp.route('/admin_view/board.json')
+def admin_board_json():
+    if not is_admin(session.get('user')):
+        return {'error': 'admin only'}, 403
+    return jsonify(build_admin_board(get_all_todos()).to_dict())
+
+@work_status_bp.route('/admin/sync_stats')
+@admin_required
+def sync_stats():
+    """Admin page: sync telemetry over the last ?days=N days (trends, slowest projects, phases)."""
+    days = min(max(request.args.get('days', TELEMETRY_DAYS, type=int), 1), 365)
+    return render_template('work_status/sync_stats.html', dash=load_dashboard(days))
+
 @work_status_bp.route('/connect')
 def connect():
     return connect_basecamp()
@@ -80,48 +108,73 @@ def basecamp_logout():
     return redirect(url_for('work_status.connect'))  # or a dashboard route
 
 
-@login_required
 @work_status_bp.route('/sync_stream')
+@login_required
 def sync_stream():
-    #log the sync time
-    user = session.get('user') or {}
-    user_email = user.get('email', 'unknown')
+    """
+    Protocol v2 event stream for a Basecamp sync (see events.py).  Served
+    by this worker thread under the plain WSGI server; `runserver.py
+    --async` serves the same stream from an event loop instead.
+    """
+    opened = open_sync_run()
+    if opened is None:
+        return _event_stream([PADDING, RESUME_EXPIRED])
+    run, after = opened
+    return _event_stream(run.stream(after))
 
-    try:
-        execute_query(
-            "INSERT INTO BasecampSyncLog (user_email, clicked_at) VALUES (?, ?)",
-            params=(user_email, datetime.utcnow())
-        )
-    except Exception:
-        current_app.logger.exception("Failed to log sync click")
+def open_sync_run() -> Optional[Tuple[SyncRun, int]]:
+    """
+    The run and last-seen seq for this sync_stream request.  A reconnect
+    carrying Last-Event-ID resumes its run from the replay buffer;
+    otherwise this joins the running sync or starts one.  None if the run
+    being resumed has expired (or the app restarted).
+
+    Aborts with 401 without a signed-in session user (checked here, not
+    only by the route, because the async server calls this directly) and
+    with 409 when starting or joining a sync without a Basecamp token.
+    """
+    user = session.get('user')
+    if not user or 'email' not in user:
+        abort(401)
+
+    run_id, after = parse_last_event_id(
+        request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    if run_id is not None:
+        run = get_run(run_id)
+        return (run, after) if run is not None else None
 
+    user_email = user['email']
     token = session.get('basecamp_token')
-    def generate():
-        # send an 8KB comment to force an initial flush
-        yield b":" + (b" " * 8190) + b"\n\n"
+    if not token:
+        abort(409, description='Basecamp not connected')
+    run, started = start_run(partial(sync_basecamp_cache_with_yield, token), started_by=user_email)
 
+    #log the sync time
+    if started:
         try:
-            for msg in sync_basecamp_cache_with_yield(token):
-                yield f"data: {msg}\n\n".encode("utf-8")
-        except Exception as e:
-            # emit a special ERROR event with the exception text
-            err = str(e).replace("\n", " ")
-            yield f"data: SYNC_ERROR:{err}\n\n".encode("utf-8")
-            # make sure to close after the error
-            return
-
+            execute_query(
+                "INSERT INTO BasecampSyncLog (user_email, clicked_at) VALUES (?, ?)",
+                params=(user_email, datetime.utcnow())
+            )
+        except Exception:
+            current_app.logger.exception("Failed to log sync click")
+    return run, 0
+
+def _event_stream(body):
     headers = {
         'Cache-Control': 'no-cache',
-        'Connection':    'keep-alive'
+        'Connection':    'keep-alive',
+        'X-Accel-Buffering': 'no'
     }
-    resp = Response(
-        stream_with_context(generate()),
-        mimetype='text/event-stream',
-        headers=headers
-    )
+    # the sync runs on its own thread, so the body needs no request context
+    resp = Response(body, mimetype='text/event-stream', headers=headers)
     resp.direct_passthrough = True
     return resp
 
+def _busy():
+    """Deadlocks / lock timeouts that outlasted TRANSIENT_RETRY: worth retrying client-side, not a 500."""
+    return {'error': 'database busy, try again'}, 503, {'Retry-After': '1'}
+
 @work_status_bp.route('/update', methods=['POST'])
 @login_required
 def update_status():
@@ -142,9 +195,11 @@ def update_status():
     updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
     # 3) Upsert into BasecampTaskStatus (id, user_email, status)
+    #    UPDLOCK/HOLDLOCK: two requests for the same row queue up here instead
+    #    of both passing the check and deadlocking on the write
     sql = """
     IF EXISTS (
-      SELECT 1 FROM BasecampTaskStatus 
+      SELECT 1 FROM BasecampTaskStatus WITH (UPDLOCK, HOLDLOCK)
        WHERE id = ? AND user_email = ?
     )
       UPDATE BasecampTaskStatus
@@ -167,9 +222,11 @@ def update_status():
     ]
 
     try:
-        execute_many(sql, data=params)
-    except Exception:
+        execute_many(sql, data=params, retry=TRANSIENT_RETRY)
+    except Exception as ex:
         current_app.logger.exception("Failed to update BasecampTaskStatus")
+        if transient_reason(ex):
+            return _busy()
         return {'error': 'database error'}, 500
 
     # 4) 204 No Content so front-end knows it's done
@@ -188,7 +245,7 @@ def reorder_todos():
     # Prepare upserts: for each item, update status and position
     sql = """
     IF EXISTS (
-      SELECT 1 FROM BasecampTaskStatus
+      SELECT 1 FROM BasecampTaskStatus WITH (UPDLOCK, HOLDLOCK)
        WHERE id = ? AND user_email = ?
     )
       UPDATE BasecampTaskStatus
@@ -209,10 +266,15 @@ def reorder_todos():
         params.append((tid, user_email, st, pos, updated_at, tid, user_email,   # update
                        tid, user_email, st, pos, updated_at))      # insert
 
+    # rows in id order, so concurrent reorders take their locks in the same order
+    params.sort(key=lambda row: str(row[0]))
+
     try:
-        execute_many(sql, data=params)
-    except Exception:
+        execute_many(sql, data=params, retry=TRANSIENT_RETRY)
+    except Exception as ex:
         current_app.logger.exception("Failed to reorder todos")
+        if transient_reason(ex):
+            return _busy()
         return {'error': 'db error'}, 500
 
     return ('', 204)
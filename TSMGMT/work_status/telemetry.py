@@ -0,0 +1,214 @@
+# TSMGMT/work_status/telemetry.py
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from flask import current_app, has_app_context
+
+from ..db.connection import TRANSIENT_RETRY, execute_many, execute_query
+from ..metrics.collector import Timings, collect
+
+# -----------------------------------------------------------------------------
+# Per-sync telemetry
+# -----------------------------------------------------------------------------
+#
+# BasecampSyncLog only says who clicked Sync and when.  Every
+# sync_basecamp_cache_with_yield() run also keeps a SyncTelemetry, with one
+# record per phase (people, projects, and cards / todos for each stale
+# project) plus a 'sync' record with the run's totals.  They go to
+# BasecampSyncTelemetry (sql/004_basecamp_sync_telemetry.sql) in one batch
+# when the run ends, failed runs included.
+#
+# A phase's numbers come from a metrics collector opened around it (see
+# metrics/collector.py).  Writes it queues for the sync's writer thread
+# carry that collector along, so db_time covers them even though they are
+# applied later; wall_time is the phase's own span on its thread, i.e.
+# the fetch side for project phases.  rows_inserted / rows_updated /
+# rows_deleted are what the sync's diffs decided to write; rows_unchanged
+# counts assignee pairs the diff found already in place.
+# rows_deleted / rows_unchanged need sql/005_basecamp_sync_telemetry_diff.sql.
+#
+# load_dashboard() reads it back for /work_status/admin/sync_stats.
+
+TELEMETRY_DAYS   = 30   # default dashboard window
+SLOWEST_PROJECTS = 20   # projects listed on the dashboard
+RECENT_SYNCS     = 50   # individual runs listed on the dashboard
+
+SYNC_PHASE = 'sync'     # the per-run totals record
+
+# (column, Timings attribute) in BasecampSyncTelemetry order
+_COUNTERS = (
+    ('api_calls',       'api_calls'),
+    ('pages',           'pages'),
+    ('api_bytes',       'api_bytes'),
+    ('rate_limit_wait', 'rate_limit_wait'),
+    ('rows_read',       'rows'),
+    ('rows_inserted',   'rows_inserted'),
+    ('rows_updated',    'rows_updated'),
+    ('rows_deleted',    'rows_deleted'),
+    ('rows_unchanged',  'rows_unchanged'),
+    ('db_calls',        'db_calls'),
+    ('db_time',         'db_time'),
+)
+
+_INSERT = f"""
+    INSERT INTO BasecampSyncTelemetry
+        (sync_id, started_at, status, phase, project_id, project_name,
+         {', '.join(col for col, _ in _COUNTERS)}, wall_time)
+    VALUES ({', '.join('?' for _ in range(len(_COUNTERS) + 7))});
+"""
+
+@dataclass
+class PhaseRecord:
+    """
+    One phase of a sync, as it will be stored.
+    Attributes:
+        phase (str): 'people', 'projects', 'cards', 'todos' or SYNC_PHASE.
+        project_id (int): The project, for per-project phases.
+        project_name (str): Its name at the time.
+        timings (Timings): Work recorded while the phase ran (still growing
+            until the sync's queued writes are applied).
+        wall_time (float): Seconds the phase took on its own thread.
+    """
+    phase: str
+    project_id: Optional[int]
+    project_name: Optional[str]
+    timings: Timings
+    wall_time: float = 0.0
+
+class SyncTelemetry:
+    """Phase records for one sync run; phase() collects, save() stores them."""
+
+    def __init__(self):
+        self.sync_id = secrets.token_hex(6)
+        self.started_at = datetime.utcnow()
+        self.phases: List[PhaseRecord] = []
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()   # project phases run on several fetchers
+
+    @contextmanager
+    def phase(self, name: str, project: Optional[dict] = None) -> Iterator[Timings]:
+        """Record the work done inside the block (and the writes it queues) as phase `name`."""
+        started = time.perf_counter()
+        with collect() as timings:
+            try:
+                yield timings
+            finally:
+                record = PhaseRecord(name,
+                                     project.get('id') if project else None,
+                                     project.get('name') if project else None,
+                                     timings, time.perf_counter() - started)
+                with self._lock:
+                    self.phases.append(record)
+
+    def totals(self) -> PhaseRecord:
+        total = Timings()
+        for record in self.phases:
+            for _, attr in _COUNTERS:
+                setattr(total, attr, getattr(total, attr) + getattr(record.timings, attr))
+        return PhaseRecord(SYNC_PHASE, None, None, total, time.perf_counter() - self._started)
+
+    def rows(self, status: str) -> List[tuple]:
+        with self._lock:
+            records = self.phases + [self.totals()]
+        return [(self.sync_id, self.started_at, status, r.phase, r.project_id, r.project_name,
+                 *(getattr(r.timings, attr) for _, attr in _COUNTERS), r.wall_time)
+                for r in records]
+
+    def save(self, status: str = 'ok') -> None:
+        """Store every phase plus the totals; never raises, so it can't fail the sync."""
+        try:
+            execute_many(_INSERT, self.rows(status), retry=TRANSIENT_RETRY)
+        except Exception:
+            if has_app_context():
+                current_app.logger.exception("Failed to save telemetry for sync %s", self.sync_id)
+
+# -- DASHBOARD -----------------------------------------------------------------
+@dataclass(frozen=True)
+class SyncDashboard:
+    """
+    Telemetry for the sync stats page, over the last `days` days.
+    Attributes:
+        days (int): Window length.
+        daily (List[dict]): Per day (newest first): syncs, failed, mean and
+            max wall time, mean API calls / DB time / rate-limit wait.
+        recent (List[dict]): The last RECENT_SYNCS runs' totals, newest first.
+        slowest (List[dict]): SLOWEST_PROJECTS projects by mean wall time per
+            sync they were part of, with their mean API and DB cost.
+        phases (List[dict]): Per phase: records, total wall / DB time, API
+            calls and rate-limit wait.
+    """
+    days: int
+    daily: List[dict]
+    recent: List[dict]
+    slowest: List[dict]
+    phases: List[dict]
+
+    @property
+    def max_daily_wall(self) -> float:
+        return max((d['max_wall'] for d in self.daily), default=0.0)
+
+def load_dashboard(days: int = TELEMETRY_DAYS) -> SyncDashboard:
+    """Everything the sync stats page shows, in one round trip."""
+    since = datetime.utcnow() - timedelta(days=days)
+    results = execute_query(f"""
+        SELECT sync_id, started_at, status, wall_time, api_calls, pages, api_bytes,
+               rate_limit_wait, rows_read, rows_inserted, rows_updated, rows_deleted,
+               rows_unchanged, db_calls, db_time
+          FROM BasecampSyncTelemetry
+         WHERE phase = '{SYNC_PHASE}' AND started_at >= ?
+         ORDER BY started_at DESC;
+        SELECT project_id, MAX(project_name) AS project_name,
+               COUNT(DISTINCT sync_id) AS syncs, SUM(wall_time) AS wall_time,
+               SUM(db_time) AS db_time, SUM(api_calls) AS api_calls, SUM(pages) AS pages,
+               SUM(rate_limit_wait) AS rate_limit_wait,
+               SUM(rows_inserted + rows_updated + rows_deleted) AS rows_written
+          FROM BasecampSyncTelemetry
+         WHERE project_id IS NOT NULL AND started_at >= ?
+         GROUP BY project_id;
+        SELECT phase, COUNT(*) AS records, SUM(wall_time) AS wall_time, SUM(db_time) AS db_time,
+               SUM(api_calls) AS api_calls, SUM(rate_limit_wait) AS rate_limit_wait
+          FROM BasecampSyncTelemetry
+         WHERE phase <> '{SYNC_PHASE}' AND started_at >= ?
+         GROUP BY phase;
+    """, params=(since, since, since))
+    runs, projects, phases = results
+
+    for p in projects:
+        n = p['syncs'] or 1
+        p['mean_wall'] = (p['wall_time'] or 0) / n
+        p['mean_db'] = (p['db_time'] or 0) / n
+        p['mean_api_calls'] = (p['api_calls'] or 0) / n
+    slowest = sorted(projects, key=lambda p: p['mean_wall'], reverse=True)[:SLOWEST_PROJECTS]
+
+    return SyncDashboard(
+        days=days,
+        daily=_by_day(runs),
+        recent=runs[:RECENT_SYNCS],
+        slowest=slowest,
+        phases=sorted(phases, key=lambda p: p['wall_time'] or 0, reverse=True),
+    )
+
+def _by_day(runs: List[dict]) -> List[dict]:
+    days: Dict[date, List[dict]] = {}
+    for run in runs:
+        days.setdefault(run['started_at'].date(), []).append(run)
+
+    out = []
+    for day, day_runs in days.items():   # runs are newest first, so days are too
+        n = len(day_runs)
+        out.append({
+            'day': day,
+            'syncs': n,
+            'failed': sum(1 for r in day_runs if r['status'] != 'ok'),
+            'mean_wall': sum(r['wall_time'] for r in day_runs) / n,
+            'max_wall': max(r['wall_time'] for r in day_runs),
+            'mean_api_calls': sum(r['api_calls'] for r in day_runs) / n,
+            'mean_db': sum(r['db_time'] for r in day_runs) / n,
+            'mean_rate_limit_wait': sum(r['rate_limit_wait'] for r in day_runs) / n,
+        })
+    return out
@@ -0,0 +1,4 @@
+"""
+Offline benchmarks for TSMGMT.  Run individual modules with
+``python -m benchmarks.<name>`` from the repository root.
+"""
@@ -0,0 +1,98 @@
+"""
+Timestamp handling in the sync's staleness checks: the old per-row
+to_dt() + datetimes_match() loop against epoch_map() + changed_keys(),
+plus to_pst() before and after the cached-timezone fast path.
+
+    python -m benchmarks.bench_dates [--scale 10k] [--touch 0.05] [--repeat 5]
+
+The DB snapshot is built the way pyodbc returns it (naive UTC datetimes);
+the API side is the synthetic Basecamp payload from benchmarks/payloads.py.
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+from dateutil import parser
+from dateutil.tz import gettz
+
+from .compat import ensure_pyodbc
+
+ensure_pyodbc()
+
+from TSMGMT.utils import changed_keys, epoch_map, to_dt, to_pst
+
+from .payloads import generate
+
+# -- the helpers as they were --------------------------------------------------
+def old_datetimes_match(dt1, dt2):
+    if dt1 is None or dt2 is None:
+        return False
+    if isinstance(dt1, str):
+        dt1 = datetime.fromisoformat(dt1)
+    if isinstance(dt2, str):
+        dt2 = datetime.fromisoformat(dt2)
+    if dt1.tzinfo is not None:
+        dt1 = dt1.astimezone(timezone.utc).replace(tzinfo=None)
+    if dt2.tzinfo is not None:
+        dt2 = dt2.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt1.replace(microsecond=0) == dt2.replace(microsecond=0)
+
+def old_to_pst(ts_input):
+    if isinstance(ts_input, str):
+        if ts_input.endswith('Z'):
+            ts_input = ts_input[:-1] + '+00:00'
+        dt = parser.parse(ts_input)
+    else:
+        dt = ts_input
+    tz = gettz('America/Los_Angeles') or gettz('US/Pacific')
+    return dt.astimezone(tz).strftime('%b %d, %Y %I:%M:%S %p')
+
+# -- the two ways of finding changed rows --------------------------------------
+def old_changed(api, db_rows):
+    db_map = {r['todo_id']: to_dt(r['updated_at']) for r in db_rows}
+    return {t['id'] for t in api
+            if not old_datetimes_match(db_map.get(t['id']), to_dt(t['updated_at']))}
+
+def new_changed(api, db_rows):
+    return changed_keys({t['id']: t['updated_at'] for t in api}, epoch_map(db_rows, 'todo_id'))
+
+def _best(fn, repeat, *args):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        took = time.perf_counter() - start
+        best = took if best is None else min(best, took)
+    return best, result
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--scale', default='10k')
+    ap.add_argument('--touch', type=float, default=0.05)
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    ds = generate(args.scale)
+    db_rows = [{'todo_id': t['id'], 'updated_at': to_dt(t['updated_at']).replace(tzinfo=None)}
+               for t in ds.api_todos()]
+    touched = ds.touch(args.touch)
+    api = ds.api_todos()
+
+    before, old_ids = _best(old_changed, args.repeat, api, db_rows)
+    after, new_ids = _best(new_changed, args.repeat, api, db_rows)
+    assert old_ids == new_ids, "epoch comparison disagrees with datetimes_match"
+
+    stamps = [t['updated_at'] for t in api[:2000]]
+    pst_before, _ = _best(lambda: [old_to_pst(s) for s in stamps], args.repeat)
+    pst_after, _ = _best(lambda: [to_pst(s) for s in stamps], args.repeat)
+
+    print(f"rows:              {len(api)} ({touched} touched, {len(new_ids)} changed)")
+    print(f"old staleness:     {before * 1e3:9.1f} ms  ({len(api) / before:,.0f} rows/s)")
+    print(f"new staleness:     {after * 1e3:9.1f} ms  ({len(api) / after:,.0f} rows/s)")
+    print(f"speedup:           {before / after:9.1f}x")
+    print(f"old to_pst:        {pst_before / len(stamps) * 1e6:9.1f} us")
+    print(f"new to_pst:        {pst_after / len(stamps) * 1e6:9.1f} us")
+    print(f"speedup:           {pst_before / pst_after:9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Load test for long-lived sync_stream subscribers: page latency with no
+subscribers, then with --subscribers idle connections held open on a
+running sync.
+
+    python -m benchmarks.bench_sse [--server async|wsgi] [--subscribers 500] [--requests 200]
+
+--server async  is runserver.py --async (TSMGMT/serving.py): Tornado,
+                sync streams on the event loop, Flask on --threads WSGI threads
+--server wsgi   the Flask app alone on a WSGI server with a fixed pool of
+                --threads, the way it is served today; each subscriber
+                holds a thread (pages that can't get one time out after
+                PAGE_TIMEOUT, so keep --requests small)
+
+Pages are /work_status/board.json against benchmarks/fakedb.py, seeded by
+a 1k sync from the fake Basecamp API.  The sync the subscribers watch is
+a stand-in that stays idle until the test ends, so what gets measured is
+the cost of holding the connections, not of producing events.
+"""
+import argparse
+import asyncio
+import http.client
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .compat import ensure_pyodbc
+
+ensure_pyodbc()
+
+# create_app() reads these; nothing here talks to Google, Basecamp or SQL Server
+for _name in ('TSMGMT_APP_SECRET_KEY', 'TSMGMT_GOOGLE_CLIENT_ID', 'TSMGMT_GOOGLE_CLIENT_SECRET',
+              'TSMGMT_DBCONN_PROD_SERVER', 'TSMGMT_DBCONN_BOMS_SERVER', 'TSMGMT_BASECAMP_ACCOUNT_ID'):
+    os.environ.setdefault(_name, 'bench')
+
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from TSMGMT import create_app
+from TSMGMT.serving import make_application
+from TSMGMT.work_status import basecamp, events
+
+from . import fakedb
+from .bench_sync import install_fakes
+from .fake_api import FakeBasecampAPI, InProcessClient
+from .payloads import generate
+
+PAGE = '/work_status/board.json'
+STREAM = '/work_status/sync_stream'
+PAGE_TIMEOUT = 5.0
+
+# -- servers -------------------------------------------------------------------
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug's server with a fixed worker pool, like waitress / IIS FastCGI."""
+
+    def __init__(self, host, port, app, threads):
+        super().__init__(host, port, app, handler=QuietHandler)
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix='wsgi')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+def start_async(app, threads):
+    ready = threading.Event()
+    box = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        sockets = bind_sockets(0, '127.0.0.1')
+        HTTPServer(make_application(app, threads)).add_sockets(sockets)
+        box['port'] = sockets[0].getsockname()[1]
+        box['loop'] = loop
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name='bench-async', daemon=True).start()
+    ready.wait()
+    return box['port'], lambda: box['loop'].call_soon_threadsafe(box['loop'].stop)
+
+def start_wsgi(app, threads):
+    server = PooledWSGIServer('127.0.0.1', 0, app, threads)
+    threading.Thread(target=server.serve_forever, name='bench-wsgi', daemon=True).start()
+    return server.server_port, server.shutdown
+
+# -- clients -------------------------------------------------------------------
+def session_cookie(app) -> str:
+    data = {'user': {'email': 'person1@example.com'}, 'basecamp_token': {'access_token': 'bench'}}
+    value = app.session_interface.get_signing_serializer(app).dumps(data)
+    return f"{app.config['SESSION_COOKIE_NAME']}={value}"
+
+def page_latencies(port, cookie, n):
+    """Sequential GETs of PAGE; seconds per request, None for a timeout / failure."""
+    out = []
+    for _ in range(n):
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=PAGE_TIMEOUT)
+            conn.request('GET', PAGE, headers={'Cookie': cookie})
+            resp = conn.getresponse()
+            resp.read()
+            conn.close()
+            out.append(time.perf_counter() - start if resp.status == 200 else None)
+        except OSError:
+            out.append(None)
+    return out
+
+class Subscribers:
+    """`n` sync_stream connections held open on a loop thread; counts those that got hello."""
+
+    def __init__(self, port, cookie, n, timeout=30.0):
+        self.port, self.cookie, self.n, self.timeout = port, cookie, n, timeout
+        self.connected = 0
+        self.writers = []
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='bench-subscribers', daemon=True)
+        self.thread.start()
+
+    async def _one(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        self.writers.append(writer)
+        writer.write(f"GET {STREAM} HTTP/1.1\r\nHost: bench\r\nCookie: {self.cookie}\r\n"
+                     f"Accept: text/event-stream\r\n\r\n".encode())
+        await writer.drain()
+        seen = b''
+        while b'event: hello' not in seen:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return
+            seen = seen[-64:] + chunk
+        self.connected += 1
+
+    async def _open_all(self):
+        async def guarded():
+            try:
+                await asyncio.wait_for(self._one(), self.timeout)
+            except (asyncio.TimeoutError, OSError):
+                pass
+        await asyncio.gather(*(guarded() for _ in range(self.n)))
+
+    def open(self):
+        asyncio.run_coroutine_threadsafe(self._open_all(), self.loop).result()
+
+    def close(self):
+        async def close_all():
+            for w in self.writers:
+                w.close()
+        asyncio.run_coroutine_threadsafe(close_all(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+def summary(label, lat):
+    ok = sorted(x for x in lat if x is not None)
+    failed = len(lat) - len(ok)
+    if not ok:
+        return f"{label:<22} all {failed} requests failed / timed out"
+    p95 = ok[min(len(ok) - 1, int(len(ok) * 0.95))]
+    text = f"{label:<22} p50 {statistics.median(ok) * 1e3:7.1f} ms   p95 {p95 * 1e3:7.1f} ms"
+    return text + (f"   ({failed} failed / timed out)" if failed else '')
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--server', choices=('async', 'wsgi'), default='async')
+    ap.add_argument('--subscribers', type=int, default=500)
+    ap.add_argument('--requests', type=int, default=200)
+    ap.add_argument('--threads', type=int, default=16, help="WSGI worker threads")
+    args = ap.parse_args()
+
+    app = create_app()
+    install_fakes(fakedb.FakeDatabase(), InProcessClient(FakeBasecampAPI(generate('1k'))))
+    with app.app_context():
+        for _ in basecamp.sync_basecamp_cache_with_yield({'access_token': 'bench'}):
+            pass
+
+    # the sync the subscribers join: idle until the test is over
+    stop = threading.Event()
+    def idle_sync():
+        yield "Syncing project 'bench'"
+        stop.wait()
+        yield "All done!"
+    events.start_run(idle_sync, started_by='bench')
+
+    starter = start_async if args.server == 'async' else start_wsgi
+    port, shutdown = starter(app, args.threads)
+    cookie = session_cookie(app)
+
+    page_latencies(port, cookie, 10)   # warm up
+    before = page_latencies(port, cookie, args.requests)
+    threads_before = threading.active_count()
+
+    subs = Subscribers(port, cookie, args.subscribers, timeout=10.0 if args.server == 'wsgi' else 30.0)
+    started = time.perf_counter()
+    subs.open()
+    opened_in = time.perf_counter() - started
+    during = page_latencies(port, cookie, args.requests)
+    threads_during = threading.active_count()
+
+    stop.set()
+    subs.close()
+    shutdown()
+
+    print(f"server:                {args.server} ({args.threads} WSGI threads)")
+    print(f"subscribers:           {subs.connected}/{args.subscribers} connected in {opened_in:.1f}s")
+    print(f"threads:               {threads_before} -> {threads_during}")
+    print(summary("page, 0 subscribers:", before))
+    print(summary(f"page, {subs.connected} subscribers:", during))
+
+if __name__ == '__main__':
+    main()
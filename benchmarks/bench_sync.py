@@ -0,0 +1,294 @@
+"""
+Offline benchmarks for the Basecamp cache sync.
+
+Runs the real work_status.basecamp code against benchmarks/fakedb.py
+(SQLite behind the execute_query / execute_many interface) and
+benchmarks/fake_api.py (synthetic Basecamp data, no network, no rate
+limit), and writes machine-readable results:
+
+    python -m benchmarks.bench_sync --scale 1k --scale 10k --repeat 3
+    python -m benchmarks.bench_sync --scale 100k --skip-full-sync --label before
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+    python -m benchmarks.bench_sync --scale 10k --http --latency-ms 80 --throttle-every 200
+
+Measured, per scale:
+    rows_to_dicts                      N todo rows -> CaseInsensitiveDicts
+    bulk_merge_todos.cold / .warm      empty table / nothing changed
+    _upsert_<entity>.cold / .warm      projects, todosets, todolists, cardtables, cardcolumns
+    bulk_load.execute_many / .executemany / .tvp
+                                       N todo rows into BasecampTodos: a materialized list
+                                       through execute_many vs a generator through
+                                       bulk_load on each path (compare rows/s)
+    get_all_pages.sequential / .parallel
+                                       every todo via recordings.json, Link walking vs
+                                       concurrent pages (most telling with --latency-ms)
+    sync.cold / .warm / .incremental   sync_basecamp_cache_with_yield end to end;
+                                       incremental edits 5% of todos/cards first
+
+--http serves the fake API from benchmarks/fake_server.py on a local
+port so requests go through real sockets; --latency-ms / --throttle-every
+add per-request latency and injected 429s.
+
+Absolute numbers are SQLite's, not SQL Server's; compare runs against
+each other.  The db_calls / api_calls / connections counts are exact.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from .compat import ensure_pyodbc
+
+PYODBC = ensure_pyodbc()
+
+from flask import Flask
+
+from TSMGMT.db.connection import bulk_load, execute_many, rows_to_dicts
+from TSMGMT.metrics.collector import collect
+from TSMGMT.work_status import basecamp
+
+from . import fakedb
+from .fake_api import FakeBasecampAPI, InProcessClient
+from .fake_server import FakeBasecampServer, HTTPClient
+from .payloads import generate
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+TOKEN = {'access_token': 'benchmark'}
+
+CACHE_TABLES = (
+    'BasecampSyncState', 'BasecampProjects', 'BasecampTodosets', 'BasecampTodoLists',
+    'BasecampTodos', 'BasecampTodoAssignees', 'BasecampCardTables', 'BasecampCardColumns',
+    'BasecampCards', 'BasecampCardAssignees', 'BasecampCardStep', 'BasecampCardStepAssignees',
+)
+
+# -- harness ---------------------------------------------------------------------
+class Bench:
+    def __init__(self, db: fakedb.FakeDatabase, repeat: int):
+        self.db = db
+        self.repeat = repeat
+        self.results = []
+
+    def measure(self, name, scale, items, fn, setup=None, repeat=None):
+        samples = []
+        for _ in range(repeat or self.repeat):
+            if setup:
+                setup()
+            opened = self.db.connections_opened
+            prepared = self.db.statements_prepared
+            with collect() as work:
+                started = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - started)
+            connections = self.db.connections_opened - opened
+            prepares = self.db.statements_prepared - prepared
+
+        median = statistics.median(samples)
+        result = {
+            'name': name,
+            'scale': scale,
+            'items': items,
+            'repeat': len(samples),
+            'seconds': {
+                'min': min(samples),
+                'median': median,
+                'mean': statistics.fmean(samples),
+                'max': max(samples),
+            },
+            'items_per_sec': items / median if median and items else None,
+            # counts from the last repetition
+            'db_calls': work.db_calls,
+            'db_time': work.db_time,
+            'db_rows': work.rows,
+            'api_calls': work.api_calls,
+            'connections': connections,
+            'prepares': prepares,
+        }
+        self.results.append(result)
+        rate = f"  {result['items_per_sec']:>10,.0f}/s" if result['items_per_sec'] else ''
+        print(f"  {name:<28} {scale:>5}  median {median * 1000:10.1f} ms{rate}"
+              f"  db={work.db_calls:<6} api={work.api_calls:<6} conns={connections:<5} prepares={prepares}",
+              flush=True)
+        return result
+
+def install_fakes(db, client):
+    fakedb.install(db)
+    basecamp.oauth = type('FakeOAuth', (), {'basecamp': client})()
+    # skip the 45-per-10s limiter; api_calls still counts every request
+    basecamp.limited_get = basecamp._get_with_retries
+
+# -- benchmarks ------------------------------------------------------------------
+def bench_rows_to_dicts(bench, scale, ds):
+    desc = tuple((c, None, None, None, None, None, True) for c in
+                 ('todo_id', 'todolist_id', 'content', 'app_url', 'due_on', 'completed', 'updated_at'))
+    row_cls = fakedb._row_class(desc)
+    now = datetime.now()
+    rows = [row_cls((t['id'], t['parent']['id'], t['content'], t['app_url'], now, 0, now))
+            for t in ds.api_todos()]
+    bench.measure('rows_to_dicts', scale, len(rows), lambda: rows_to_dicts(rows))
+
+def bench_bulk_merge(bench, scale, ds):
+    todos = ds.api_todos()
+    truncate = lambda: bench.db.truncate('BasecampTodos', 'BasecampTodoAssignees')
+    bench.measure('bulk_merge_todos.cold', scale, len(todos),
+                  lambda: basecamp.bulk_merge_todos(todos), setup=truncate)
+    bench.measure('bulk_merge_todos.warm', scale, len(todos),
+                  lambda: basecamp.bulk_merge_todos(todos))
+
+def bench_bulk_load(bench, scale, ds):
+    schema = basecamp.TODO_STAGING
+    now = datetime.now()
+
+    def rows():
+        for t in ds.api_todos():
+            yield (t['id'], t['parent']['id'], t['content'], t['app_url'], now, t['completed'], now)
+
+    cols = ', '.join(schema.names)
+    insert_sql = f"INSERT INTO BasecampTodos ({cols}) VALUES ({', '.join('?' for _ in schema.columns)});"
+    truncate = lambda: bench.db.truncate('BasecampTodos')
+    bench.measure('bulk_load.execute_many', scale, ds.todo_count,
+                  lambda: execute_many(insert_sql, list(rows()), input_sizes=schema.input_sizes()),
+                  setup=truncate)
+    for method in ('executemany', 'tvp'):
+        bench.measure(f'bulk_load.{method}', scale, ds.todo_count,
+                      lambda: bulk_load('BasecampTodos', rows(), schema, method=method),
+                      setup=truncate)
+
+def bench_upserts(bench, scale, ds):
+    cases = (
+        ('_upsert_projects',     'BasecampProjects',    list(ds.projects.values())),
+        ('_upsert_todosets',     'BasecampTodosets',    list(ds.todosets.values())),
+        ('_upsert_todolists',    'BasecampTodoLists',
+            [tl for tl in ds.todolists.values() if tl['parent']['type'] == 'Todoset']),
+        ('_upsert_cardtables',   'BasecampCardTables',  list(ds.card_tables.values())),
+        ('_upsert_cardcolumns',  'BasecampCardColumns', list(ds.columns.values())),
+    )
+    for name, table, payload in cases:
+        fn = getattr(basecamp, name)
+        bench.measure(f'{name}.cold', scale, len(payload), lambda: fn(payload),
+                      setup=lambda: bench.db.truncate(table))
+        bench.measure(f'{name}.warm', scale, len(payload), lambda: fn(payload))
+
+def bench_pages(bench, scale, ds):
+    path = 'projects/recordings.json?type=Todo&bucket=' + ','.join(str(pid) for pid in ds.projects)
+    workers = basecamp.PAGE_FETCH_WORKERS
+    try:
+        basecamp.PAGE_FETCH_WORKERS = 1
+        bench.measure('get_all_pages.sequential', scale, ds.todo_count,
+                      lambda: basecamp._get_all_pages(path, TOKEN))
+    finally:
+        basecamp.PAGE_FETCH_WORKERS = workers
+    bench.measure('get_all_pages.parallel', scale, ds.todo_count,
+                  lambda: basecamp._get_all_pages(path, TOKEN))
+
+def bench_full_sync(bench, scale, ds, touch_fraction):
+    def run():
+        for _ in basecamp.sync_basecamp_cache_with_yield(TOKEN):
+            pass
+
+    truncate = lambda: bench.db.truncate(*CACHE_TABLES)
+    bench.measure('sync.cold', scale, ds.todo_count, run, setup=truncate)
+    bench.measure('sync.warm', scale, ds.todo_count, run)
+    bench.measure('sync.incremental', scale, ds.todo_count, run,
+                  setup=lambda: ds.touch(touch_fraction))
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--scale', action='append', help="1k, 10k, 100k or a todo count (repeatable; default 1k)")
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--page-size', type=int, default=50, help="fake API page size")
+    ap.add_argument('--http', action='store_true', help="serve the fake API over a local socket")
+    ap.add_argument('--latency-ms', type=float, default=0, help="added to every fake API request")
+    ap.add_argument('--jitter-ms', type=float, default=0)
+    ap.add_argument('--throttle-every', type=int, default=0, help="fake API answers every Nth request with 429")
+    ap.add_argument('--touch', type=float, default=0.05, help="fraction edited before sync.incremental")
+    ap.add_argument('--skip-full-sync', action='store_true', help="only the helper benchmarks")
+    ap.add_argument('--only', action='append', help="run only benchmarks whose name starts with this")
+    ap.add_argument('--label', help="name for this run (default: timestamp)")
+    ap.add_argument('--output', help=f"results file (default: {RESULTS_DIR}/<label>.json)")
+    args = ap.parse_args(argv)
+
+    scales = args.scale or ['1k']
+    label = args.label or datetime.now().strftime('%Y%m%d-%H%M%S')
+    output = args.output or os.path.join(RESULTS_DIR, f'{label}.json')
+
+    suites = [
+        ('rows_to_dicts', bench_rows_to_dicts),
+        ('bulk_merge_todos', bench_bulk_merge),
+        ('bulk_load', bench_bulk_load),
+        ('_upsert_', bench_upserts),
+        ('get_all_pages', bench_pages),
+    ]
+    if not args.skip_full_sync:
+        suites.append(('sync.', lambda b, s, d: bench_full_sync(b, s, d, args.touch)))
+    if args.only:
+        suites = [(p, fn) for p, fn in suites if any(p.startswith(o) or o.startswith(p) for o in args.only)]
+
+    app = Flask('benchmarks')
+    results = []
+    with app.app_context():
+        for scale in scales:
+            print(f"[{scale}] generating data...", flush=True)
+            server = FakeBasecampServer() if args.http else None
+            ds = generate(scale, seed=args.seed, base_url=server.base_url if server else None)
+            api = FakeBasecampAPI(ds, page_size=args.page_size, latency_ms=args.latency_ms,
+                                  jitter_ms=args.jitter_ms, throttle_every=args.throttle_every,
+                                  seed=args.seed)
+            db = fakedb.FakeDatabase()
+            try:
+                if server:
+                    server.start(api)
+                    install_fakes(db, HTTPClient(server.base_url))
+                else:
+                    install_fakes(db, InProcessClient(api))
+                bench = Bench(db, args.repeat)
+                for _, suite in suites:
+                    suite(bench, scale, ds)
+                results.extend(bench.results)
+                print(f"  fake API: {api.stats()}")
+            finally:
+                if server:
+                    server.stop()
+                db.close()
+
+    report = {
+        'meta': {
+            'label': label,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sqlite': sqlite3.sqlite_version,
+            'pyodbc': PYODBC,
+            'scales': scales,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'page_size': args.page_size,
+            'transport': 'http' if args.http else 'in-process',
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'throttle_every': args.throttle_every,
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2)
+    print(f"wrote {output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Compare two benchmark result files written by benchmarks.bench_sync (or
+any benchmark that writes the same {"meta", "results"} layout).
+
+    python -m benchmarks.compare BASELINE.json CURRENT.json [--threshold 10] [--fail]
+
+Results are matched on (name, scale).  A change beyond --threshold
+percent in median time is flagged; with --fail the exit status is 1 if
+anything got slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+def load(path):
+    with open(path, encoding='utf-8') as fh:
+        report = json.load(fh)
+    return report['meta'], {(r['name'], r.get('scale')): r for r in report['results']}
+
+def _pct(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('baseline')
+    ap.add_argument('current')
+    ap.add_argument('--threshold', type=float, default=10.0, help="percent change worth flagging")
+    ap.add_argument('--fail', action='store_true', help="exit 1 on any regression beyond the threshold")
+    args = ap.parse_args(argv)
+
+    base_meta, base = load(args.baseline)
+    cur_meta, cur = load(args.current)
+    print(f"baseline: {base_meta.get('label')} ({base_meta.get('git_commit')})")
+    print(f"current:  {cur_meta.get('label')} ({cur_meta.get('git_commit')})")
+    print()
+    print(f"{'benchmark':<30} {'scale':>6} {'base ms':>11} {'cur ms':>11} {'change':>8} "
+          f"{'db calls':>15} {'api calls':>15}")
+
+    regressions = 0
+    for key in sorted(set(base) | set(cur), key=lambda k: (str(k[1]), k[0])):
+        name, scale = key
+        b, c = base.get(key), cur.get(key)
+        if b is None or c is None:
+            only = 'current' if b is None else 'baseline'
+            print(f"{name:<30} {scale or '':>6}  (only in {only})")
+            continue
+
+        b_ms = b['seconds']['median'] * 1000
+        c_ms = c['seconds']['median'] * 1000
+        change = _pct(b_ms, c_ms)
+        flag = ''
+        if abs(change) >= args.threshold:
+            flag = ' slower' if change > 0 else ' faster'
+            regressions += change > 0
+
+        calls = f"{b.get('db_calls', '-')}->{c.get('db_calls', '-')}"
+        api = f"{b.get('api_calls', '-')}->{c.get('api_calls', '-')}"
+        print(f"{name:<30} {scale or '':>6} {b_ms:11.1f} {c_ms:11.1f} {change:+7.1f}% "
+              f"{calls:>15} {api:>15}{flag}")
+
+    if args.fail and regressions:
+        print(f"\n{regressions} benchmark(s) slower than the {args.threshold:g}% threshold")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Let the benchmarks import TSMGMT on a machine with no ODBC driver manager.
+
+The real pyodbc is always used when it imports.  If it cannot be loaded
+(typically "libodbc.so.2: cannot open shared object file"), a small
+module with pyodbc's exception class and the SQL_* type constants the
+app references is registered in its place.  Nothing in it can talk to a
+database; benchmarks/fakedb.py supplies the connections.
+"""
+import sys
+import types
+
+# the pyodbc constants TSMGMT references (values match pyodbc / sql.h)
+_SQL_TYPES = {
+    'SQL_BIGINT': -5,
+    'SQL_BIT': -7,
+    'SQL_INTEGER': 4,
+    'SQL_VARCHAR': 12,
+    'SQL_LONGVARCHAR': -1,
+    'SQL_WVARCHAR': -9,
+    'SQL_WLONGVARCHAR': -10,
+    'SQL_TYPE_DATE': 91,
+    'SQL_TYPE_TIMESTAMP': 93,
+    'SQL_SS_TABLE': -153,
+}
+
+def _offline_pyodbc(reason: str) -> types.ModuleType:
+    mod = types.ModuleType('pyodbc')
+    mod.__doc__ = f"offline stand-in for pyodbc ({reason})"
+    mod.OFFLINE = True
+
+    class Error(Exception):
+        pass
+
+    class DatabaseError(Error):
+        pass
+
+    class OperationalError(DatabaseError):
+        pass
+
+    class Connection:
+        pass
+
+    class Cursor:
+        pass
+
+    def connect(*args, **kwargs):
+        raise OperationalError(f"pyodbc is unavailable here: {reason}")
+
+    mod.Error = Error
+    mod.DatabaseError = DatabaseError
+    mod.OperationalError = OperationalError
+    mod.Connection = Connection
+    mod.Cursor = Cursor
+    mod.connect = connect
+    for name, value in _SQL_TYPES.items():
+        setattr(mod, name, value)
+    return mod
+
+def ensure_pyodbc() -> str:
+    """Import pyodbc, or register the stand-in.  Returns 'pyodbc <version>' or 'offline'."""
+    try:
+        import pyodbc
+        if getattr(pyodbc, 'OFFLINE', False):
+            return 'offline'
+        return f"pyodbc {pyodbc.version}"
+    except ImportError as e:
+        sys.modules['pyodbc'] = _offline_pyodbc(str(e))
+        return 'offline'
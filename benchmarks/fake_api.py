@@ -0,0 +1,323 @@
+"""
+A fake Basecamp 3 API over a benchmarks.payloads.Dataset.
+
+FakeBasecampAPI.handle() does the routing, updated_since filtering and
+Link-header pagination, plus the things a load test needs to be able to
+switch on: weak ETags with If-None-Match -> 304, an injected 429 with
+Retry-After every N requests, and per-request latency.  ReplayAPI serves
+the same interface from an Archive of recorded responses instead of a
+Dataset.  InProcessClient puts either behind the same
+`.get(url, token=..., headers=...)` / `.api_base_url` surface as the
+authlib client the sync code calls through oauth.basecamp;
+benchmarks/fake_server.py puts them behind real HTTP.
+
+Endpoints (relative to the account base URL):
+    projects.json
+    buckets/<p>/todosets/<id>.json
+    buckets/<p>/todosets/<id>/todolists.json
+    buckets/<p>/todolists/<id>/groups.json
+    buckets/<p>/todolists/<id>/todos.json          ?completed=true for completed
+    buckets/<p>/card_tables/<id>.json
+    buckets/<p>/card_tables/lists/<id>.json
+    buckets/<p>/card_tables/lists/<id>/cards.json
+    buckets/<p>/card_tables/cards/<id>.json        (with steps)
+    people.json
+    projects/recordings.json?type=Todo&bucket=<p>[,<p>...]
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from requests.exceptions import HTTPError
+
+from .payloads import BASE_URL, Dataset
+
+DEFAULT_PAGE_SIZE = 50
+
+def parse_since(value: str) -> Optional[datetime]:
+    """
+    Parse an updated_since value.  Accepts what to_iso() produces for aware
+    datetimes ('...+00:00Z') and a '+' that arrived as a space.
+    """
+    if not value:
+        return None
+    value = value.strip().replace(' ', '+')
+    if value.endswith('Z'):
+        value = value[:-1]
+        if '+' not in value[10:]:
+            value += '+00:00'
+    return datetime.fromisoformat(value)
+
+def _updated(item: dict) -> datetime:
+    return datetime.fromisoformat(item['updated_at'].replace('Z', '+00:00'))
+
+class FakeBasecampAPI:
+    """
+    Args:
+        dataset:        what to serve (None for subclasses with their own source)
+        page_size:      items per page on list endpoints
+        latency_ms:     added to every request, +/- jitter_ms (seeded, so repeatable)
+        throttle_every: answer every Nth request with 429 + Retry-After (0 = never)
+        retry_after:    seconds sent in Retry-After
+    """
+
+    def __init__(self, dataset: Optional[Dataset], page_size: int = DEFAULT_PAGE_SIZE,
+                 latency_ms: float = 0, jitter_ms: float = 0,
+                 throttle_every: int = 0, retry_after: int = 1,
+                 seed: int = 1, base_url: Optional[str] = None):
+        self.ds = dataset
+        self.base_url = base_url or (dataset.base_url if dataset else BASE_URL)
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.pages_served = 0
+        self.not_modified = 0
+        self.throttled = 0
+
+        self._routes: List[Tuple[re.Pattern, Callable]] = [
+            (re.compile(p), fn) for p, fn in (
+                (r'^projects\.json$',                                    self._projects),
+                (r'^buckets/\d+/todosets/(\d+)\.json$',                  self._todoset),
+                (r'^buckets/\d+/todosets/(\d+)/todolists\.json$',        self._todolists),
+                (r'^buckets/\d+/todolists/(\d+)/groups\.json$',          self._groups),
+                (r'^buckets/\d+/todolists/(\d+)/todos\.json$',           self._todos),
+                (r'^buckets/\d+/card_tables/(\d+)\.json$',               self._card_table),
+                (r'^buckets/\d+/card_tables/lists/(\d+)\.json$',         self._column),
+                (r'^buckets/\d+/card_tables/lists/(\d+)/cards\.json$',   self._cards),
+                (r'^buckets/\d+/card_tables/cards/(\d+)\.json$',         self._card),
+                (r'^people\.json$',                                      self._people),
+                (r'^projects/recordings\.json$',                         self._recordings),
+            )
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        return {'requests': self.requests, 'pages': self.pages_served,
+                'not_modified': self.not_modified, 'throttled': self.throttled}
+
+    # -- request handling ------------------------------------------------------
+    def relative(self, url: str) -> Tuple[str, Dict[str, str]]:
+        """Split an absolute or base-relative URL into (path, single-valued query)."""
+        if url.startswith(self.base_url):
+            url = url[len(self.base_url):]
+        parts = urlsplit(url)
+        query = {k: v[-1] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+        return parts.path.lstrip('/'), query
+
+    def handle(self, method: str, url: str, headers: Optional[dict] = None) -> Tuple[int, dict, bytes]:
+        """Serve one request; returns (status, headers, body bytes)."""
+        with self._lock:
+            self.requests += 1
+            throttle = self.throttle_every and self.requests % self.throttle_every == 0
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        if delay:
+            time.sleep(delay)
+        if throttle:
+            with self._lock:
+                self.throttled += 1
+            return 429, {'Retry-After': str(self.retry_after)}, b''
+        if method.upper() != 'GET':
+            return 405, {}, b''
+
+        path, query = self.relative(url)
+        status, resp_headers, content = self.respond(path, query)
+        if status != 200:
+            return status, resp_headers, content
+
+        etag = resp_headers.setdefault('ETag', 'W/"%s"' % hashlib.md5(content).hexdigest())
+        inm = {k.lower(): v for k, v in (headers or {}).items()}.get('if-none-match')
+        if inm and etag in [t.strip() for t in inm.split(',')]:
+            with self._lock:
+                self.not_modified += 1
+            return 304, {'ETag': etag}, b''
+        resp_headers.setdefault('Content-Type', 'application/json; charset=utf-8')
+        return status, resp_headers, content
+
+    def respond(self, path: str, query: Dict[str, str]) -> Tuple[int, dict, bytes]:
+        for pattern, fn in self._routes:
+            m = pattern.match(path)
+            if not m:
+                continue
+            result = fn(query, *[int(g) for g in m.groups()])
+            if result is None:
+                return 404, {}, b''
+            headers = {}
+            if isinstance(result, list):
+                headers, result = self._page(path, query, result)
+            return 200, headers, json.dumps(result).encode('utf-8')
+        return 404, {}, b''
+
+    def _page(self, path: str, query: dict, items: List[dict]) -> Tuple[dict, list]:
+        since = parse_since(query.get('updated_since'))
+        if since is not None:
+            items = [i for i in items if _updated(i) > since]
+
+        page = max(1, int(query.get('page') or 1))
+        start = (page - 1) * self.page_size
+        body = items[start:start + self.page_size]
+        headers = {'X-Total-Count': str(len(items))}
+        if start + self.page_size < len(items):
+            next_query = dict(query, page=page + 1)
+            headers['Link'] = f'<{self.base_url}{path}?{urlencode(next_query)}>; rel="next"'
+        with self._lock:
+            self.pages_served += 1
+        return headers, body
+
+    # -- endpoints ----------------------------------------------------------------
+    def _projects(self, q):
+        return list(self.ds.projects.values())
+
+    def _todoset(self, q, tsid):
+        return self.ds.todosets.get(tsid)
+
+    def _todolists(self, q, tsid):
+        ids = self.ds.lists_by_todoset.get(tsid)
+        return None if ids is None else [self.ds.todolists[i] for i in ids]
+
+    def _groups(self, q, tlid):
+        if tlid not in self.ds.todolists:
+            return None
+        return [self.ds.todolists[i] for i in self.ds.groups_by_list.get(tlid, [])]
+
+    def _todos(self, q, tlid):
+        ids = self.ds.todos_by_list.get(tlid)
+        if ids is None:
+            return None
+        # like Basecamp: active todos by default, completed ones on request
+        want_completed = q.get('completed') == 'true'
+        todos = (self.ds.todos[i] for i in ids)
+        return [t for t in todos if bool(t['completed']) == want_completed]
+
+    def _card_table(self, q, ctid):
+        return self.ds.card_tables.get(ctid)
+
+    def _column(self, q, cid):
+        return self.ds.columns.get(cid)
+
+    def _cards(self, q, cid):
+        ids = self.ds.cards_by_column.get(cid)
+        return None if ids is None else [self.ds.cards[i] for i in ids]
+
+    def _card(self, q, cid):
+        return self.ds.card_with_steps(cid) if cid in self.ds.cards else None
+
+    def _people(self, q):
+        return list(self.ds.people)
+
+    def _recordings(self, q):
+        if q.get('type') != 'Todo':
+            return []
+        buckets = {int(b) for b in q.get('bucket', '').split(',') if b}
+        todos = [t for t in self.ds.todos.values() if not buckets or t['bucket']['id'] in buckets]
+        return sorted(todos, key=lambda t: t['updated_at'], reverse=True)
+
+# -----------------------------------------------------------------------------
+# Record / replay
+# -----------------------------------------------------------------------------
+
+class Archive:
+    """
+    A directory of recorded responses, one JSON file per (path, query).
+    URLs inside bodies and Link headers are stored relative to the
+    recorded account's base URL and rewritten to whatever base URL
+    replays them, so follow-up requests come back to the replayer.
+    """
+
+    KEPT_HEADERS = ('Link', 'X-Total-Count', 'ETag', 'Last-Modified', 'Retry-After')
+    PLACEHOLDER = '{{BASE_URL}}'
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(path: str, query: Dict[str, str]) -> str:
+        canonical = path + '?' + urlencode(sorted(query.items()))
+        slug = re.sub(r'[^\w.-]+', '_', path)[-80:]
+        return f"{slug}-{hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:12]}.json"
+
+    def store(self, base_url: str, path: str, query: Dict[str, str],
+              status: int, headers: dict, content: bytes) -> None:
+        def unbase(text: str) -> str:
+            return text.replace(base_url, self.PLACEHOLDER)
+
+        kept = {k: unbase(v) for k, v in headers.items() if k in self.KEPT_HEADERS}
+        entry = {'path': path, 'query': query, 'status': status, 'headers': kept,
+                 'body': unbase(content.decode('utf-8', errors='replace'))}
+        with open(os.path.join(self.directory, self.key(path, query)), 'w', encoding='utf-8') as fh:
+            json.dump(entry, fh, indent=1)
+
+    def load(self, base_url: str, path: str, query: Dict[str, str]) -> Optional[Tuple[int, dict, bytes]]:
+        try:
+            with open(os.path.join(self.directory, self.key(path, query)), encoding='utf-8') as fh:
+                entry = json.load(fh)
+        except FileNotFoundError:
+            return None
+
+        def rebase(text: str) -> str:
+            return text.replace(self.PLACEHOLDER, base_url)
+
+        headers = {k: rebase(v) for k, v in entry['headers'].items()}
+        return entry['status'], headers, rebase(entry['body']).encode('utf-8')
+
+    def __len__(self) -> int:
+        return sum(1 for f in os.listdir(self.directory) if f.endswith('.json'))
+
+class ReplayAPI(FakeBasecampAPI):
+    """Serve recorded responses; anything not in the archive is a 404."""
+
+    def __init__(self, archive: Archive, **kwargs):
+        super().__init__(None, **kwargs)
+        self.archive = archive
+        self.misses = 0
+
+    def respond(self, path, query):
+        hit = self.archive.load(self.base_url, path, query)
+        if hit is None:
+            with self._lock:
+                self.misses += 1
+            return 404, {}, b''
+        with self._lock:
+            self.pages_served += 1
+        return hit[0], dict(hit[1]), hit[2]
+
+# -----------------------------------------------------------------------------
+# In-process client (stands in for oauth.basecamp)
+# -----------------------------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict, content: bytes, url: str):
+        self.status_code = status_code
+        self.headers = headers
+        self.url = url
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} for url: {self.url}", response=self)
+
+class InProcessClient:
+    """Enough of authlib's OAuth app for work_status.basecamp."""
+
+    def __init__(self, api: FakeBasecampAPI):
+        self.api = api
+        self.api_base_url = api.base_url
+
+    def get(self, url, token=None, headers=None, **kwargs):
+        status, resp_headers, content = self.api.handle('GET', url, headers or {})
+        return FakeResponse(status, resp_headers, content, url)
@@ -0,0 +1,186 @@
+"""
+Local HTTP stand-in for the Basecamp 3 API, for end-to-end sync load tests.
+
+Synthetic data (see benchmarks/payloads.py):
+
+    python -m benchmarks.fake_server --scale 10k --port 8765 \
+        --latency-ms 80 --jitter-ms 20 --throttle-every 200 --retry-after 1
+
+Record real responses through a proxy, then replay them deterministically:
+
+    python -m benchmarks.fake_server --record archive/ \
+        --upstream https://3.basecampapi.com/<account>/ --port 8765
+    python -m benchmarks.fake_server --replay archive/ --port 8765
+
+Point the app at it with
+    TSMGMT_BASECAMP_API_BASE_URL=http://127.0.0.1:8765/999999/
+
+Every mode serves the same paths (relative to /<account>/) as
+benchmarks/fake_api.py, with Link pagination, updated_since, weak ETags
+(If-None-Match -> 304), injected 429 + Retry-After and added latency.
+"""
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from .fake_api import Archive, FakeBasecampAPI, ReplayAPI
+from .payloads import generate
+
+DEFAULT_ACCOUNT = '999999'
+USER_AGENT = 'TSMGMT benchmarks (fake_server recorder)'
+
+class RecordingProxy:
+    """
+    Forward each request to the real API (passing the caller's
+    Authorization header through) and archive the response for ReplayAPI.
+    """
+
+    def __init__(self, upstream: str, archive: Archive, base_url: str):
+        self.upstream = upstream.rstrip('/') + '/'
+        self.archive = archive
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.requests = 0
+        # reuse the URL splitting of the fake API
+        self._splitter = FakeBasecampAPI(None, base_url=base_url)
+
+    def handle(self, method: str, url: str, headers: Optional[dict] = None) -> Tuple[int, dict, bytes]:
+        self.requests += 1
+        path, query = self._splitter.relative(url)
+        forward = {k: v for k, v in (headers or {}).items()
+                   if k.lower() in ('authorization', 'if-none-match', 'accept')}
+        forward['User-Agent'] = USER_AGENT
+
+        resp = self.session.request(method, self.upstream + path, params=query, headers=forward, timeout=60)
+        headers_out = dict(resp.headers)
+        content = resp.content
+
+        if resp.status_code not in (304, 429):
+            self.archive.store(self.upstream, path, query, resp.status_code, headers_out, content)
+
+        # hand the client URLs that point back at us
+        content = content.replace(self.upstream.encode('utf-8'), self.base_url.encode('utf-8'))
+        kept = {k: v.replace(self.upstream, self.base_url)
+                for k, v in headers_out.items() if k in Archive.KEPT_HEADERS}
+        kept['Content-Type'] = headers_out.get('Content-Type', 'application/json')
+        return resp.status_code, kept, content
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True   # headers and body go out in separate writes
+    server: 'FakeBasecampServer'
+
+    def do_GET(self):
+        path = self.path
+        if path.startswith(self.server.prefix):
+            path = path[len(self.server.prefix):]
+        status, headers, content = self.server.api.handle('GET', path, dict(self.headers))
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if content:
+            self.wfile.write(content)
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+class FakeBasecampServer(ThreadingHTTPServer):
+    """
+    Bind first (port 0 picks a free one), then build the API against
+    .base_url so the URLs in its payloads point back here, then start().
+    """
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 account: str = DEFAULT_ACCOUNT, verbose: bool = False):
+        super().__init__((host, port), _Handler)
+        self.prefix = f"/{account}/"
+        self.verbose = verbose
+        self.api = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{self.prefix}"
+
+    def start(self, api) -> 'FakeBasecampServer':
+        self.api = api
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-basecamp', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+class HTTPClient:
+    """oauth.basecamp stand-in that talks to a URL over real HTTP."""
+
+    def __init__(self, api_base_url: str):
+        self.api_base_url = api_base_url
+        self.session = requests.Session()
+
+    def get(self, url, token=None, headers=None, **kwargs):
+        if not url.startswith(('http://', 'https://')):
+            url = self.api_base_url + url.lstrip('/')
+        headers = dict(headers or {})
+        if token:
+            headers.setdefault('Authorization', f"Bearer {token.get('access_token', '')}")
+        return self.session.get(url, headers=headers, timeout=60)
+
+def build_api(args, base_url: str):
+    tuning: Dict[str, object] = dict(
+        page_size=args.page_size, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        throttle_every=args.throttle_every, retry_after=args.retry_after, seed=args.seed,
+    )
+    if args.record:
+        if not args.upstream:
+            raise SystemExit("--record needs --upstream")
+        return RecordingProxy(args.upstream, Archive(args.record), base_url)
+    if args.replay:
+        return ReplayAPI(Archive(args.replay), base_url=base_url, **tuning)
+    return FakeBasecampAPI(generate(args.scale, seed=args.seed, base_url=base_url), **tuning)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8765)
+    ap.add_argument('--account', default=DEFAULT_ACCOUNT)
+    ap.add_argument('--scale', default='1k', help="1k, 10k, 100k or a todo count (synthetic mode)")
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--page-size', type=int, default=50)
+    ap.add_argument('--latency-ms', type=float, default=0)
+    ap.add_argument('--jitter-ms', type=float, default=0)
+    ap.add_argument('--throttle-every', type=int, default=0, help="429 every Nth request (0 = never)")
+    ap.add_argument('--retry-after', type=int, default=1)
+    ap.add_argument('--record', metavar='DIR', help="proxy to --upstream and archive responses in DIR")
+    ap.add_argument('--upstream', help="real API base, e.g. https://3.basecampapi.com/<account>/")
+    ap.add_argument('--replay', metavar='DIR', help="serve archived responses from DIR")
+    ap.add_argument('--verbose', action='store_true', help="log every request")
+    args = ap.parse_args(argv)
+
+    server = FakeBasecampServer(args.host, args.port, args.account, verbose=args.verbose)
+    api = build_api(args, server.base_url)
+    server.api = api
+    print(f"fake Basecamp API on {server.base_url}  (Ctrl+C to stop)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stats = getattr(api, 'stats', None)
+        print(stats() if stats else f"{api.requests} requests")
+
+if __name__ == '__main__':
+    main()
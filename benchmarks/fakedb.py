@@ -0,0 +1,416 @@
+"""
+SQLite stand-in for the SQL Server databases behind TSMGMT.db.connection.
+
+FakeDatabase hands out pyodbc-style connections (cursor / execute /
+executemany / fetchall / nextset / commit / rollback / close) over a
+temporary SQLite file, and install() points get_connection at it.  The
+real execute_query, execute_many and rows_to_dicts then run unchanged,
+with the same connection-per-call and rollback-on-close behaviour as
+pyodbc.
+
+Only the T-SQL shapes the app actually sends are translated:
+
+  * IF EXISTS (SELECT ...) UPDATE ...; ELSE INSERT ...;
+  * MERGE target USING (VALUES ...)|#staging AS src ... (-> INSERT ... ON CONFLICT)
+  * DELETE alias FROM table alias INNER JOIN (...) x ON ...
+  * #temp tables, dbo./db.dbo. prefixes, table hints (NOLOCK, UPDLOCK, ...), ISNULL, [brackets]
+  * INSERT INTO t (cols) SELECT cols FROM ? with a table-valued parameter
+  * several statements in one batch
+"""
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple
+
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), 'schema.sql')
+
+# -- TYPE ADAPTERS (pyodbc hands back datetimes, not strings) -----------------
+def _adapt_datetime(d: datetime) -> str:
+    # pyodbc drops tzinfo without converting; do the same
+    return d.replace(tzinfo=None).isoformat(sep=' ')
+
+def _convert_datetime(raw: bytes) -> Optional[datetime]:
+    return datetime.fromisoformat(raw.decode()) if raw else None
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+for _decl in ('DATETIME2', 'DATETIME', 'SMALLDATETIME'):
+    sqlite3.register_converter(_decl, _convert_datetime)
+
+def _pyodbc_error(exc: Exception) -> Exception:
+    """Re-raise SQLite failures as whatever pyodbc.Error is loaded (real or shim)."""
+    return sys.modules['pyodbc'].Error(str(exc))
+
+# -- T-SQL -> SQLite TRANSLATION ----------------------------------------------
+_STRING = re.compile(r"N?'(?:[^']|'')*'")
+
+def _count_params(sql: str) -> int:
+    return _STRING.sub('', sql).count('?')
+
+def _split_statements(batch: str) -> List[str]:
+    """Split a batch on top-level semicolons (outside quotes/parentheses)."""
+    out, buf, depth, quote = [], [], 0, False
+    for ch in batch:
+        if ch == "'":
+            quote = not quote
+        elif not quote:
+            if ch == '(':
+                depth += 1
+            elif ch == ')':
+                depth -= 1
+            elif ch == ';' and depth == 0:
+                out.append(''.join(buf))
+                buf = []
+                continue
+        buf.append(ch)
+    out.append(''.join(buf))
+    return [s.strip() for s in out if s.strip()]
+
+def _balanced(text: str, start: int) -> int:
+    """Index just past the parenthesis group opening at text[start]."""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == '(':
+            depth += 1
+        elif text[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    raise ValueError(f"unbalanced parentheses in: {text}")
+
+_MERGE = re.compile(
+    r"MERGE\s+(?P<target>[\w.#\[\]]+)\s+(?:AS\s+)?(?P<talias>\w+)\s+"
+    r"USING\s+(?P<source>\(\s*VALUES\s*\((?P<vals>.*?)\)\s*\)|[\w.#\[\]]+)\s+(?:AS\s+)?(?P<salias>\w+)"
+    r"(?:\s*\((?P<scols>[^)]*)\))?\s+"
+    r"ON\s+(?P<on>.*?)\s+"
+    r"WHEN\s+MATCHED\s+THEN\s+UPDATE\s+SET\s+(?P<set>.*?)\s+"
+    r"WHEN\s+NOT\s+MATCHED(?:\s+BY\s+TARGET)?\s+THEN\s+"
+    r"INSERT\s*\((?P<icols>[^)]*)\)\s*VALUES\s*\((?P<ivals>.*)\)\s*$",
+    re.I | re.S
+)
+
+def _translate_merge(m) -> str:
+    talias, salias = m.group('talias'), m.group('salias')
+    keys = re.findall(rf"\b{talias}\.(\w+)\s*=\s*{salias}\.\w+", m.group('on'), re.I)
+
+    if m.group('vals') is not None:
+        vals = [v.strip() for v in m.group('vals').split(',')]
+        cols = [c.strip() for c in m.group('scols').split(',')]
+        source = 'SELECT ' + ', '.join(f"{v} AS {c}" for v, c in zip(vals, cols))
+    else:
+        source = f"SELECT * FROM {m.group('source')}"
+
+    set_clause = re.sub(rf"\b{salias}\.", 'excluded.', m.group('set'), flags=re.I)
+    set_clause = re.sub(rf"\b{talias}\.", '', set_clause, flags=re.I)
+    return (f"INSERT INTO {m.group('target')} ({m.group('icols')}) "
+            f"SELECT {m.group('ivals')} FROM ({source}) AS {salias} WHERE 1=1 "
+            f"ON CONFLICT({', '.join(keys)}) DO UPDATE SET {set_clause}")
+
+_DELETE_JOIN = re.compile(
+    r"DELETE\s+(?P<a>\w+)\s+FROM\s+(?P<table>[\w.#\[\]]+)\s+(?P=a)\s+"
+    r"(?:INNER\s+)?JOIN\s+(?P<join>.*?)\s+ON\s+(?P<on>.*)$",
+    re.I | re.S
+)
+
+def _translate_delete_join(m) -> str:
+    on = re.sub(rf"\b{m.group('a')}\.", f"{m.group('table')}.", m.group('on'))
+    return f"DELETE FROM {m.group('table')} WHERE EXISTS (SELECT 1 FROM {m.group('join')} WHERE {on})"
+
+_SUBSTITUTIONS = [
+    (re.compile(r"\b\w+\.dbo\.|\bdbo\.", re.I), ''),
+    (re.compile(r"\bWITH\s*\(\s*(?:NOLOCK|UPDLOCK|HOLDLOCK|ROWLOCK|READPAST)(?:\s*,\s*\w+)*\s*\)", re.I), ''),
+    (re.compile(r"\bISNULL\s*\(", re.I), 'IFNULL('),
+    (re.compile(r"\bCREATE\s+TABLE\s+#", re.I), 'CREATE TEMP TABLE #'),
+    (re.compile(r"\b(?:INT|BIGINT)\s+IDENTITY(?:\s*\(\s*\d+\s*,\s*\d+\s*\))?", re.I), 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    (re.compile(r"\bCREATE\s+TEMP\s+TABLE\s+#(\w+)", re.I), r'CREATE TEMP TABLE \1'),
+    (re.compile(r"#(\w+)"), r'temp.\1'),
+    (re.compile(r"\[(\w+)\]"), r'"\1"'),
+    (re.compile(r"\bGETUTCDATE\s*\(\s*\)", re.I), "datetime('now')"),
+    (re.compile(r"\bSYSUTCDATETIME\s*\(\s*\)", re.I), "datetime('now')"),
+]
+
+def translate(statement: str) -> str:
+    """Translate one T-SQL statement to SQLite."""
+    m = _MERGE.match(statement)
+    if m:
+        statement = _translate_merge(m)
+    else:
+        m = _DELETE_JOIN.match(statement)
+        if m:
+            statement = _translate_delete_join(m)
+
+    for pattern, repl in _SUBSTITUTIONS:
+        statement = pattern.sub(repl, statement)
+    return statement
+
+_IF_EXISTS = re.compile(r"IF\s+EXISTS\s*\(", re.I)
+_ELSE = re.compile(r"ELSE\s+", re.I)
+
+def compile_batch(batch: str) -> List[tuple]:
+    """
+    Turn a T-SQL batch into a plan of
+      ('sql',  text, nparams)  or
+      ('if',   (exists_sql, n), (then_sql, n), (else_sql, n))
+    """
+    plan = []
+    stmts = _split_statements(batch)
+    i = 0
+    while i < len(stmts):
+        stmt = stmts[i]
+        m = _IF_EXISTS.match(stmt)
+        if m:
+            end = _balanced(stmt, m.end() - 1)
+            cond = stmt[m.end():end - 1]
+            then = stmt[end:].strip()
+            other = ''
+            if i + 1 < len(stmts) and _ELSE.match(stmts[i + 1]):
+                other = _ELSE.sub('', stmts[i + 1], count=1)
+                i += 1
+            plan.append(('if',
+                         (translate(cond), _count_params(cond)),
+                         (translate(then), _count_params(then)),
+                         (translate(other), _count_params(other)) if other else None))
+        else:
+            plan.append(('sql', translate(stmt), _count_params(stmt)))
+        i += 1
+    return plan
+
+# bulk_load()'s table-valued-parameter insert
+_TVP_INSERT = re.compile(
+    r"^\s*INSERT\s+INTO\s+(?P<table>[\w.#\[\]]+)\s*\((?P<cols>[^)]*)\)\s*"
+    r"SELECT\s+[^;]*?\s+FROM\s+\?\s*;?\s*$",
+    re.I | re.S
+)
+
+def _tvp_rows(value) -> list:
+    # pyodbc TVPs may start with the table type name and schema
+    rows = list(value)
+    while rows and isinstance(rows[0], str):
+        rows.pop(0)
+    return rows
+
+_plan_cache: dict = {}
+
+def _plan(sql: str) -> List[tuple]:
+    plan = _plan_cache.get(sql)
+    if plan is None:
+        plan = _plan_cache[sql] = compile_batch(sql)
+    return plan
+
+# -- PYODBC-STYLE CONNECTION / CURSOR ------------------------------------------
+def _row_class(description):
+    # pyodbc rows carry cursor_description; rows_to_dicts relies on it
+    return type('Row', (tuple,), {'__slots__': (), 'cursor_description': description})
+
+class FakeCursor:
+    def __init__(self, conn: 'FakeConnection'):
+        self._conn = conn
+        self._cur = conn._sqlite.cursor()
+        self._results: List[Tuple[tuple, list]] = []
+        self.description = None
+        self.rowcount = -1
+        self.fast_executemany = False
+        self._prepared = None
+
+    # like pyodbc: leaving the `with` block commits (unless autocommit is
+    # on or the block raised), then the cursor is closed
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None and not self._conn.autocommit:
+            self._conn.commit()
+        self.close()
+
+    def setinputsizes(self, sizes):
+        pass
+
+    def _prepare(self, sql: str) -> None:
+        # like pyodbc: a cursor re-prepares only when the SQL text changes
+        if sql != self._prepared:
+            self._prepared = sql
+            self._conn._db.count_prepare()
+
+    def _run(self, sql: str, params: Sequence) -> int:
+        self._cur.execute(sql, params)
+        if self._cur.description:
+            desc = tuple((c[0], None, None, None, None, None, True) for c in self._cur.description)
+            row_cls = _row_class(desc)
+            self._results.append((desc, [row_cls(r) for r in self._cur.fetchall()]))
+        return self._cur.rowcount
+
+    def execute(self, sql: str, *params):
+        self._prepare(sql)
+        return self._execute(sql, *params)
+
+    def _execute(self, sql: str, *params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        params = list(params)
+
+        m = _TVP_INSERT.match(sql)
+        if m and len(params) == 1 and isinstance(params[0], list):
+            cols = m.group('cols')
+            values = ', '.join('?' for _ in cols.split(','))
+            return self._executemany(f"INSERT INTO {m.group('table')} ({cols}) VALUES ({values})",
+                                     _tvp_rows(params[0]))
+
+        self._results = []
+        self.rowcount = -1
+        try:
+            pos = 0
+            for step in _plan(sql):
+                if step[0] == 'sql':
+                    _, text, n = step
+                    self.rowcount = self._run(text, params[pos:pos + n])
+                    pos += n
+                    continue
+
+                _, (cond, n1), (then, n2), other = step
+                self._cur.execute(cond, params[pos:pos + n1])
+                exists = self._cur.fetchone() is not None
+                pos += n1
+                if exists:
+                    self.rowcount = self._run(then, params[pos:pos + n2])
+                pos += n2
+                if other:
+                    text, n3 = other
+                    if not exists:
+                        self.rowcount = self._run(text, params[pos:pos + n3])
+                    pos += n3
+        except sqlite3.Error as e:
+            raise _pyodbc_error(e) from e
+
+        self._conn._dirty = True
+        self._advance()
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        self._prepare(sql)
+        return self._executemany(sql, seq_of_params)
+
+    def _executemany(self, sql: str, seq_of_params):
+        plan = _plan(sql)
+        try:
+            if len(plan) == 1 and plan[0][0] == 'sql':
+                self._cur.executemany(plan[0][1], [list(p) for p in seq_of_params])
+                self.rowcount = self._cur.rowcount
+                self._conn._dirty = True
+                return self
+        except sqlite3.Error as e:
+            raise _pyodbc_error(e) from e
+
+        for params in seq_of_params:
+            self._execute(sql, list(params))
+        return self
+
+    def _advance(self):
+        if self._results:
+            self.description = self._results[0][0]
+        else:
+            self.description = None
+
+    def fetchall(self):
+        if not self._results:
+            return []
+        return self._results[0][1]
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows.pop(0) if rows else None
+
+    def nextset(self) -> bool:
+        if self._results:
+            self._results.pop(0)
+        self._advance()
+        return bool(self._results)
+
+    def close(self):
+        self._cur.close()
+
+class FakeConnection:
+    def __init__(self, db: 'FakeDatabase'):
+        self._db = db
+        self._sqlite = sqlite3.connect(db.path, detect_types=sqlite3.PARSE_DECLTYPES,
+                                       timeout=30, check_same_thread=False)
+        self._dirty = False
+        self.autocommit = False
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    def commit(self):
+        self._sqlite.commit()
+        self._dirty = False
+
+    def rollback(self):
+        self._sqlite.rollback()
+        self._dirty = False
+
+    def close(self):
+        # like pyodbc: anything not committed is rolled back
+        self._sqlite.rollback()
+        self._sqlite.close()
+
+class FakeDatabase:
+    """A throwaway SQLite file with the Basecamp cache schema loaded."""
+
+    def __init__(self, path: Optional[str] = None, schema_file: str = SCHEMA_FILE):
+        self._tmpdir = None
+        if path is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix='tsmgmt-bench-')
+            path = os.path.join(self._tmpdir.name, 'bench.sqlite')
+        self.path = path
+        self.connections_opened = 0
+        self.statements_prepared = 0
+        self._lock = threading.Lock()
+
+        with sqlite3.connect(self.path) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with open(schema_file, encoding='utf-8') as fh:
+                conn.executescript(fh.read())
+
+    def get_connection(self, connection_name: str = "SMS") -> FakeConnection:
+        with self._lock:
+            self.connections_opened += 1
+        return FakeConnection(self)
+
+    def count_prepare(self) -> None:
+        with self._lock:
+            self.statements_prepared += 1
+
+    def truncate(self, *tables: str) -> None:
+        with sqlite3.connect(self.path) as conn:
+            for table in tables:
+                conn.execute(f'DELETE FROM {table}')
+
+    def count(self, table: str) -> int:
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+    def close(self) -> None:
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+def install(db: FakeDatabase) -> None:
+    """
+    Point every loaded TSMGMT module's get_connection at `db`.  Modules
+    that did `from ..db.connection import get_connection` hold their own
+    reference, so each one is patched, not just db.connection.
+    """
+    from TSMGMT.db import connection
+    original = connection.get_connection
+    for name, module in list(sys.modules.items()):
+        current = getattr(module, 'get_connection', None) if name.startswith('TSMGMT') else None
+        # the real function, or a FakeDatabase installed earlier
+        if current is original or isinstance(getattr(current, '__self__', None), FakeDatabase):
+            module.get_connection = db.get_connection
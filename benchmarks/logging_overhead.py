@@ -0,0 +1,99 @@
+"""
+Per-request logging overhead: the old sitegroup setup (logger at DEBUG,
+synchronous console + rotating file handlers, f-string messages) against
+configure_logging() (QueueHandler + background listener, INFO level,
+lazy %-style messages).
+
+    python -m benchmarks.logging_overhead [--requests 2000]
+
+Console output goes to os.devnull in both cases so the terminal isn't
+what gets measured.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from types import SimpleNamespace
+
+from .compat import ensure_pyodbc
+
+ensure_pyodbc()
+
+from TSMGMT.utils import logging_setup
+from TSMGMT.utils.logging_setup import configure_logging, stop_logging
+
+# roughly what one sitegroup detail render logs: ~30 DEBUG lines, a couple of INFO
+DEBUG_PER_REQUEST = 30
+INFO_PER_REQUEST = 2
+
+def _fresh_logger(name):
+    lg = logging.getLogger(name)
+    lg.handlers.clear()
+    lg.propagate = False
+    return lg
+
+def old_setup(log_dir, devnull):
+    lg = _fresh_logger('bench_old.sitegroup')
+    lg.setLevel(logging.DEBUG)
+    fmt = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s", "%Y-%m-%d %H:%M:%S")
+    ch = logging.StreamHandler(devnull)
+    ch.setLevel(logging.DEBUG)
+    ch.setFormatter(fmt)
+    fh = RotatingFileHandler(os.path.join(log_dir, 'old.log'), maxBytes=5*1024*1024, backupCount=3, encoding='utf-8')
+    fh.setLevel(logging.INFO)
+    fh.setFormatter(fmt)
+    lg.addHandler(ch)
+    lg.addHandler(fh)
+    return lg, [ch, fh]
+
+def old_request(lg, directory, items):
+    for i in range(DEBUG_PER_REQUEST):
+        lg.debug(f"Fetching person_types with SQL: SELECT PersonTypeName FROM SiteGroupPersonTypeMap WHERE Directory = '{directory}' ({i})")
+        lg.debug(f"Loaded person_types={items}")
+    for i in range(INFO_PER_REQUEST):
+        lg.info(f"Rendered sitegroup '{directory}' section {i}")
+
+def new_request(lg, directory, items):
+    for i in range(DEBUG_PER_REQUEST):
+        lg.debug("Fetching person_types with SQL: SELECT PersonTypeName FROM SiteGroupPersonTypeMap WHERE Directory = '%s' (%s)", directory, i)
+        lg.debug("Loaded person_types=%s", items)
+    for i in range(INFO_PER_REQUEST):
+        lg.info("Rendered sitegroup '%s' section %s", directory, i)
+
+def _time(fn, lg, n):
+    items = [f"type{i}" for i in range(40)]
+    start = time.perf_counter()
+    for _ in range(n):
+        fn(lg, 'examplegroup', items)
+    return (time.perf_counter() - start) / n
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--requests', type=int, default=2000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, 'w') as devnull:
+        lg, handlers = old_setup(log_dir, devnull)
+        before = _time(old_request, lg, args.requests)
+        for h in handlers:
+            h.close()
+
+        app = SimpleNamespace(config={'LOG_DIR': log_dir, 'LOG_FILE': 'new.log',
+                                      'LOG_FILE_LOGGER': 'TSMGMT.sitegroup', 'LOG_LEVEL': 'INFO'})
+        configure_logging(app)
+        # point the listener's console handler at devnull as well
+        for h in logging_setup._listener.handlers:
+            if type(h) is logging.StreamHandler:
+                h.setStream(devnull)
+        after = _time(new_request, logging.getLogger('TSMGMT.sitegroup.models'), args.requests)
+        stop_logging()
+
+    print(f"requests:          {args.requests}")
+    print(f"old per request:   {before * 1e6:9.1f} us")
+    print(f"new per request:   {after * 1e6:9.1f} us")
+    print(f"speedup:           {before / after:9.1f}x")
+
+if __name__ == '__main__':
+    main()
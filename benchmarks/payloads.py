@@ -0,0 +1,274 @@
+"""
+Deterministic synthetic Basecamp data, shaped like the JSON the sync code
+reads: projects (with their dock), todosets, todolists and nested groups,
+todos, card tables with columns, cards and card steps, and people.
+
+    ds = generate('10k')          # 10,000 todos, plus proportional cards/steps
+    ds.touch(0.05)                # "edit" 5% of todos/cards for a warm re-sync
+
+Everything is keyed by id so benchmarks/fake_api.py can serve it.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+BASE_URL = "https://3.basecampapi.com/999999/"
+
+SCALES = {
+    '1k':   1_000,
+    '10k':  10_000,
+    '100k': 100_000,
+}
+
+LISTS_PER_PROJECT   = 10
+TODOS_PER_LIST      = 25
+GROUP_EVERY_N_LISTS = 10     # every 10th list has one nested group
+COLUMNS_PER_TABLE   = 4
+CARDS_PER_PROJECT   = 25
+STEPS_PER_CARD      = 2
+PEOPLE              = 50
+COMPLETED_SHARE     = 0.2
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def ts(dt: datetime) -> str:
+    """Basecamp timestamp format, e.g. 2025-01-01T00:00:00.000Z"""
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+class Dataset:
+    def __init__(self, todos: int, seed: int = 1, base_url: str = BASE_URL):
+        self.base_url = base_url
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self._next_id = 1_000_000
+        self.clock = EPOCH
+
+        self.people: List[dict] = []
+        self.projects: Dict[int, dict] = {}
+        self.todosets: Dict[int, dict] = {}
+        self.todolists: Dict[int, dict] = {}
+        self.lists_by_todoset: Dict[int, List[int]] = {}
+        self.groups_by_list: Dict[int, List[int]] = {}
+        self.todos: Dict[int, dict] = {}
+        self.todos_by_list: Dict[int, List[int]] = {}
+        self.card_tables: Dict[int, dict] = {}
+        self.columns: Dict[int, dict] = {}
+        self.cards: Dict[int, dict] = {}
+        self.cards_by_column: Dict[int, List[int]] = {}
+        self.steps_by_card: Dict[int, List[dict]] = {}
+
+        self._build(todos)
+
+    # -- helpers ----------------------------------------------------------------
+    def _id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _tick(self) -> str:
+        self.clock += timedelta(seconds=1)
+        return ts(self.clock)
+
+    def _assignees(self, k: int = 1) -> List[dict]:
+        return [
+            {'id': p['id'], 'name': p['name'], 'email_address': p['email_address']}
+            for p in self.rng.sample(self.people, k)
+        ]
+
+    def _due_on(self) -> Optional[str]:
+        if self.rng.random() < 0.2:
+            return None
+        return (EPOCH + timedelta(days=self.rng.randint(-30, 120))).strftime('%Y-%m-%d')
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    # -- build ----------------------------------------------------------------
+    def _build(self, todos: int) -> None:
+        for i in range(PEOPLE):
+            pid = self._id()
+            self.people.append({
+                'id': pid,
+                'name': f"Person {i}",
+                'email_address': f"person{i}@example.com",
+                'avatar_url': self._url(f"people/{pid}/avatar.png"),
+                'updated_at': self._tick(),
+            })
+
+        n_projects = max(1, todos // (LISTS_PER_PROJECT * TODOS_PER_LIST))
+        todos_left = todos
+        for i in range(n_projects):
+            share = todos_left // (n_projects - i)
+            todos_left -= share
+            self._build_project(i, share)
+
+    def _build_project(self, n: int, todo_count: int) -> None:
+        pid = self._id()
+        tsid, ctid = self._id(), self._id()
+        updated = self._tick()
+        bucket = {'id': pid, 'name': f"Project {n}", 'type': 'Project'}
+
+        self.projects[pid] = {
+            'id': pid, 'name': bucket['name'], 'status': 'active', 'updated_at': updated,
+            'url': self._url(f"projects/{pid}.json"),
+            'dock': [
+                {'id': tsid, 'title': 'To-dos', 'name': 'todoset', 'enabled': True,
+                 'url': self._url(f"buckets/{pid}/todosets/{tsid}.json")},
+                {'id': ctid, 'title': 'Card Table', 'name': 'kanban_board', 'enabled': True,
+                 'url': self._url(f"buckets/{pid}/card_tables/{ctid}.json")},
+                {'id': self._id(), 'title': 'Message Board', 'name': 'message_board', 'enabled': True,
+                 'url': self._url(f"buckets/{pid}/message_boards/0.json")},
+            ],
+        }
+
+        # todoset -> lists (+ nested groups) -> todos
+        self.todosets[tsid] = {
+            'id': tsid, 'title': 'To-dos', 'type': 'Todoset', 'updated_at': updated, 'bucket': bucket,
+            'todolists_url': self._url(f"buckets/{pid}/todosets/{tsid}/todolists.json"),
+        }
+        self.lists_by_todoset[tsid] = []
+        per_list, extra = divmod(todo_count, LISTS_PER_PROJECT)
+        for i in range(LISTS_PER_PROJECT):
+            tlid = self._new_list(pid, bucket, {'id': tsid, 'title': 'To-dos', 'type': 'Todoset'}, f"List {i}")
+            self.lists_by_todoset[tsid].append(tlid)
+            count = per_list + (1 if i < extra else 0)
+
+            target = tlid
+            if i % GROUP_EVERY_N_LISTS == 0 and count:
+                gid = self._new_list(pid, bucket, {'id': tlid, 'title': f"List {i}", 'type': 'Todolist'},
+                                     f"Group {i}", group=True)
+                self.groups_by_list[tlid] = [gid]
+                target = gid
+            for _ in range(count):
+                self._new_todo(pid, bucket, target)
+
+        # card table -> columns -> cards -> steps
+        table = {
+            'id': ctid, 'title': 'Card Table', 'type': 'Kanban::Board', 'updated_at': updated,
+            'bucket': bucket, 'lists': [],
+        }
+        self.card_tables[ctid] = table
+        col_ids = []
+        for i in range(COLUMNS_PER_TABLE):
+            cid = self._id()
+            col = {
+                'id': cid, 'title': f"Column {i}", 'type': 'Kanban::Column', 'updated_at': updated,
+                'parent': {'id': ctid, 'title': 'Card Table', 'type': 'Kanban::Board'}, 'bucket': bucket,
+                'url': self._url(f"buckets/{pid}/card_tables/lists/{cid}.json"),
+                'cards_url': self._url(f"buckets/{pid}/card_tables/lists/{cid}/cards.json"),
+            }
+            self.columns[cid] = col
+            self.cards_by_column[cid] = []
+            table['lists'].append(col)
+            col_ids.append(cid)
+
+        for i in range(CARDS_PER_PROJECT * max(1, todo_count // (LISTS_PER_PROJECT * TODOS_PER_LIST))):
+            self._new_card(pid, bucket, col_ids[i % COLUMNS_PER_TABLE])
+
+    def _new_list(self, pid, bucket, parent, title, group=False) -> int:
+        tlid = self._id()
+        self.todolists[tlid] = {
+            'id': tlid, 'title': title, 'type': 'Todolist', 'updated_at': self._tick(),
+            'bucket': bucket, 'parent': parent,
+            'app_url': self._url(f"buckets/{pid}/todolists/{tlid}"),
+            'todos_url': self._url(f"buckets/{pid}/todolists/{tlid}/todos.json"),
+            'groups_url': self._url(f"buckets/{pid}/todolists/{tlid}/groups.json"),
+        }
+        self.todos_by_list[tlid] = []
+        return tlid
+
+    def _new_todo(self, pid, bucket, tlid) -> None:
+        tid = self._id()
+        updated = self._tick()
+        completed = self.rng.random() < COMPLETED_SHARE
+        todo = {
+            'id': tid, 'status': 'active', 'type': 'Todo', 'created_at': updated, 'updated_at': updated,
+            'title': f"Todo {tid}", 'content': f"Todo {tid}",
+            'app_url': self._url(f"buckets/{pid}/todos/{tid}"),
+            'bucket': bucket,
+            'parent': {'id': tlid, 'title': self.todolists[tlid]['title'], 'type': 'Todolist'},
+            'due_on': self._due_on(),
+            'assignees': self._assignees(self.rng.choice((1, 1, 1, 2))),
+            'completed': completed,
+            'position': len(self.todos_by_list[tlid]) + 1,
+        }
+        if completed:
+            todo['completion'] = {'created_at': updated, 'creator': self._assignees()[0]}
+        self.todos[tid] = todo
+        self.todos_by_list[tlid].append(tid)
+
+    def _new_card(self, pid, bucket, col_id) -> None:
+        cid = self._id()
+        updated = self._tick()
+        self.cards[cid] = {
+            'id': cid, 'title': f"Card {cid}", 'type': 'Kanban::Card', 'updated_at': updated,
+            'app_url': self._url(f"buckets/{pid}/card_tables/cards/{cid}"),
+            'bucket': bucket,
+            'parent': {'id': col_id, 'title': self.columns[col_id]['title'], 'type': 'Kanban::Column'},
+            'due_on': self._due_on(),
+            'completed': self.rng.random() < COMPLETED_SHARE,
+            'assignees': self._assignees(),
+        }
+        self.cards_by_column[col_id].append(cid)
+        self.steps_by_card[cid] = [{
+            'id': self._id(), 'title': f"Step {i}", 'type': 'Kanban::Step', 'updated_at': updated,
+            'app_url': self._url(f"buckets/{pid}/card_tables/steps/{cid}-{i}"),
+            'due_on': self._due_on(), 'completed': self.rng.random() < COMPLETED_SHARE,
+            'assignees': self._assignees(),
+        } for i in range(STEPS_PER_CARD)]
+
+    # -- views used by the benchmarks --------------------------------------
+    def card_with_steps(self, card_id: int) -> dict:
+        return dict(self.cards[card_id], steps=self.steps_by_card.get(card_id, []))
+
+    def api_todos(self, n: Optional[int] = None) -> List[dict]:
+        """The first `n` todos as a flat API-shaped list (all of them by default)."""
+        todos = list(self.todos.values())
+        return todos if n is None else todos[:n]
+
+    @property
+    def todo_count(self) -> int:
+        return len(self.todos)
+
+    # -- mutation ----------------------------------------------------------
+    def touch(self, fraction: float) -> int:
+        """
+        Edit `fraction` of the todos and cards (new updated_at, some get
+        completed) and bump the updated_at of everything above them, the way
+        Basecamp does.  Returns how many todos changed.  Edits are stamped
+        with the wall clock, so watermarks taken by a previous sync apply.
+        """
+        self.clock = max(self.clock, datetime.now(timezone.utc))
+        stamp = self._tick()
+        todo_ids = self.rng.sample(list(self.todos), int(len(self.todos) * fraction))
+        for tid in todo_ids:
+            todo = self.todos[tid]
+            todo['updated_at'] = stamp
+            if not todo['completed'] and self.rng.random() < 0.25:
+                todo['completed'] = True
+                todo['completion'] = {'created_at': stamp, 'creator': self._assignees()[0]}
+
+            tl = self.todolists[todo['parent']['id']]
+            tl['updated_at'] = stamp
+            if tl['parent']['type'] == 'Todolist':
+                tl = self.todolists[tl['parent']['id']]
+                tl['updated_at'] = stamp
+            self.todosets[tl['parent']['id']]['updated_at'] = stamp
+            self.projects[todo['bucket']['id']]['updated_at'] = stamp
+
+        card_ids = self.rng.sample(list(self.cards), int(len(self.cards) * fraction))
+        for cid in card_ids:
+            card = self.cards[cid]
+            card['updated_at'] = stamp
+            for step in self.steps_by_card[cid]:
+                step['updated_at'] = stamp
+            col = self.columns[card['parent']['id']]
+            col['updated_at'] = stamp
+            self.card_tables[col['parent']['id']]['updated_at'] = stamp
+            self.projects[card['bucket']['id']]['updated_at'] = stamp
+
+        return len(todo_ids)
+
+def generate(scale: str = '1k', seed: int = 1, base_url: Optional[str] = None) -> Dataset:
+    """Build a dataset for a named scale ('1k', '10k', '100k') or a plain todo count."""
+    todos = SCALES[scale] if scale in SCALES else int(scale)
+    return Dataset(todos, seed=seed, base_url=base_url or BASE_URL)
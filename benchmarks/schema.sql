@@ -0,0 +1,173 @@
+-- SQLite version of the Basecamp cache tables, for benchmarks/fakedb.py.
+-- Column names and keys follow what TSMGMT/work_status reads and writes;
+-- types are the closest SQLite affinity (DATETIME2 keeps the converter).
+
+CREATE TABLE IF NOT EXISTS BasecampSyncState (
+    resource          TEXT PRIMARY KEY,
+    last_refreshed_at DATETIME2,
+    etag              TEXT
+);
+
+CREATE TABLE IF NOT EXISTS BasecampSyncLog (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_email TEXT,
+    clicked_at DATETIME2
+);
+
+CREATE TABLE IF NOT EXISTS BasecampStaffUsers (
+    email      TEXT PRIMARY KEY,
+    person_id  BIGINT,
+    name       TEXT,
+    avatar_url TEXT,
+    synced_at  DATETIME2
+);
+
+CREATE TABLE IF NOT EXISTS BasecampProjects (
+    project_id BIGINT PRIMARY KEY,
+    name       TEXT,
+    updated_at DATETIME2
+);
+
+CREATE TABLE IF NOT EXISTS BasecampTodosets (
+    todoset_id BIGINT PRIMARY KEY,
+    project_id BIGINT,
+    title      TEXT,
+    updated_at DATETIME2
+);
+
+CREATE TABLE IF NOT EXISTS BasecampTodoLists (
+    todolist_id    BIGINT PRIMARY KEY,
+    todoset_id     BIGINT,
+    parent_list_id BIGINT,
+    title          TEXT,
+    updated_at     DATETIME2
+);
+
+CREATE TABLE IF NOT EXISTS BasecampTodos (
+    todo_id     BIGINT PRIMARY KEY,
+    todolist_id BIGINT,
+    content     TEXT,
+    app_url     TEXT,
+    due_on      DATETIME2,
+    completed   BIT,
+    updated_at  DATETIME2
+);
+
+CREATE TABLE IF NOT EXISTS BasecampTodoAssignees (
+    todo_id     BIGINT,
+    assignee_id BIGINT
+);
+CREATE INDEX IF NOT EXISTS IX_BasecampTodoAssignees_todo ON BasecampTodoAssignees (todo_id);
+
+CREATE TABLE IF NOT EXISTS BasecampCardTables (
+    cardtable_id BIGINT PRIMARY KEY,
+    project_id   BIGINT,
+    title        TEXT,
+    updated_at   DATETIME2
+);
+
+CREATE TABLE IF NOT EXISTS BasecampCardColumns (
+    cardcolumn_id BIGINT PRIMARY KEY,
+    cardtable_id  BIGINT,
+    title         TEXT,
+    updated_at    DATETIME2
+);
+
+CREATE TABLE IF NOT EXISTS BasecampCards (
+    card_id       BIGINT PRIMARY KEY,
+    cardcolumn_id BIGINT,
+    title         TEXT,
+    updated_at    DATETIME2,
+    due_on        DATETIME2,
+    app_url       TEXT,
+    completed     BIT
+);
+
+CREATE TABLE IF NOT EXISTS BasecampCardAssignees (
+    card_id     BIGINT,
+    assignee_id BIGINT
+);
+CREATE INDEX IF NOT EXISTS IX_BasecampCardAssignees_card ON BasecampCardAssignees (card_id);
+
+CREATE TABLE IF NOT EXISTS BasecampCardStep (
+    step_id    BIGINT PRIMARY KEY,
+    card_id    BIGINT,
+    title      TEXT,
+    updated_at DATETIME2,
+    due_on     DATETIME2,
+    app_url    TEXT,
+    completed  BIT
+);
+
+CREATE TABLE IF NOT EXISTS BasecampCardStepAssignees (
+    step_id     BIGINT,
+    assignee_id BIGINT
+);
+CREATE INDEX IF NOT EXISTS IX_BasecampCardStepAssignees_step ON BasecampCardStepAssignees (step_id);
+
+CREATE TABLE IF NOT EXISTS BasecampTaskStatus (
+    id         BIGINT,
+    user_email TEXT,
+    status     TEXT,
+    position   INTEGER,
+    updated_at DATETIME2,
+    PRIMARY KEY (id, user_email)
+);
+
+CREATE TABLE IF NOT EXISTS BasecampSyncTelemetry (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    sync_id         TEXT,
+    started_at      DATETIME2,
+    status          TEXT,
+    phase           TEXT,
+    project_id      BIGINT,
+    project_name    TEXT,
+    api_calls       INTEGER,
+    pages           INTEGER,
+    api_bytes       BIGINT,
+    rate_limit_wait REAL,
+    rows_read       INTEGER,
+    rows_inserted   INTEGER,
+    rows_updated    INTEGER,
+    rows_deleted    INTEGER,
+    rows_unchanged  INTEGER,
+    db_calls        INTEGER,
+    db_time         REAL,
+    wall_time       REAL
+);
+
+-- Approximation of the production BasecampTasks view: one row per
+-- (todo | card | step, assignee), with the assignee's saved status.
+CREATE VIEW IF NOT EXISTS BasecampTasks AS
+SELECT 'todo' AS task_type, p.name AS project_name, t.todo_id AS id, t.content AS name,
+       t.due_on, s.status, t.app_url, u.email, s.position, t.completed,
+       a.assignee_id, t.updated_at
+  FROM BasecampTodos t
+  JOIN BasecampTodoAssignees a ON a.todo_id = t.todo_id
+  JOIN BasecampStaffUsers u ON u.person_id = a.assignee_id
+  LEFT JOIN BasecampTodoLists l ON l.todolist_id = t.todolist_id
+  LEFT JOIN BasecampTodoLists pl ON pl.todolist_id = l.parent_list_id
+  LEFT JOIN BasecampTodosets ts ON ts.todoset_id = IFNULL(l.todoset_id, pl.todoset_id)
+  LEFT JOIN BasecampProjects p ON p.project_id = ts.project_id
+  LEFT JOIN BasecampTaskStatus s ON s.id = t.todo_id AND s.user_email = u.email
+UNION ALL
+SELECT 'card', p.name, c.card_id, c.title, c.due_on, s.status, c.app_url, u.email,
+       s.position, c.completed, a.assignee_id, c.updated_at
+  FROM BasecampCards c
+  JOIN BasecampCardAssignees a ON a.card_id = c.card_id
+  JOIN BasecampStaffUsers u ON u.person_id = a.assignee_id
+  LEFT JOIN BasecampCardColumns col ON col.cardcolumn_id = c.cardcolumn_id
+  LEFT JOIN BasecampCardTables ct ON ct.cardtable_id = col.cardtable_id
+  LEFT JOIN BasecampProjects p ON p.project_id = ct.project_id
+  LEFT JOIN BasecampTaskStatus s ON s.id = c.card_id AND s.user_email = u.email
+UNION ALL
+SELECT 'step', p.name, st.step_id, st.title, st.due_on, s.status, st.app_url, u.email,
+       s.position, st.completed, a.assignee_id, st.updated_at
+  FROM BasecampCardStep st
+  JOIN BasecampCardStepAssignees a ON a.step_id = st.step_id
+  JOIN BasecampStaffUsers u ON u.person_id = a.assignee_id
+  LEFT JOIN BasecampCards c ON c.card_id = st.card_id
+  LEFT JOIN BasecampCardColumns col ON col.cardcolumn_id = c.cardcolumn_id
+  LEFT JOIN BasecampCardTables ct ON ct.cardtable_id = col.cardtable_id
+  LEFT JOIN BasecampProjects p ON p.project_id = ct.project_id
+  LEFT JOIN BasecampTaskStatus s ON s.id = st.step_id AND s.user_email = u.email;
@@ -1,5 +1,6 @@
 # config.py
 import os
+import json
 
 APP_SECRET_KEY       = os.getenv('TSMGMT_APP_SECRET_KEY')
 GOOGLE_CLIENT_ID     = os.getenv('TSMGMT_GOOGLE_CLIENT_ID')
@@ -9,6 +10,7 @@ GOOGLE_CLIENT_SECRET	 = os.getenv('TSMGMT_GOOGLE_CLIENT_SECRET')
 BASECAMP_CLIENT_ID     = os.getenv('TSMGMT_BASECAMP_CLIENT_ID')
 BASECAMP_CLIENT_SECRET = os.getenv('TSMGMT_BASECAMP_CLIENT_SECRET')
 BASECAMP_ACCOUNT_ID    = os.getenv('TSMGMT_BASECAMP_ACCOUNT_ID')
+BASECAMP_API_BASE_URL  = os.getenv('TSMGMT_BASECAMP_API_BASE_URL')   # default: https://3.basecampapi.com/<account>/
 
 if not APP_SECRET_KEY or not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
     raise ValueError("Missing required environment variables: TSMGMT_APP_SECRET_KEY, TSMGMT_GOOGLE_CLIENT_ID, TSMGMT_GOOGLE_CLIENT_SECRET")
@@ -29,4 +31,17 @@ DATABASE_CONFIG = {
         'server': DBCONN_BOMS_SERVER + '\\bomslive',
         'database': 'BOMS'
     }
-}
\ No newline at end of file
+}
+
+# Logging (see TSMGMT/utils/logging_setup.py)
+LOG_DIR    = os.getenv('TSMGMT_LOG_DIR', r'C:\inetpub\logs\sitegroup')
+LOG_LEVEL  = os.getenv('TSMGMT_LOG_LEVEL', 'INFO')
+LOG_LEVELS = json.loads(os.getenv('TSMGMT_LOG_LEVELS', '{}'))   # e.g. {"TSMGMT.sitegroup.models": "DEBUG"}
+
+# SQL statement profiler (see TSMGMT/db/profiler.py)
+SQL_PROFILER_ENABLED = os.getenv('TSMGMT_SQL_PROFILER_ENABLED', '0') == '1'
+SLOW_QUERY_MS        = float(os.getenv('TSMGMT_SLOW_QUERY_MS', '500'))
+
+# Bearer token Prometheus sends to scrape /metrics (see TSMGMT/metrics/routes.py);
+# unset, only a signed-in admin can read it
+METRICS_TOKEN = os.getenv('TSMGMT_METRICS_TOKEN')
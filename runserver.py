@@ -1,8 +1,22 @@
 # runserver.py
+import argparse
+
 from TSMGMT import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    #app.run(host="0.0.0.0")
-    app.run(debug=True, use_reloader=False)
+    ap = argparse.ArgumentParser(description="Run the TSMGMT app.")
+    ap.add_argument('--async', dest='use_async', action='store_true',
+                    help="serve with Tornado: sync streams on an event loop, pages on a WSGI thread pool")
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=5000)
+    ap.add_argument('--threads', type=int, default=None, help="WSGI threads in --async mode")
+    args = ap.parse_args()
+
+    if args.use_async:
+        from TSMGMT.serving import WSGI_THREADS, serve
+        serve(app, host=args.host, port=args.port, threads=args.threads or WSGI_THREADS)
+    else:
+        #app.run(host="0.0.0.0")
+        app.run(host=args.host, port=args.port, debug=True, use_reloader=False)
@@ -0,0 +1,18 @@
+-- sql/001_basecamp_people.sql
+-- People directory columns for work_status.basecamp.sync_people().
+-- Safe to re-run.
+
+IF COL_LENGTH('dbo.BasecampStaffUsers', 'name') IS NULL
+    ALTER TABLE dbo.BasecampStaffUsers ADD name NVARCHAR(255) NULL;
+GO
+IF COL_LENGTH('dbo.BasecampStaffUsers', 'avatar_url') IS NULL
+    ALTER TABLE dbo.BasecampStaffUsers ADD avatar_url NVARCHAR(1000) NULL;
+GO
+IF COL_LENGTH('dbo.BasecampStaffUsers', 'synced_at') IS NULL
+    ALTER TABLE dbo.BasecampStaffUsers ADD synced_at DATETIME2 NULL;
+GO
+
+-- validator for conditional GETs (people.json)
+IF COL_LENGTH('dbo.BasecampSyncState', 'etag') IS NULL
+    ALTER TABLE dbo.BasecampSyncState ADD etag NVARCHAR(200) NULL;
+GO
@@ -0,0 +1,30 @@
+-- sql/002_bulk_load_types.sql
+-- Table types for db.connection.bulk_load()'s table-valued-parameter path
+-- (BulkSchema.table_type).  Columns must match the BulkSchema declarations
+-- in work_status/basecamp.py, in order.
+-- Safe to re-run.
+
+IF TYPE_ID('dbo.BasecampTodoRows') IS NULL
+    CREATE TYPE dbo.BasecampTodoRows AS TABLE (
+        todo_id     BIGINT         NOT NULL,
+        todolist_id BIGINT         NULL,
+        content     NVARCHAR(4000) NULL,
+        app_url     NVARCHAR(4000) NULL,
+        due_on      DATETIME2      NULL,
+        completed   BIT            NULL,
+        updated_at  DATETIME2      NULL
+    );
+GO
+
+IF TYPE_ID('dbo.BasecampIdRows') IS NULL
+    CREATE TYPE dbo.BasecampIdRows AS TABLE (
+        entity_id BIGINT NOT NULL
+    );
+GO
+
+IF TYPE_ID('dbo.BasecampIdPairRows') IS NULL
+    CREATE TYPE dbo.BasecampIdPairRows AS TABLE (
+        entity_id   BIGINT NOT NULL,
+        assignee_id BIGINT NOT NULL
+    );
+GO
@@ -0,0 +1,30 @@
+-- sql/003_sitegroup_user_activity.sql
+-- Pre-aggregated login activity per sitegroup, maintained by
+-- sitegroup.activity.refresh_user_activity()
+-- (`flask --app runserver sitegroup refresh-activity`).
+-- Safe to re-run.
+
+IF OBJECT_ID('dbo.SiteGroupUserActivity', 'U') IS NULL
+    CREATE TABLE dbo.SiteGroupUserActivity (
+        Directory   NVARCHAR(100) NOT NULL PRIMARY KEY,
+        TotalUsers  INT           NOT NULL,
+        ActiveToday INT           NOT NULL,
+        Active7Days INT           NOT NULL,
+        LastLogin   DATETIME2     NULL,
+        RefreshedAt DATETIME2     NOT NULL
+    );
+GO
+
+IF OBJECT_ID('dbo.SiteGroupUserActivityDaily', 'U') IS NULL
+    CREATE TABLE dbo.SiteGroupUserActivityDaily (
+        Directory    NVARCHAR(100) NOT NULL,
+        ActivityDate DATE          NOT NULL,
+        ActiveUsers  INT           NOT NULL,
+        CONSTRAINT PK_SiteGroupUserActivityDaily PRIMARY KEY (Directory, ActivityDate)
+    );
+GO
+
+-- the refresh re-counts recent days by date across all sitegroups
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_SiteGroupUserActivityDaily_Date')
+    CREATE INDEX IX_SiteGroupUserActivityDaily_Date ON dbo.SiteGroupUserActivityDaily (ActivityDate);
+GO
@@ -0,0 +1,33 @@
+-- sql/004_basecamp_sync_telemetry.sql
+-- Per-sync, per-phase timings written by work_status.telemetry.SyncTelemetry
+-- at the end of every sync_basecamp_cache_with_yield() run; read by
+-- /work_status/admin/sync_stats.  Safe to re-run.
+
+IF OBJECT_ID('dbo.BasecampSyncTelemetry', 'U') IS NULL
+    CREATE TABLE dbo.BasecampSyncTelemetry (
+        id              BIGINT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+        sync_id         VARCHAR(32)    NOT NULL,   -- one run
+        started_at      DATETIME2      NOT NULL,   -- run start, UTC
+        status          VARCHAR(16)    NOT NULL,   -- ok | failed | cancelled
+        phase           VARCHAR(32)    NOT NULL,   -- people | projects | cards | todos | sync (run totals)
+        project_id      BIGINT         NULL,       -- cards / todos phases only
+        project_name    NVARCHAR(255)  NULL,
+        api_calls       INT            NOT NULL,
+        pages           INT            NOT NULL,
+        api_bytes       BIGINT         NOT NULL,
+        rate_limit_wait FLOAT          NOT NULL,   -- seconds
+        rows_read       INT            NOT NULL,
+        rows_inserted   INT            NOT NULL,
+        rows_updated    INT            NOT NULL,
+        db_calls        INT            NOT NULL,
+        db_time         FLOAT          NOT NULL,   -- seconds
+        wall_time       FLOAT          NOT NULL    -- seconds
+    );
+GO
+
+-- the dashboard reads a date window, by phase or by project
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_BasecampSyncTelemetry_Started')
+    CREATE INDEX IX_BasecampSyncTelemetry_Started
+        ON dbo.BasecampSyncTelemetry (started_at, phase)
+        INCLUDE (project_id, wall_time, db_time, api_calls);
+GO
@@ -0,0 +1,13 @@
+-- sql/005_basecamp_sync_telemetry_diff.sql
+-- Assignee diff counts for work_status.telemetry.SyncTelemetry: rows the
+-- sync deleted, and assignee pairs it found already in place.
+-- Safe to re-run.
+
+IF COL_LENGTH('dbo.BasecampSyncTelemetry', 'rows_deleted') IS NULL
+    ALTER TABLE dbo.BasecampSyncTelemetry ADD rows_deleted INT NOT NULL
+        CONSTRAINT DF_BasecampSyncTelemetry_RowsDeleted DEFAULT 0;
+
+IF COL_LENGTH('dbo.BasecampSyncTelemetry', 'rows_unchanged') IS NULL
+    ALTER TABLE dbo.BasecampSyncTelemetry ADD rows_unchanged INT NOT NULL
+        CONSTRAINT DF_BasecampSyncTelemetry_RowsUnchanged DEFAULT 0;
+GO